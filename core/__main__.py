@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""python -m core：命令行下载工具入口（见 core/cli.py）"""
+
+import sys
+
+from core.cli import main
+
+sys.exit(main())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文章标识与链接规范化
+
+同一篇文章会以不同的链接出现：http:// 与 https://、带或不带 chksm 等附加参数、
+末尾的 #rd、查询参数中的 &amp; 转义，以及 /s/<token> 短链接。这里把长链接归一为
+(__biz, mid, idx, sn)，并以 __biz:mid:idx 作为去重键；短链接在下载过一次页面后
+通过页面中的文章标识登记别名，之后同样能识别为同一篇文章。
+
+ArticleIndex 把已下载文章的去重键保存在 SQLite 中，打开时全部载入内存集合，
+GUI 和各个下载脚本在发起任何网络请求之前先查询它。
+"""
+
+import html
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, NamedTuple, Optional
+from urllib.parse import parse_qs, urlparse
+
+CANONICAL_HOST = 'mp.weixin.qq.com'
+
+
+class ArticleId(NamedTuple):
+    """文章标识：公众号 __biz、图文消息 mid、消息内序号 idx、签名 sn"""
+    biz: str
+    mid: str
+    idx: str
+    sn: str = ''
+
+    @property
+    def key(self) -> str:
+        return f"{self.biz}:{self.mid}:{self.idx}"
+
+    @property
+    def url(self) -> str:
+        """规范化的长链接"""
+        url = f"https://{CANONICAL_HOST}/s?__biz={self.biz}&mid={self.mid}&idx={self.idx}"
+        return f"{url}&sn={self.sn}" if self.sn else url
+
+
+def _number(value) -> str:
+    value = str(value or '').strip()
+    return str(int(value)) if value.isdigit() else value
+
+
+def make_article_id(biz: str, mid, idx, sn: str = '') -> Optional[ArticleId]:
+    """由各部分组成文章标识，缺少 __biz/mid/idx 任一部分时返回None"""
+    biz = (biz or '').strip().replace(' ', '+')
+    mid, idx = _number(mid), _number(idx)
+    if not biz or not mid or not idx:
+        return None
+    return ArticleId(biz, mid, idx, (sn or '').strip().lower())
+
+
+def article_key(biz: str, mid, idx) -> Optional[str]:
+    """去重键 __biz:mid:idx，缺少任一部分时返回None"""
+    article_id = make_article_id(biz, mid, idx)
+    return article_id.key if article_id else None
+
+
+def parse_article_id(url: str) -> Optional[ArticleId]:
+    """从长链接的查询参数中取出文章标识（短链接 /s/<token> 中没有，返回None）"""
+    query = parse_qs(urlparse(html.unescape(url or '').strip()).query)
+
+    def first(*names):
+        for name in names:
+            if query.get(name):
+                return query[name][0]
+        return ''
+
+    return make_article_id(first('__biz'), first('mid', 'appmsgid'), first('idx', 'itemidx'),
+                           first('sn', 'signature'))
+
+
+def key_from_url(url: str) -> Optional[str]:
+    """长链接的去重键，短链接返回None"""
+    article_id = parse_article_id(url)
+    return article_id.key if article_id else None
+
+
+def normalize_url(url: str) -> str:
+    """规范化链接：长链接化为 __biz/mid/idx/sn 形式，其他链接统一为 https 并去掉查询参数之外的片段"""
+    article_id = parse_article_id(url)
+    if article_id:
+        return article_id.url
+    parsed = urlparse(html.unescape(url or '').strip())
+    host = (parsed.hostname or CANONICAL_HOST).lower()
+    path = parsed.path.rstrip('/') or '/'
+    if path.startswith('/s/'):
+        # 短链接 /s/<token> 只由 token 决定
+        return f"https://{host}{path}"
+    query = f"?{parsed.query}" if parsed.query else ''
+    return f"https://{host}{path}{query}"
+
+
+def dedup_key(url: str) -> str:
+    """链接的去重键：能取到文章标识时为 __biz:mid:idx，否则为规范化后的链接"""
+    return key_from_url(url) or f"url:{normalize_url(url)}"
+
+
+class ArticleIndex:
+    """已下载文章的去重索引（内存集合 + SQLite）"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                added_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS aliases (
+                url TEXT PRIMARY KEY,
+                key TEXT NOT NULL
+            );
+        """)
+        self._conn.commit()
+        self._keys = {row[0] for row in self._conn.execute("SELECT key FROM articles")}
+        self._aliases: Dict[str, str] = dict(self._conn.execute("SELECT url, key FROM aliases"))
+
+    def key(self, url: str) -> str:
+        """链接对应的去重键，短链接先查登记过的别名"""
+        key = key_from_url(url)
+        if key:
+            return key
+        normalized = normalize_url(url)
+        return self._aliases.get(normalized) or f"url:{normalized}"
+
+    def contains(self, url: str) -> bool:
+        """文章是否已下载"""
+        return self.key(url) in self._keys
+
+    __contains__ = contains
+
+    def alias(self, url: str, biz: str, mid, idx) -> None:
+        """登记短链接等不带文章标识的链接实际指向的文章（下载页面后调用）"""
+        key = article_key(biz, mid, idx)
+        if not key or key_from_url(url):
+            return
+        normalized = normalize_url(url)
+        with self._lock:
+            if self._aliases.get(normalized) == key:
+                return
+            self._aliases[normalized] = key
+            self._conn.execute("INSERT OR REPLACE INTO aliases (url, key) VALUES (?, ?)", (normalized, key))
+            # 别名登记之前按短链接记下的下载记录归并到文章标识下
+            if f"url:{normalized}" in self._keys:
+                self._keys.add(key)
+                self._conn.execute("INSERT OR IGNORE INTO articles (key, url, added_at) VALUES (?, ?, ?)",
+                                   (key, normalized, time.time()))
+            self._conn.commit()
+
+    def add(self, url: str) -> None:
+        """记录文章已下载"""
+        self.add_many([url])
+
+    def add_many(self, urls: Iterable[str]) -> int:
+        """批量记录已下载文章，返回新增数量"""
+        rows = []
+        with self._lock:
+            for url in urls:
+                if not url:
+                    continue
+                key = self.key(url)
+                if key not in self._keys:
+                    self._keys.add(key)
+                    rows.append((key, normalize_url(url), time.time()))
+            if rows:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO articles (key, url, added_at) VALUES (?, ?, ?)", rows)
+                self._conn.commit()
+        return len(rows)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文章页面元数据提取
+
+微信文章页面在内联脚本中以 JS 变量给出发布时间、标题和文章标识：
+    var createTime = '2024-01-01 10:00';
+    var ct = "1704074400";
+    var msg_title = '标题'.html(false);
+    var biz = "MzU1MTk2NDE4Mg==" || "";
+    var mid = "2247489209" || "";
+    var idx = "1" || "";
+    var sn = "67694d6afbb51b0b2a4866cd310224f8" || "";
+这里直接在响应原文上扫描一遍取出这些字段，不需要把解析树重新序列化成字符串再做正则匹配。
+"""
+
+import html as html_lib
+import re
+from typing import Dict, Optional
+
+# 需要提取的 JS 变量名 -> 结果字段名
+META_FIELDS = {
+    'createTime': 'create_time',
+    'ct': 'ct',
+    'msg_title': 'msg_title',
+    'biz': 'biz',
+    'mid': 'mid',
+    'idx': 'idx',
+    'sn': 'sn',
+}
+
+# 一个正则同时匹配所有变量，整篇原文只扫描一遍；只认 var 声明，
+# 不会误取正文中 data-mid="..." 之类的HTML属性
+META_PATTERN = re.compile(
+    r'\bvar\s+(' + '|'.join(META_FIELDS) + r')\s*=\s*(["\'])([^"\'\r\n]*)\2')
+
+
+def scan_article_meta(html: str) -> Dict[str, str]:
+    """从文章页面原文中提取元数据，每个字段取第一个非空值，全部找到后提前结束"""
+    meta = {}
+    for match in META_PATTERN.finditer(html):
+        field = META_FIELDS[match.group(1)]
+        value = match.group(3).strip()
+        if value and field not in meta:
+            meta[field] = html_lib.unescape(value) if field == 'msg_title' else value
+            if len(meta) == len(META_FIELDS):
+                break
+    return meta
+
+
+def publish_time(meta: Dict[str, str]) -> str:
+    """发布时间：优先使用页面上的 createTime，没有时退回 ct 时间戳"""
+    return meta.get('create_time') or meta.get('ct', '')
+
+
+class ArticleRecord:
+    """单篇文章的下载结果
+
+    只保留标题、时间、文章标识、链接和正文子树（或正文HTML片段），不再持有整页解析树，
+    页面中的脚本、评论、推荐阅读等节点在解析结束后即可释放。
+    """
+
+    __slots__ = ('title', 'create_time', 'ct', 'url', 'biz', 'mid', 'idx', 'sn', 'content_soup',
+                 'from_cache')
+
+    def __init__(self, title: str, url: str, content_soup, create_time: str = '',
+                 ct: str = '', biz: str = '', mid: str = '', idx: str = '', sn: str = ''):
+        self.title = title
+        self.url = url
+        self.content_soup = content_soup
+        self.create_time = create_time
+        self.ct = ct
+        self.biz = biz
+        self.mid = mid
+        self.idx = idx
+        self.sn = sn
+        # 页面来自本地缓存（没有请求网络），调用方据此跳过请求之间的等待
+        self.from_cache = False
+
+    @classmethod
+    def from_meta(cls, title: str, url: str, content_soup,
+                  meta: Optional[Dict[str, str]] = None) -> 'ArticleRecord':
+        """由 scan_article_meta 的结果创建"""
+        meta = meta or {}
+        return cls(title, url, content_soup, create_time=publish_time(meta),
+                   ct=meta.get('ct', ''), biz=meta.get('biz', ''), mid=meta.get('mid', ''),
+                   idx=meta.get('idx', ''), sn=meta.get('sn', ''))
+
+    def __repr__(self) -> str:
+        # 不输出正文，日志里打印记录时不会把整篇文章刷屏
+        return (f"ArticleRecord(title={self.title!r}, create_time={self.create_time!r}, "
+                f"biz={self.biz!r}, mid={self.mid!r}, idx={self.idx!r}, url={self.url!r})")
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文章列表元数据库
+
+把文章列表接口返回的每篇文章（aid、标题、链接、发布时间、原创类型等）保存为 SQLite
+中的一行，发布月份和原创类型单独建索引，可以只追加新文章，并按月份/原创类型/公众号
+筛选扫描，不必像 Excel 列表那样每次读写整个工作簿。每篇文章的下载结果也记录在
+这里。Excel（需要 openpyxl）和 NDJSON 只作为最后的导出格式。
+
+用法:
+    python -m core.article_store stats --db wxlist.db
+    python -m core.article_store import-xlsx wxlist.xlsx --db wxlist.db
+    python -m core.article_store export-xlsx wxlist-final.xlsx --db wxlist.db --copyright-type 0
+    python -m core.article_store export-ndjson wxlist.ndjson --db wxlist.db --month 2024-05
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from core.article_id import dedup_key
+
+# 文章列表接口 app_msg_list 中每篇文章的字段
+ARTICLE_FIELDS = (
+    'aid', 'album_id', 'appmsg_album_infos', 'appmsgid', 'checking', 'copyright_type', 'cover',
+    'create_time', 'digest', 'has_red_packet_cover', 'is_pay_subscribe', 'item_show_type', 'itemidx',
+    'link', 'media_duration', 'mediaapi_publish_status', 'pay_album_info', 'tagid', 'title',
+    'update_time',
+)
+INTEGER_FIELDS = ('appmsgid', 'copyright_type', 'create_time', 'itemidx', 'update_time')
+# 列表/字典类型的字段以 JSON 文本保存
+JSON_FIELDS = ('appmsg_album_infos', 'pay_album_info', 'tagid')
+# 导出 Excel 时默认的列
+EXPORT_COLUMNS = ('aid', 'title', 'publish_time', 'link')
+
+
+def article_month(create_time) -> Optional[str]:
+    """发布时间戳对应的月份 YYYY-MM（本地时区）"""
+    if str(create_time or '').isdigit():
+        return time.strftime("%Y-%m", time.localtime(int(create_time)))
+    return None
+
+
+class ArticleMetaStore:
+    """文章列表元数据库"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ',\n'.join(f"{field} {'INTEGER' if field in INTEGER_FIELDS else 'TEXT'}"
+                             for field in ARTICLE_FIELDS if field != 'link')
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS articles (
+                key TEXT PRIMARY KEY,
+                link TEXT,
+                fakeid TEXT,
+                month TEXT,
+                {columns},
+                added_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_month ON articles(month, copyright_type);
+            CREATE INDEX IF NOT EXISTS idx_articles_copyright ON articles(copyright_type);
+            CREATE INDEX IF NOT EXISTS idx_articles_fakeid ON articles(fakeid, create_time);
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                link TEXT,
+                account TEXT,
+                title TEXT,
+                output_path TEXT,
+                result TEXT,
+                updated_at REAL
+            );
+        """)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row(article: Dict, fakeid: Optional[str]) -> tuple:
+        values = []
+        for field in ARTICLE_FIELDS:
+            value = article.get(field)
+            if field in JSON_FIELDS and value is not None and not isinstance(value, str):
+                value = json.dumps(value, ensure_ascii=False)
+            values.append(value)
+        return (dedup_key(article['link']), fakeid, article_month(article.get('create_time')),
+                *values, time.time())
+
+    def append(self, articles: Iterable[Dict], fakeid: Optional[str] = None) -> int:
+        """追加文章（同一篇文章再次出现时更新有值的字段），返回写入行数"""
+        rows = [self._row(article, fakeid) for article in articles if article.get('link')]
+        if not rows:
+            return 0
+        fields = ('key', 'fakeid', 'month') + ARTICLE_FIELDS + ('added_at',)
+        updates = ', '.join(f"{field} = COALESCE(excluded.{field}, {field})"
+                            for field in ARTICLE_FIELDS + ('month', 'fakeid'))
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT INTO articles ({', '.join(fields)}) VALUES ({', '.join('?' * len(fields))}) "
+                f"ON CONFLICT(key) DO UPDATE SET {updates}",
+                rows)
+            self._conn.commit()
+        return len(rows)
+
+    def scan(self, month: Optional[str] = None, copyright_type: Optional[int] = None,
+             fakeid: Optional[str] = None, newest_first: bool = False) -> Iterator[Dict]:
+        """按条件扫描文章，按发布时间排序"""
+        clauses, params = [], []
+        for column, value in (('month', month), ('copyright_type', copyright_type), ('fakeid', fakeid)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        order = 'DESC' if newest_first else 'ASC'
+        with self._lock:
+            cursor = self._conn.execute(
+                f"SELECT * FROM articles {where} ORDER BY create_time {order}, itemidx, rowid", params)
+            columns = [c[0] for c in cursor.description]
+            rows = cursor.fetchall()
+        for row in rows:
+            article = dict(zip(columns, row))
+            for field in JSON_FIELDS:
+                if article[field]:
+                    article[field] = json.loads(article[field])
+            yield article
+
+    def months(self, copyright_type: Optional[int] = None) -> Dict[str, int]:
+        """各月份的文章数"""
+        sql = "SELECT month, COUNT(*) FROM articles"
+        params = []
+        if copyright_type is not None:
+            sql += " WHERE copyright_type = ?"
+            params.append(copyright_type)
+        with self._lock:
+            return dict(self._conn.execute(sql + " GROUP BY month ORDER BY month", params))
+
+    def contains(self, link: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM articles WHERE key = ?",
+                                      (dedup_key(link),)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def record_result(self, link: str, title: str, result: str, account: str = '',
+                      output_path: Optional[str] = None) -> None:
+        """记录一篇文章的下载结果（成功为 success，失败为错误信息）"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, link, account, title, output_path, result, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (dedup_key(link), link, account, title, output_path, result, time.time()))
+            self._conn.commit()
+
+    def results(self) -> List[Dict]:
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT account, title, link, result, output_path FROM results ORDER BY updated_at")
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def import_xlsx(self, path: str, fakeid: Optional[str] = None) -> int:
+        """导入旧的 Excel 文章列表：JSON 文本单元格（整篇文章）或 [标题, 链接] 行"""
+        import openpyxl
+
+        articles = []
+        workbook = openpyxl.load_workbook(path, read_only=True)
+        for row in workbook.active.iter_rows(values_only=True):
+            article = None
+            for cell in row:
+                if isinstance(cell, str) and cell.startswith('{'):
+                    try:
+                        article = json.loads(cell)
+                        break
+                    except ValueError:
+                        continue
+            if article is None and len(row) >= 2 and isinstance(row[1], str) and row[1].startswith('http'):
+                article = {'title': row[0], 'link': row[1]}
+            if article:
+                articles.append(article)
+        workbook.close()
+        return self.append(articles, fakeid)
+
+
+def publish_time(article: Dict) -> str:
+    create_time = article.get('create_time')
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(int(create_time))) if create_time else ''
+
+
+def export_xlsx(rows: Iterable[Dict], path: str, columns=EXPORT_COLUMNS, append: bool = False) -> int:
+    """把文章或下载结果写入 Excel（需要 openpyxl），一次写完，返回行数
+
+    append 时追加到已有工作簿的末尾，不再写表头（文件不存在时新建并写表头）。
+    """
+    import openpyxl
+
+    if append and os.path.exists(path):
+        workbook = openpyxl.load_workbook(path)
+        sheet = workbook.active
+    else:
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(list(columns))
+    count = 0
+    for row in rows:
+        sheet.append([publish_time(row) if column == 'publish_time' else row.get(column)
+                      for column in columns])
+        count += 1
+    workbook.save(path)
+    return count
+
+
+def export_ndjson(rows: Iterable[Dict], path: str) -> int:
+    """每行一篇文章的 JSON，返回行数"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文章列表元数据库')
+    parser.add_argument('command', choices=['stats', 'import-xlsx', 'export-xlsx', 'export-ndjson'])
+    parser.add_argument('path', nargs='?', help='导入/导出的文件')
+    parser.add_argument('--db', default='./articles/.wefetch/articles_meta.db', help='数据库路径')
+    parser.add_argument('--fakeid', help='公众号 fakeid（导入时记录，导出时筛选）')
+    parser.add_argument('--month', help='只导出该月份 (YYYY-MM)')
+    parser.add_argument('--copyright-type', type=int, help='只导出该原创类型 (0 为非原创)')
+    args = parser.parse_args()
+
+    store = ArticleMetaStore(args.db)
+    if args.command == 'stats':
+        print(f"文章: {len(store)} 篇")
+        for month, count in store.months().items():
+            print(f"  {month}: {count}")
+        return
+    if not args.path:
+        parser.error('需要指定文件路径')
+    if args.command == 'import-xlsx':
+        print(f"已导入 {store.import_xlsx(args.path, args.fakeid)} 篇文章")
+        return
+    rows = store.scan(args.month, args.copyright_type, args.fakeid)
+    export = export_xlsx if args.command == 'export-xlsx' else export_ndjson
+    print(f"已导出 {export(rows, args.path)} 篇文章到 {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+微信文章异步下载引擎
+
+在 WeChatArticleDownloader 的解析/转换能力之上，使用 asyncio + aiohttp
+并发抓取文章页面和图片。文章页面 (mp.weixin.qq.com) 与图片 (mmbiz.qpic.cn)
+分别使用独立的并发上限和最小请求间隔，避免对公众号页面请求过快。
+"""
+
+import asyncio
+import os
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from core.article_meta import ArticleRecord
+from core.log import get_logger
+from core.metrics import ENDPOINT_IMAGE
+from core.pacing import PACE_RETRY
+from core.scheduler import RequestCancelled, ENDPOINT_ARTICLE
+from core.wechat_downloader_core import WeChatArticleDownloader
+
+# 图片CDN域名，其余请求按文章页面限流
+IMAGE_HOST_SUFFIXES = ('qpic.cn', 'qlogo.cn')
+
+log = get_logger('async')
+
+
+class HostLimiter:
+    """单个主机的并发上限与最小请求间隔"""
+
+    def __init__(self, concurrency: int, min_interval: float = 0.0):
+        self.min_interval = min_interval
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._lock = asyncio.Lock()
+        self._next_time = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        if self.min_interval > 0:
+            # 串行计算下一个可发请求的时间点，保证请求间隔
+            async with self._lock:
+                loop = asyncio.get_running_loop()
+                now = loop.time()
+                wait = self._next_time - now
+                self._next_time = max(now, self._next_time) + self.min_interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+
+
+class AsyncWeChatArticleDownloader(WeChatArticleDownloader):
+    """微信公众号文章异步下载器
+
+    get_article_content / save_article 与同步版本签名一致，但均为协程。
+    配置项:
+        page_concurrency: 文章页面并发数 (默认4)
+        page_interval: 文章页面最小请求间隔秒数 (默认0.5)
+        image_concurrency: 图片并发数 (默认16)
+        image_interval: 图片最小请求间隔秒数 (默认0)
+    """
+
+    def __init__(self, config: dict = None):
+        super().__init__(config)
+        self.page_concurrency = int(self.config.get('page_concurrency', 4))
+        self.page_interval = float(self.config.get('page_interval', 0.5))
+        self.image_concurrency = int(self.config.get('image_concurrency', 16))
+        self.image_interval = float(self.config.get('image_interval', 0.0))
+        self._http = None
+        self._page_limiter = None
+        self._image_limiter = None
+
+    async def __aenter__(self):
+        await self._ensure_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _ensure_session(self) -> aiohttp.ClientSession:
+        """创建aiohttp会话，限流器与事件循环绑定，需在循环内创建"""
+        if self._http is None or self._http.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.page_concurrency + self.image_concurrency,
+                limit_per_host=max(self.page_concurrency, self.image_concurrency))
+            # 只沿用身份相关的请求头，编码协商交给aiohttp
+            headers = {k: v for k, v in self.session.headers.items()
+                       if k in ('User-Agent', 'Referer', 'Cookie')}
+            self._http = aiohttp.ClientSession(
+                headers=headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=30, sock_read=10))
+            self._page_limiter = HostLimiter(self.page_concurrency, self.page_interval)
+            self._image_limiter = HostLimiter(self.image_concurrency, self.image_interval)
+        return self._http
+
+    async def close(self) -> None:
+        """关闭HTTP会话"""
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+        self._http = None
+
+    def _limiter_for(self, url: str) -> HostLimiter:
+        host = urlparse(url).hostname or ''
+        if host.endswith(IMAGE_HOST_SUFFIXES):
+            return self._image_limiter
+        return self._page_limiter
+
+    @staticmethod
+    def _endpoint_for(url: str) -> str:
+        host = urlparse(url).hostname or ''
+        return ENDPOINT_IMAGE if host.endswith(IMAGE_HOST_SUFFIXES) else ENDPOINT_ARTICLE
+
+    async def _fetch(self, url: str, as_text: bool):
+        """返回 (响应内容, 重定向后的最终地址)"""
+        http = await self._ensure_session()
+        async with self._limiter_for(url):
+            started = time.perf_counter()
+            status = 'error'
+            body = b''
+            try:
+                async with http.get(url) as response:
+                    status = response.status
+                    response.raise_for_status()
+                    body = await response.read()
+                    if as_text:
+                        return await response.text(errors='replace'), str(response.url)
+                    return body, str(response.url)
+            finally:
+                self.metrics.observe_request(self._endpoint_for(url), status,
+                                             time.perf_counter() - started, len(body))
+
+    async def get_article_content(self, url: str, max_retries: int = 3) -> ArticleRecord:
+        """获取文章内容，页面缓存中有未过期的原文时不请求网络"""
+        cached = await asyncio.to_thread(self.cached_article, url)
+        if cached:
+            return cached
+        
+        retries = 0
+        while True:
+            try:
+                # 与同步版本共用调度器，频率限制退避对所有引擎生效
+                await asyncio.to_thread(self.scheduler.acquire, ENDPOINT_ARTICLE)
+                html, final_url = await self._fetch(url, as_text=True)
+                # 与同步版本一致，按重定向后的地址识别验证页
+                self.check_article_page(html, final_url)
+                # 解析是CPU密集操作，放到线程中避免阻塞事件循环
+                result = await asyncio.to_thread(self.parse_article_html, html, url)
+                await asyncio.to_thread(self.cache_article_page, html, result)
+                return result
+            except RequestCancelled:
+                raise
+            except Exception as e:
+                log.warning("获取文章内容失败 (尝试 %s/%s): %s", retries + 1, max_retries, e, link=url)
+                retries += 1
+                if retries >= max_retries:
+                    raise Exception(f"获取文章内容失败: {str(e)}")
+                # 重试间隔由节奏策略决定（与列表页重试相同），等待计入节奏统计和分阶段计时
+                await self.pacing.pause_async(PACE_RETRY)
+
+    async def _fetch_image(self, img_link: str, cached: Optional[Dict]):
+        http = await self._ensure_session()
+        async with self._limiter_for(img_link):
+            started = time.perf_counter()
+            status = 'error'
+            body = b''
+            try:
+                async with http.get(img_link, headers=self.conditional_headers(cached)) as response:
+                    status = response.status
+                    if response.status == 304 and cached:
+                        return None
+                    response.raise_for_status()
+                    body = await response.read()
+                    return body, response.headers.get('ETag'), response.headers.get('Last-Modified')
+            finally:
+                self.metrics.observe_request(ENDPOINT_IMAGE, status, time.perf_counter() - started, len(body))
+
+    async def fetch_images(self, soup: BeautifulSoup, output_dir: str) -> None:
+        """并发下载文章中的所有图片并保存到本地"""
+        started = time.perf_counter()
+        image_folder = os.path.join(output_dir, 'images')
+        os.makedirs(image_folder, exist_ok=True)
+
+        tasks, hits = self.plan_image_downloads(soup, image_folder)
+        results = await asyncio.gather(
+            *(self._fetch_image(img_link, cached) for _, img_link, cached in tasks),
+            return_exceptions=True)
+
+        # 按文档顺序回写<img>属性，结果与同步版本一致
+        failed, total_bytes, not_modified = self.apply_image_results(tasks, results, image_folder)
+        self.report_image_stats(len(tasks) + hits, failed, total_bytes, started, hits + not_modified)
+
+    def download_images(self, soup: BeautifulSoup, output_dir: str) -> None:
+        """图片已在 save_article 中由 fetch_images 预取，转换阶段不再下载
+
+        save_article 在事件循环中用 aiohttp 下载图片并改写<img>属性，再把同步的转换和写文件
+        放到线程中执行；基类的转换方法会调用 download_images，这里覆盖为空操作，避免在线程里
+        用 requests 把同一批图片再下载一遍。直接调用转换方法的代码需先 await fetch_images。
+        """
+
+    async def save_article(self, article_data: ArticleRecord, output_dir: str,
+                           format_type: str = 'markdown') -> str:
+        """保存文章"""
+        content_soup = article_data.content_soup
+        if content_soup is not None and hasattr(content_soup, 'find_all'):
+            await self.fetch_images(content_soup, output_dir)
+        if self.convert_pool and content_soup is not None:
+            # 渲染交给转换进程，多篇文章的转换可以同时占用多个CPU核心
+            job = self.build_conversion_job(article_data, output_dir, format_type)
+            content, clean_title = await self.convert_pool.render_async(job)
+            return await asyncio.to_thread(self.write_article, content, clean_title,
+                                           output_dir, format_type)
+        return await asyncio.to_thread(
+            WeChatArticleDownloader.save_article, self, article_data, output_dir, format_type)
+
+    async def export_article(self, url: str, output_dir: str, format_type: str = 'markdown') -> str:
+        """下载并保存单篇文章"""
+        article_data = await self.get_article_content(url)
+        return await self.save_article(article_data, output_dir, format_type)
+
+    async def export_articles(self, articles: List[Dict], output_dir: str,
+                              format_type: str = 'markdown',
+                              on_progress: Optional[Callable] = None,
+                              should_stop: Optional[Callable[[], bool]] = None) -> Dict:
+        """并发导出文章列表
+
+        articles 中每项需包含 link (可选 title)。
+        on_progress(done, total, article, filepath, error) 每完成一篇调用一次。
+        should_stop() 返回True时不再开始新的文章。
+        """
+        await self._ensure_session()
+        total = len(articles)
+        stats = {'success': 0, 'failed': 0, 'processed': 0, 'stopped': False}
+        # 限制同时在处理中的文章数，避免大量解析树同时驻留内存
+        in_flight = asyncio.Semaphore(max(1, self.page_concurrency * 2))
+
+        async def worker(article: Dict) -> None:
+            async with in_flight:
+                if should_stop and should_stop():
+                    stats['stopped'] = True
+                    return
+                filepath, error = None, None
+                started = time.perf_counter()
+                try:
+                    filepath = await self.export_article(article['link'], output_dir, format_type)
+                    stats['success'] += 1
+                except RequestCancelled:
+                    stats['stopped'] = True
+                    return
+                except Exception as e:
+                    error = e
+                    stats['failed'] += 1
+                    log.warning("下载文章失败: %s, 错误: %s", article.get('title', ''), e, link=article.get('link'))
+                stats['processed'] += 1
+                self.metrics.observe_article(error is None, time.perf_counter() - started)
+                if on_progress:
+                    on_progress(stats['processed'], total, article, filepath, error)
+
+        # 尚未完成（等待中或处理中）的文章数
+        self.metrics.watch_queue('async', lambda: total - stats['processed'])
+        try:
+            await asyncio.gather(*(worker(article) for article in articles))
+        finally:
+            self.metrics.unwatch_queue('async')
+        return stats
+
+    def run_export(self, articles: List[Dict], output_dir: str, format_type: str = 'markdown',
+                   on_progress: Optional[Callable] = None,
+                   should_stop: Optional[Callable[[], bool]] = None) -> Dict:
+        """在当前线程中运行事件循环完成导出，供GUI线程/脚本同步调用"""
+        async def _run():
+            try:
+                return await self.export_articles(articles, output_dir, format_type,
+                                                  on_progress, should_stop)
+            finally:
+                await self.close()
+
+        return asyncio.run(_run())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+原子文件写入
+
+先写入同目录下的临时文件并 fsync，再用 os.replace 原子地替换目标文件，最后 fsync
+所在目录使改名本身落盘。写入中途崩溃或停止导出时，目标路径要么是旧文件要么不存在，
+不会留下被截断的 Markdown/HTML/图片。临时文件以 . 开头、以 .tmp 结尾，不会被当作
+已导出的文章；remove_stale_temp_files 在重新开始导出前清理上次中断留下的临时文件。
+"""
+
+import os
+import threading
+from typing import Union
+
+TEMP_SUFFIX = '.tmp'
+
+
+def temp_path_for(path: str) -> str:
+    """目标文件对应的临时文件路径（同目录，按进程和线程区分）"""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}{TEMP_SUFFIX}")
+
+
+def fsync_dir(directory: str) -> None:
+    """把目录项（改名结果）刷到磁盘；Windows 不支持打开目录，直接跳过"""
+    if os.name == 'nt':
+        return
+    fd = os.open(directory or '.', os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: str, data: Union[str, bytes], encoding: str = 'utf-8',
+                 fsync: bool = True) -> str:
+    """原子地写入文件，返回目标路径"""
+    tmp_path = temp_path_for(path)
+    mode = 'wb' if isinstance(data, bytes) else 'w'
+    try:
+        with open(tmp_path, mode, **({} if mode == 'wb' else {'encoding': encoding})) as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if fsync:
+        fsync_dir(os.path.dirname(path))
+    return path
+
+
+def remove_stale_temp_files(directory: str) -> int:
+    """删除目录（及 images 子目录）中中断的写入留下的临时文件，返回删除数量"""
+    removed = 0
+    for folder in (directory, os.path.join(directory, 'images')):
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            continue
+        for name in names:
+            if name.startswith('.') and name.endswith(TEMP_SUFFIX):
+                try:
+                    os.remove(os.path.join(folder, name))
+                    removed += 1
+                except OSError:
+                    pass
+    return removed
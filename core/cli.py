@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+命令行下载工具
+
+不依赖 Tk 界面，直接使用核心下载器，适合在无图形界面的服务器和定时任务中运行。
+进度以 JSON Lines 输出到标准输出（每行一个事件），下载器自身的日志输出到标准错误。
+
+用法:
+    python -m core search 关键词 --config config.json
+    python -m core list FAKEID --config config.json --pages 2
+    python -m core export --fakeid FAKEID --name 公众号 -o ./articles -w 2 -f html
+    python -m core export URL [URL ...] -o ./articles
+    python -m core sync FAKEID:公众号A FAKEID:公众号B --pacing fixed --interval 5
+
+cookie/token 可以写在 --config 指定的 JSON 文件中，也可以用 --cookie/--token 参数或
+WEFETCH_COOKIE/WEFETCH_TOKEN 环境变量提供。
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import re
+import signal
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+from core.article_id import dedup_key
+from core.article_store import ArticleMetaStore
+from core.atomic_io import remove_stale_temp_files
+from core.crawler import read_accounts
+from core.journal import ExportJournal
+from core.ledger import DownloadLedger
+from core.listing import iter_new_articles
+from core.log import configure_from_config
+from core.pacing import PACE_LIST, PACING_POLICIES
+from core.pipeline import ExportPipeline
+from core.wechat_downloader_core import WeChatArticleDownloader, WeChatAPIError
+
+# 进度事件写入原始标准输出，下载器的 print 输出改到标准错误
+_events = sys.stdout
+
+
+def emit(event: str, **fields) -> None:
+    """输出一行 JSON 进度事件"""
+    fields = {'event': event, 'time': round(time.time(), 3), **fields}
+    _events.write(json.dumps(fields, ensure_ascii=False) + '\n')
+    _events.flush()
+
+
+def load_config(args) -> dict:
+    """合并配置文件、环境变量和命令行参数"""
+    config = {}
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    config['cookie'] = args.cookie or os.environ.get('WEFETCH_COOKIE') or config.get('cookie', '')
+    config['token'] = args.token or os.environ.get('WEFETCH_TOKEN') or config.get('token', '')
+    if not config['cookie'] or not config['token']:
+        raise SystemExit("缺少 cookie 或 token（--config、--cookie/--token 或 WEFETCH_COOKIE/WEFETCH_TOKEN）")
+
+    if getattr(args, 'pacing', None):
+        pacing = {'policy': args.pacing}
+        if args.interval is not None:
+            pacing['interval'] = args.interval
+        config['pacing'] = pacing
+    if getattr(args, 'request_rate', None):
+        config['request_rate'] = args.request_rate
+    if getattr(args, 'workers', None):
+        config['fetch_workers'] = args.workers
+    if getattr(args, 'convert_workers', None):
+        config['convert_workers'] = args.convert_workers
+    if getattr(args, 'trace', None):
+        config['trace_file'] = args.trace
+    if getattr(args, 'log_level', None):
+        config['log_level'] = args.log_level
+    if getattr(args, 'log_format', None):
+        config['log_format'] = args.log_format
+    if getattr(args, 'metrics_port', None):
+        config['metrics_port'] = args.metrics_port
+    if getattr(args, 'metrics_file', None):
+        config['metrics_file'] = args.metrics_file
+    return config
+
+
+class ExportSession:
+    """一次命令行导出：输出根目录下的台账、去重索引、检查点日志和缓存"""
+
+    def __init__(self, config: dict, output_root: str, format_type: str, use_image_store: bool = False):
+        self.config = dict(config)
+        self.output_root = output_root
+        self.format_type = format_type
+        self.state_dir = os.path.join(output_root, '.wefetch')
+        os.makedirs(self.state_dir, exist_ok=True)
+        self.config.setdefault('image_cache', os.path.join(self.state_dir, 'image_cache.db'))
+        self.config.setdefault('page_cache', os.path.join(self.state_dir, 'page_cache.db'))
+        self.config.setdefault('article_index', os.path.join(self.state_dir, 'article_index.db'))
+        if use_image_store:
+            self.config.setdefault('image_store', os.path.join(output_root, '.image_store'))
+
+        self.ledger = DownloadLedger(os.path.join(self.state_dir, 'ledger.db'))
+        self.journal = ExportJournal(os.path.join(self.state_dir, 'journal.db'))
+        self.downloader = WeChatArticleDownloader(self.config)
+        self.index = self.downloader.article_index
+        if len(self.index) == 0:
+            self.index.add_many(self.ledger.downloaded_links())
+        self.stopping = False
+
+    def stop(self, *_) -> None:
+        """收到 SIGINT/SIGTERM 时停止列出和抓取新文章，已抓取的文章处理完后退出"""
+        self.stopping = True
+        self.downloader.scheduler.cancel()
+
+    def account_dir(self, name: str) -> str:
+        path = os.path.join(self.output_root, re.sub(r'[\\/*?:"<>|]', '_', name)) if name else self.output_root
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def open_job(self, key: str, output_dir: str) -> Dict:
+        removed = remove_stale_temp_files(output_dir)
+        if removed:
+            print(f"清理上次中断留下的 {removed} 个临时文件")
+        return self.journal.open_job(key, output_dir, self.format_type)
+
+    def run(self, articles: Iterable[Dict], output_dir: str, job: Dict, fakeid: Optional[str] = None) -> Dict:
+        """通过流水线导出文章并记录结果，返回统计信息"""
+        def on_result(article, filepath, error):
+            if filepath:
+                self.ledger.mark_done(article, filepath, fakeid)
+                self.index.add(article['link'])
+                self.journal.mark_done(job['id'], article['link'], filepath)
+                emit('article', status='done', title=article.get('title', ''), link=article['link'],
+                     path=filepath, processed=pipeline.stats['processed'], listed=pipeline.stats['listed'])
+            else:
+                self.ledger.mark_failed(article, str(error), fakeid)
+                self.journal.mark_failed(job['id'], article['link'], str(error))
+                emit('article', status='failed', title=article.get('title', ''), link=article['link'],
+                     error=str(error), processed=pipeline.stats['processed'],
+                     listed=pipeline.stats['listed'])
+
+        pipeline = ExportPipeline(self.downloader, output_dir, self.format_type,
+                                  fetch_workers=int(self.config.get('fetch_workers', 1)),
+                                  on_result=on_result, should_stop=lambda: self.stopping)
+        stats = pipeline.run(articles)
+        if not self.stopping and self.journal.get(job['id'])['listing_done']:
+            self.journal.finish(job['id'])
+        print(self.downloader.pacing.metrics.summary())
+        print(self.downloader.tracer.summary_table())
+        emit('timing', **self.downloader.tracer.summary())
+        self.downloader.tracer.reset()
+        self.downloader.metrics.write_file()
+        return stats
+
+    def export_account(self, fakeid: str, name: str, incremental: bool) -> Dict:
+        """导出一个公众号的新文章（incremental 时翻页到上次同步位置即停止）"""
+        output_dir = self.account_dir(name or fakeid)
+        job = self.open_job(f"all:{fakeid}", output_dir)
+        emit('start', fakeid=fakeid, name=name, output=output_dir, job=job['id'], resumed=job['resumed'],
+             downloaded=self.ledger.count(fakeid))
+        articles = iter_new_articles(self.downloader, self.config['token'], fakeid, self.ledger,
+                                     self.index, incremental, self.journal, job,
+                                     should_stop=lambda: self.stopping,
+                                     on_page=lambda page: emit('page', fakeid=fakeid, page=page))
+        stats = self.run(articles, output_dir, job, fakeid)
+        emit('summary', fakeid=fakeid, **stats)
+        return stats
+
+    def export_urls(self, urls: List[str], name: str, force: bool) -> Dict:
+        """导出指定链接的文章，已下载过的文章默认跳过"""
+        output_dir = self.account_dir(name)
+        requested, keys = [], set()
+        for url in urls:
+            key = dedup_key(url)
+            if key not in keys:
+                keys.add(key)
+                requested.append({'title': '', 'link': url})
+        # 同一组链接中断后再次导出时接着上次的任务
+        digest = hashlib.sha1('\n'.join(sorted(a['link'] for a in requested)).encode('utf-8')).hexdigest()
+        job = self.open_job(f"selected:{digest}", output_dir)
+        done = set()
+        if job['resumed']:
+            done = self.journal.done_links(job['id'])
+        else:
+            self.journal.add_items(job['id'], requested)
+            self.journal.finish_listing(job['id'])
+        articles = [a for a in requested
+                    if a['link'] not in done and (force or not self.index.contains(a['link']))]
+        emit('start', output=output_dir, job=job['id'], resumed=job['resumed'], total=len(articles),
+             skipped=len(urls) - len(articles))
+        stats = self.run(articles, output_dir, job)
+        emit('summary', **stats)
+        return stats
+
+
+def read_urls(values: List[str], path: Optional[str]) -> List[str]:
+    """命令行中的链接和链接文件（每行一个，# 开头为注释）"""
+    urls = list(values)
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            urls += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return urls
+
+
+def cmd_search(args, config: dict) -> int:
+    downloader = WeChatArticleDownloader(config)
+    for account in downloader.search_accounts(args.keyword, config['token']):
+        emit('account', fakeid=account.get('fakeid'), nickname=account.get('nickname'),
+             alias=account.get('alias'), signature=account.get('signature'))
+    return 0
+
+
+def cmd_list(args, config: dict) -> int:
+    downloader = WeChatArticleDownloader(config)
+    store = ArticleMetaStore(args.store) if args.store else None
+    begin = args.begin
+    for page in range(1, args.pages + 1 if args.pages else sys.maxsize):
+        articles = downloader.get_articles_page(args.fakeid, config['token'], begin)
+        for article in articles:
+            emit('article', page=page, title=article.get('title'), link=article.get('link'),
+                 aid=article.get('aid'), appmsgid=article.get('appmsgid'), itemidx=article.get('itemidx'),
+                 create_time=article.get('create_time'))
+        if store is not None:
+            store.append(articles, args.fakeid)
+        begin += len(articles)
+        total = downloader.last_list_total
+        if not articles or (total is not None and begin >= total):
+            break
+        downloader.pacing.pause(PACE_LIST)
+    emit('summary', listed=begin - args.begin, total=downloader.last_list_total)
+    return 0
+
+
+def cmd_export(args, config: dict) -> int:
+    session = ExportSession(config, args.output, args.format, args.image_store)
+    signal.signal(signal.SIGINT, session.stop)
+    signal.signal(signal.SIGTERM, session.stop)
+
+    if args.fakeid:
+        stats = session.export_account(args.fakeid, args.name, incremental=args.incremental)
+    else:
+        urls = read_urls(args.urls, args.urls_file)
+        if not urls:
+            raise SystemExit("请指定 --fakeid 或要导出的文章链接")
+        stats = session.export_urls(urls, args.name, args.force)
+    return 1 if stats['failed'] else 0
+
+
+def cmd_sync(args, config: dict) -> int:
+    session = ExportSession(config, args.output, args.format, args.image_store)
+    signal.signal(signal.SIGINT, session.stop)
+    signal.signal(signal.SIGTERM, session.stop)
+
+    failed = 0
+    for fakeid, name in read_accounts(args.accounts, args.file):
+        if session.stopping:
+            break
+        failed += session.export_account(fakeid, name, incremental=True)['failed']
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--config', help='配置文件 (JSON，可包含 cookie、token 及下载器配置项)')
+    common.add_argument('--cookie', help='登录 Cookie')
+    common.add_argument('--token', help='登录 Token')
+    common.add_argument('-q', '--quiet', action='store_true', help='不输出下载器日志，只输出进度事件')
+    common.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='下载器日志级别 (默认: INFO，每篇文章一行)')
+    common.add_argument('--log-format', choices=['text', 'json'], help='下载器日志格式 (默认: text)')
+    common.add_argument('--pacing', choices=sorted(PACING_POLICIES), help='文章/翻页之间的等待策略')
+    common.add_argument('--interval', type=float, help='fixed 策略的等待间隔（秒）')
+    common.add_argument('--request-rate', type=float, help='每秒请求数上限')
+
+    exporting = argparse.ArgumentParser(add_help=False)
+    exporting.add_argument('-o', '--output', default='./articles', help='输出根目录 (默认: ./articles)')
+    exporting.add_argument('-f', '--format', choices=['markdown', 'html'], default='markdown',
+                           help='导出格式 (默认: markdown)')
+    exporting.add_argument('-w', '--workers', type=int, help='页面抓取线程数 (默认: 1)')
+    exporting.add_argument('--convert-workers', type=int, help='Markdown/HTML 转换进程数 (默认: 不使用进程池)')
+    exporting.add_argument('--image-store', action='store_true', help='使用全局图片仓库跨公众号去重')
+    exporting.add_argument('--trace', help='把每篇文章各阶段的耗时逐条写入该 JSONL 文件 (python -m core.tracing)')
+    exporting.add_argument('--metrics-port', type=int, help='在本机该端口提供 Prometheus 指标 /metrics (python -m core.metrics)')
+    exporting.add_argument('--metrics-file', help='定时把 Prometheus 指标写入该文件')
+
+    parser = argparse.ArgumentParser(prog='python -m core', description='微信公众号文章命令行下载工具')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    search = sub.add_parser('search', parents=[common], help='搜索公众号')
+    search.add_argument('keyword', help='公众号名称关键词')
+
+    listing = sub.add_parser('list', parents=[common], help='列出公众号文章')
+    listing.add_argument('fakeid', help='公众号 fakeid')
+    listing.add_argument('--pages', type=int, default=0, help='最多获取的页数 (默认: 全部)')
+    listing.add_argument('--begin', type=int, default=0, help='起始偏移量 (默认: 0)')
+    listing.add_argument('--store', help='同时把文章元数据追加到该文章列表数据库 (core.article_store)')
+
+    export = sub.add_parser('export', parents=[common, exporting], help='导出公众号全部文章或指定链接的文章')
+    export.add_argument('urls', nargs='*', help='文章链接')
+    export.add_argument('--urls-file', help='链接文件，每行一个链接')
+    export.add_argument('--fakeid', help='导出该公众号的文章（已下载的跳过）')
+    export.add_argument('--name', default='', help='公众号名称，用作输出子目录')
+    export.add_argument('--incremental', action='store_true', help='翻页到上次同步位置即停止')
+    export.add_argument('--force', action='store_true', help='指定链接的文章即使已下载也重新导出')
+
+    sync = sub.add_parser('sync', parents=[common, exporting], help='增量同步一个或多个公众号的新文章')
+    sync.add_argument('accounts', nargs='*', help='fakeid 或 fakeid:名称')
+    sync.add_argument('--file', help='账号文件，每行 fakeid[,名称]')
+    return parser
+
+
+COMMANDS = {'search': cmd_search, 'list': cmd_list, 'export': cmd_export, 'sync': cmd_sync}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    config = load_config(args)
+    configure_from_config(config)
+    log = open(os.devnull, 'w', encoding='utf-8') if args.quiet else sys.stderr
+    try:
+        with contextlib.redirect_stdout(log):
+            return COMMANDS[args.command](args, config)
+    except WeChatAPIError as e:
+        emit('error', error=str(e), ret=e.ret)
+        return 2
+    except BrokenPipeError:
+        # 输出被 head 等命令提前关闭
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    finally:
+        if log is not sys.stderr:
+            log.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文章转换（Markdown/HTML 渲染）
+
+渲染函数只依赖正文HTML和元数据，不依赖下载器实例，可以在 ProcessPoolExecutor 的
+子进程中运行：抓取线程把已本地化图片的正文HTML和元数据交给转换进程，转换结果
+再交回调用方写入磁盘。markdownify、多轮 find_all 清理和正则替换因此不再与网络
+I/O 及 GUI 线程争用 GIL，批量导出可以利用多核。
+"""
+
+import asyncio
+import os
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+import markdownify
+from bs4 import BeautifulSoup
+
+from core.log import get_logger
+
+log = get_logger('converter')
+
+FORMAT_MARKDOWN = 'markdown'
+FORMAT_HTML = 'html'
+
+
+def remove_nonvisible_chars(text: str) -> str:
+    """移除不可见字符"""
+    return ''.join(c for c in text if (unicodedata.category(c) != 'Cn'
+                                       and c not in (' ', '\n', '\r')))
+
+
+def format_create_time(create_time) -> str:
+    """把时间戳格式化为 年-月-日 时:分:秒，非时间戳原样返回"""
+    if not create_time:
+        return ""
+    try:
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(int(create_time)))
+    except (TypeError, ValueError, OverflowError, OSError):
+        return create_time
+
+
+def _paragraph_contains_keywords(paragraph: List[str], keywords: List[str]) -> bool:
+    """检查段落是否包含关键词"""
+    paragraph_text = ' '.join(paragraph)
+    return any(keyword in paragraph_text for keyword in keywords)
+
+
+def filter_paragraphs(text: str, keywords: List[str]) -> str:
+    """过滤包含特定关键词的段落"""
+    lines = [line.strip() for line in text.split('\n')]
+    filtered_lines = []
+    current_paragraph = []
+
+    for line in lines:
+        if not line.strip():
+            if not _paragraph_contains_keywords(current_paragraph, keywords):
+                filtered_lines.extend(current_paragraph)
+            current_paragraph = []
+        else:
+            current_paragraph.append(line)
+            
+    if not _paragraph_contains_keywords(current_paragraph, keywords):
+        filtered_lines.extend(current_paragraph)
+        
+    return '\n\n'.join(filtered_lines) + '\n\n'
+
+
+def filter_content(text: str, keywords: Optional[List[str]]) -> str:
+    """按关键词过滤段落，出错时返回原文"""
+    try:
+        if keywords:
+            text = filter_paragraphs(text, keywords)
+        return text
+    except Exception as e:
+        log.warning("过滤内容时出错: %s", e)
+        return text
+
+
+def render_markdown(content, title: str, create_time, url: str,
+                    keywords: Optional[List[str]] = None) -> Tuple[str, str]:
+    """正文（解析树或HTML字符串）转换为Markdown，返回 (Markdown, 清理后的标题)"""
+    # 转换为Markdown（图片地址已在 download_images 中改写为本地路径）
+    markdown_content = markdownify.markdownify(str(content))
+    markdown_content = '\n'.join([line + '\n' for line in markdown_content.split('\n') if line.strip()])
+    
+    # 清理标题
+    clean_title = remove_nonvisible_chars(title)
+    
+    # 格式化时间
+    create_time_str = format_create_time(create_time)
+    
+    # 构建完整Markdown
+    markdown = f"# {clean_title}\n\n"
+    if create_time_str:
+        markdown += f"发布时间: {create_time_str}\n\n"
+    markdown += f"原文链接: {url}\n\n"
+    markdown += markdown_content
+    
+    # 清理多余字符
+    markdown = re.sub('\xa0{1,}', '\n', markdown, flags=re.UNICODE)
+    markdown = re.sub(r'\]\(http([^)]*)\)',
+                      lambda x: '](http' + x.group(1).replace(' ', '%20') + ')',
+                      markdown)
+    
+    return filter_content(markdown, keywords), clean_title
+
+
+def render_html(content_soup, title: str, create_time, url: str) -> Tuple[str, str]:
+    """正文转换为完整HTML页面，返回 (HTML, 标题)
+
+    content_soup 为HTML字符串时先解析。图片需由调用方在此之前本地化：清理属性时会
+    删除 data-type，之后就无法得到图片的扩展名。
+    """
+    if isinstance(content_soup, str):
+        # 取出正文根节点，与直接传入解析树时的处理范围一致
+        fragment = BeautifulSoup(content_soup, 'html.parser')
+        content_soup = fragment.find() or fragment
+    
+    # 移除隐藏样式
+    if content_soup.get('style'):
+        content_soup['style'] = content_soup['style'].replace('visibility: hidden;', '').replace('opacity: 0;', '')
+    
+    # 移除所有隐藏元素的style属性
+    for element in content_soup.find_all(style=True):
+        if 'visibility: hidden' in element.get('style', '') or 'opacity: 0' in element.get('style', ''):
+            element['style'] = element['style'].replace('visibility: hidden;', '').replace('opacity: 0;', '')
+    
+    # 清理微信特有的标签和属性
+    for tag in content_soup.find_all():
+        # 移除微信特有属性
+        attrs_to_remove = ['data-pm-slice', 'leaf', 'textstyle', 'nodeleaf', 'data-backh', 'data-backw', 'data-imgfileid', 
+                          'data-ratio', 'data-s', 'data-type', 'data-w', 'type']
+        for attr in attrs_to_remove:
+            if tag.get(attr):
+                del tag[attr]
+        
+        # 清理class属性
+        if tag.get('class'):
+            # 保留一些有用的class，移除微信特有的
+            classes = tag['class']
+            if isinstance(classes, list):
+                tag['class'] = [c for c in classes if not c.startswith(('js_', 'rich_media_', 'wxw-', 'autoTypeSetting'))]
+                if not tag['class']:
+                    del tag['class']
+            else:
+                tag['class'] = ''
+    
+    # 清理HTML内容，移除空的span和font标签
+    for empty_span in content_soup.find_all('span'):
+        if not empty_span.get_text(strip=True) and not empty_span.find('img'):
+            empty_span.decompose()
+    
+    for empty_font in content_soup.find_all('font'):
+        if not empty_font.get_text(strip=True) and not empty_font.find('img'):
+            empty_font.decompose()
+    
+    # 获取清理后的HTML内容
+    clean_content = str(content_soup)
+    
+    # 格式化时间
+    create_time_str = format_create_time(create_time)
+    
+    html_template = f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+    <style>
+        body {{
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'PingFang SC', 'Hiragino Sans GB', 'Microsoft YaHei', 'Helvetica Neue', Helvetica, Arial, sans-serif;
+            line-height: 1.6;
+            color: #333;
+            max-width: 800px;
+            margin: 0 auto;
+            padding: 20px;
+        }}
+        .article-header {{
+            border-bottom: 1px solid #eee;
+            padding-bottom: 20px;
+            margin-bottom: 30px;
+        }}
+        .article-title {{
+            font-size: 24px;
+            font-weight: bold;
+            margin-bottom: 10px;
+        }}
+        .article-meta {{
+            color: #666;
+            font-size: 14px;
+        }}
+        .article-content {{
+            font-size: 16px;
+        }}
+        .article-content p {{
+            margin-bottom: 1em;
+            line-height: 1.75em;
+        }}
+        .article-content section {{
+            text-align: center;
+            margin: 2em 0;
+        }}
+        img {{
+            max-width: 100%;
+            height: auto;
+            display: block;
+            margin: 10px auto;
+        }}
+    </style>
+</head>
+<body>
+    <div class="article-header">
+        <h1 class="article-title">{title}</h1>
+        <div class="article-meta">
+            {'发布时间: ' + create_time_str if create_time_str else ''}
+            <br>
+            <a href="{url}" target="_blank">原文链接</a>
+        </div>
+    </div>
+    <div class="article-content">
+        {clean_content}
+    </div>
+</body>
+</html>"""
+    
+    # 确保返回值不为None
+    if html_template is None:
+        html_template = ""
+    if title is None:
+        title = "untitled"
+        
+    return html_template, title
+
+
+def render_job(job: Dict) -> Tuple[str, str]:
+    """转换进程的入口：job 为 build_conversion_job 生成的可序列化字典"""
+    if job['format_type'] == FORMAT_MARKDOWN:
+        return render_markdown(job['content_html'], job['title'], job['create_time'],
+                               job['url'], job.get('keywords'))
+    return render_html(job['content_html'], job['title'], job['create_time'], job['url'])
+
+
+class ConversionPool:
+    """转换进程池，首次使用时才启动子进程"""
+
+    def __init__(self, workers: int = 0):
+        self.workers = workers if workers > 0 else (os.cpu_count() or 2)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _discard_broken(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def submit(self, job: Dict) -> Future:
+        """提交转换任务，返回 Future[(内容, 标题)]"""
+        return self._get_executor().submit(render_job, job)
+
+    def render(self, job: Dict) -> Tuple[str, str]:
+        """在子进程中转换并等待结果；进程池异常退出时在当前线程转换"""
+        try:
+            return self.submit(job).result()
+        except BrokenProcessPool as e:
+            log.warning("转换进程异常退出，改为在当前线程转换: %s", e)
+            self._discard_broken()
+            return render_job(job)
+
+    async def render_async(self, job: Dict) -> Tuple[str, str]:
+        """协程版本，供异步引擎使用"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), render_job, job)
+        except BrokenProcessPool as e:
+            log.warning("转换进程异常退出，改为在线程中转换: %s", e)
+            self._discard_broken()
+            return await asyncio.to_thread(render_job, job)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
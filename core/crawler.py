@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多公众号批量抓取（无界面）
+
+待抓取的工作保存在 SQLite 任务队列中：每个公众号的列表页、每篇文章各是一个任务。
+多个工作进程从同一个队列领取任务，队列在领取时按“最久未被服务的公众号优先”轮转，
+并同时检查全局与单个公众号的令牌桶预算（预算状态也保存在数据库中，跨进程共享），
+一个文章很多的公众号不会挤占其他公众号。工作进程崩溃时，租约到期的任务会重新排队。
+
+列表页抓到已下载过的文章即不再翻页（增量刷新）；新文章作为文章任务入队。
+导出结果与GUI共用输出目录下的 .wefetch 状态（下载台账、去重索引、页面/图片缓存）。
+
+用法:
+    python -m core.crawler add --db crawl.db MzA3MDM3NjE5NQ== MzU1MTk2NDE4Mg==:公众号名称
+    python -m core.crawler add --db crawl.db --file accounts.txt     # 每行 fakeid[,名称]
+    python -m core.crawler run --db crawl.db --config crawl.json -o ./articles -w 4 --max-minutes 240
+    python -m core.crawler status --db crawl.db
+
+配置文件 (JSON) 需要 cookie 与 token，可选项:
+    request_rate / request_burst   全局请求预算（次/秒，默认 0.5 / 2，速率 0 表示不限制）
+    account_rate / account_burst   单个公众号的请求预算（默认 0.1 / 1，速率 0 表示不限制）
+    throttle_backoff / throttle_max_backoff   触发频率限制后全局暂停的起始/最长秒数
+    max_attempts                   单个任务最多尝试次数（默认 3）
+    format                         markdown 或 html
+    metrics_port / metrics_file    运行指标 (core.metrics)；多个工作进程时第 i 个进程使用
+                                   metrics_port + i - 1，文件名加上进程名
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from core.article_id import ArticleIndex, dedup_key
+from core.image_cache import ImageUrlCache
+from core.ledger import DownloadLedger
+from core.log import get_logger, configure_from_config
+from core.page_cache import ArticlePageCache
+from core.scheduler import ENDPOINT_ARTICLE, ENDPOINT_LIST
+from core.tracing import SPAN_SLEEP
+from core.wechat_downloader_core import (WeChatArticleDownloader, RateLimitedError,
+                                         SessionExpiredError)
+
+JOB_LIST = 'list'
+JOB_ARTICLE = 'article'
+# 同一公众号先处理已发现的文章，再继续翻页，队列长度不会无限增长
+JOB_PRIORITY = {JOB_ARTICLE: 0, JOB_LIST: 1}
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+GLOBAL_BUDGET = 'global'
+# 没有可领取的任务但其他进程仍在工作时的轮询间隔上限（秒）
+IDLE_POLL = 5.0
+# 失败任务重试的起始等待秒数
+RETRY_DELAY = 30.0
+
+log = get_logger('crawler')
+
+
+class CrawlQueue:
+    """跨进程共享的抓取任务队列与请求预算"""
+
+    def __init__(self, db_path: str, rate: float = 0.5, burst: float = 2.0,
+                 account_rate: float = 0.1, account_burst: float = 1.0, lease: float = 300.0,
+                 base_backoff: float = 60.0, max_backoff: float = 3600.0, max_attempts: int = 3):
+        self.db_path = db_path
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.account_rate = account_rate
+        self.account_burst = max(1.0, account_burst)
+        self.lease = lease
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        # 自行管理事务，领取任务时用 BEGIN IMMEDIATE 保证多个进程不会领到同一个任务
+        self._conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS accounts (
+                fakeid TEXT PRIMARY KEY,
+                nickname TEXT,
+                last_served REAL DEFAULT 0,
+                added_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                fakeid TEXT NOT NULL,
+                ref TEXT NOT NULL,
+                payload TEXT,
+                priority INTEGER DEFAULT 0,
+                status TEXT NOT NULL,
+                attempts INTEGER DEFAULT 0,
+                not_before REAL DEFAULT 0,
+                lease_until REAL,
+                worker TEXT,
+                error TEXT,
+                updated_at REAL,
+                UNIQUE (kind, fakeid, ref)
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(fakeid, status, priority, id);
+            CREATE TABLE IF NOT EXISTS budgets (
+                name TEXT PRIMARY KEY,
+                tokens REAL,
+                updated REAL,
+                blocked_until REAL DEFAULT 0,
+                strikes INTEGER DEFAULT 0
+            );
+        """)
+
+    @classmethod
+    def from_config(cls, db_path: str, config: dict) -> 'CrawlQueue':
+        return cls(db_path,
+                   rate=float(config.get('request_rate', 0.5)),
+                   burst=float(config.get('request_burst', 2.0)),
+                   account_rate=float(config.get('account_rate', 0.1)),
+                   account_burst=float(config.get('account_burst', 1.0)),
+                   base_backoff=float(config.get('throttle_backoff', 60.0)),
+                   max_backoff=float(config.get('throttle_max_backoff', 3600.0)),
+                   max_attempts=int(config.get('max_attempts', 3)))
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _enqueue(self, db, kind: str, fakeid: str, ref: str, payload: Dict,
+                 requeue: bool = False) -> None:
+        """任务入队；requeue 时把已完成/失败的同一任务重新排队（例如每晚刷新第一页）"""
+        conflict = ("DO UPDATE SET status = excluded.status, attempts = 0, not_before = 0, "
+                    "payload = excluded.payload, error = NULL, updated_at = excluded.updated_at "
+                    f"WHERE jobs.status IN ('{STATUS_DONE}', '{STATUS_FAILED}')") if requeue else "DO NOTHING"
+        db.execute(
+            "INSERT INTO jobs (kind, fakeid, ref, payload, priority, status, updated_at) "
+            f"VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (kind, fakeid, ref) {conflict}",
+            (kind, fakeid, ref, json.dumps(payload, ensure_ascii=False), JOB_PRIORITY[kind],
+             STATUS_QUEUED, time.time()))
+
+    def add_account(self, fakeid: str, nickname: str = '') -> None:
+        """加入公众号并从第一页开始列出文章"""
+        with self._transaction() as db:
+            db.execute("INSERT INTO accounts (fakeid, nickname, added_at) VALUES (?, ?, ?) "
+                       "ON CONFLICT (fakeid) DO UPDATE SET nickname = COALESCE(NULLIF(excluded.nickname, ''), nickname)",
+                       (fakeid, nickname, time.time()))
+            self._enqueue(db, JOB_LIST, fakeid, '0', {'begin': 0}, requeue=True)
+
+    def enqueue_list_page(self, fakeid: str, begin: int) -> None:
+        with self._transaction() as db:
+            self._enqueue(db, JOB_LIST, fakeid, str(begin), {'begin': begin}, requeue=True)
+
+    def enqueue_articles(self, fakeid: str, articles: List[Dict], ref_of) -> None:
+        """文章任务入队，ref_of(链接) 为去重键，同一篇文章只入队一次"""
+        with self._transaction() as db:
+            for article in articles:
+                self._enqueue(db, JOB_ARTICLE, fakeid, ref_of(article['link']), article)
+
+    def nickname(self, fakeid: str) -> str:
+        row = self._conn.execute("SELECT nickname FROM accounts WHERE fakeid = ?", (fakeid,)).fetchone()
+        return row[0] if row and row[0] else ''
+
+    def _budget(self, db, name: str, rate: float, burst: float, now: float) -> Tuple[float, float, int]:
+        """读取预算并按经过的时间补充令牌，返回 (令牌数, 暂停截止时间, 连续限流次数)"""
+        row = db.execute("SELECT tokens, updated, blocked_until, strikes FROM budgets WHERE name = ?",
+                         (name,)).fetchone()
+        if not row:
+            return burst, 0.0, 0
+        tokens, updated, blocked_until, strikes = row
+        return min(burst, tokens + (now - updated) * rate), blocked_until or 0.0, strikes or 0
+
+    @staticmethod
+    def _save_budget(db, name: str, tokens: float, now: float, blocked_until: float, strikes: int) -> None:
+        db.execute("INSERT OR REPLACE INTO budgets (name, tokens, updated, blocked_until, strikes) "
+                   "VALUES (?, ?, ?, ?, ?)", (name, tokens, now, blocked_until, strikes))
+
+    def claim(self, worker: str) -> Tuple[Optional[Dict], Optional[float]]:
+        """领取一个任务
+
+        返回 (任务, None)；暂时没有可执行的任务时返回 (None, 建议等待秒数)；
+        队列已经清空且没有进行中的任务时返回 (None, None)。
+        """
+        now = time.time()
+        with self._transaction() as db:
+            # 租约过期的任务（工作进程崩溃或被杀）重新排队
+            db.execute(f"UPDATE jobs SET status = '{STATUS_QUEUED}', worker = NULL "
+                       f"WHERE status = '{STATUS_RUNNING}' AND lease_until < ?", (now,))
+
+            tokens, blocked_until, strikes = self._budget(db, GLOBAL_BUDGET, self.rate, self.burst, now)
+            if blocked_until > now:
+                return None, blocked_until - now
+            # 速率 <= 0 表示不限制（与 TokenBucket 一致）
+            if tokens < 1 and self.rate > 0:
+                return None, (1 - tokens) / self.rate
+
+            candidates = db.execute(
+                "SELECT a.fakeid, MIN(j.not_before) FROM accounts a "
+                f"JOIN jobs j ON j.fakeid = a.fakeid AND j.status = '{STATUS_QUEUED}' "
+                "GROUP BY a.fakeid ORDER BY a.last_served, a.added_at").fetchall()
+            if not candidates:
+                running = db.execute(f"SELECT COUNT(*) FROM jobs WHERE status = '{STATUS_RUNNING}'").fetchone()[0]
+                # 其他进程的列表任务还可能产生新任务
+                return None, (IDLE_POLL if running else None)
+
+            waits = []
+            for fakeid, ready_at in candidates:
+                if ready_at > now:
+                    waits.append(ready_at - now)
+                    continue
+                account_budget = f"account:{fakeid}"
+                account_tokens, _, _ = self._budget(db, account_budget, self.account_rate,
+                                                    self.account_burst, now)
+                if account_tokens < 1 and self.account_rate > 0:
+                    waits.append((1 - account_tokens) / self.account_rate)
+                    continue
+
+                row = db.execute(
+                    "SELECT id, kind, fakeid, ref, payload, attempts FROM jobs "
+                    f"WHERE fakeid = ? AND status = '{STATUS_QUEUED}' AND not_before <= ? "
+                    "ORDER BY priority, id LIMIT 1", (fakeid, now)).fetchone()
+                self._save_budget(db, GLOBAL_BUDGET, tokens - 1, now, blocked_until, strikes)
+                self._save_budget(db, account_budget, account_tokens - 1, now, 0.0, 0)
+                db.execute("UPDATE accounts SET last_served = ? WHERE fakeid = ?", (now, fakeid))
+                db.execute(f"UPDATE jobs SET status = '{STATUS_RUNNING}', worker = ?, lease_until = ?, "
+                           "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                           (worker, now + self.lease, now, row[0]))
+                return {'id': row[0], 'kind': row[1], 'fakeid': row[2], 'ref': row[3],
+                        'payload': json.loads(row[4] or '{}'), 'attempts': row[5] + 1}, None
+            return None, min(waits)
+
+    def complete(self, job: Dict) -> None:
+        with self._transaction() as db:
+            db.execute(f"UPDATE jobs SET status = '{STATUS_DONE}', error = NULL, updated_at = ? WHERE id = ?",
+                       (time.time(), job['id']))
+            # 请求成功，清除全局限流计数
+            db.execute("UPDATE budgets SET strikes = 0 WHERE name = ?", (GLOBAL_BUDGET,))
+
+    def fail(self, job: Dict, error: str) -> bool:
+        """任务失败：未超过最多尝试次数时延后重试，返回是否会重试"""
+        retry = job['attempts'] < self.max_attempts
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("UPDATE jobs SET status = ?, error = ?, not_before = ?, updated_at = ? WHERE id = ?",
+                       (STATUS_QUEUED if retry else STATUS_FAILED, error,
+                        now + RETRY_DELAY * (2 ** (job['attempts'] - 1)), now, job['id']))
+        return retry
+
+    def release(self, job: Dict) -> None:
+        """归还任务，不计入尝试次数（登录失效、进程退出时）"""
+        with self._transaction() as db:
+            db.execute(f"UPDATE jobs SET status = '{STATUS_QUEUED}', worker = NULL, "
+                       "attempts = MAX(0, attempts - 1), updated_at = ? WHERE id = ?", (time.time(), job['id']))
+
+    def throttle(self, job: Dict) -> float:
+        """触发微信频率限制：归还任务，所有进程按指数退避暂停，返回暂停秒数"""
+        now = time.time()
+        with self._transaction() as db:
+            tokens, _, strikes = self._budget(db, GLOBAL_BUDGET, self.rate, self.burst, now)
+            delay = min(self.max_backoff, self.base_backoff * (2 ** strikes))
+            self._save_budget(db, GLOBAL_BUDGET, tokens, now, now + delay, strikes + 1)
+            db.execute(f"UPDATE jobs SET status = '{STATUS_QUEUED}', worker = NULL, "
+                       "attempts = MAX(0, attempts - 1), updated_at = ? WHERE id = ?", (now, job['id']))
+        return delay
+
+    def depth(self) -> Dict[str, int]:
+        """各状态的任务数"""
+        return dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def stats(self) -> Dict:
+        """按公众号统计任务状态"""
+        accounts = {}
+        for fakeid, nickname in self._conn.execute("SELECT fakeid, nickname FROM accounts ORDER BY added_at"):
+            accounts[fakeid] = {'nickname': nickname or '', STATUS_QUEUED: 0, STATUS_RUNNING: 0,
+                                STATUS_DONE: 0, STATUS_FAILED: 0}
+        for fakeid, status, count in self._conn.execute(
+                f"SELECT fakeid, status, COUNT(*) FROM jobs WHERE kind = '{JOB_ARTICLE}' GROUP BY fakeid, status"):
+            if fakeid in accounts:
+                accounts[fakeid][status] = count
+        return accounts
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CrawlWorker:
+    """从队列领取任务并执行的工作进程"""
+
+    def __init__(self, queue: CrawlQueue, config: dict, output_dir: str, name: str = 'worker'):
+        self.queue = queue
+        self.config = config
+        self.output_dir = output_dir
+        self.name = name
+        self.format_type = config.get('format', 'markdown')
+
+        state_dir = os.path.join(output_dir, '.wefetch')
+        os.makedirs(state_dir, exist_ok=True)
+        self.ledger = DownloadLedger(os.path.join(state_dir, 'ledger.db'))
+        self.index = ArticleIndex(os.path.join(state_dir, 'article_index.db'))
+
+        self.downloader = WeChatArticleDownloader(config)
+        # 请求节奏由队列的全局/公众号预算控制，进程内调度器不再限速或退避，
+        # 频率限制立即交给队列处理（所有进程一起暂停）；调度器仍然记录等待跨度和频率限制指标
+        self.downloader.scheduler.configure(rate=0, burst=1, base_backoff=0, max_backoff=0)
+        self.downloader.max_throttle_retries = 0
+        self.downloader.image_cache = ImageUrlCache(os.path.join(state_dir, 'image_cache.db'))
+        self.downloader.page_cache = ArticlePageCache(
+            os.path.join(state_dir, 'page_cache.db'),
+            float(config.get('page_cache_ttl_days', 30)), float(config.get('page_cache_max_mb', 500)))
+        self.downloader.article_index = self.index
+
+    def account_dir(self, fakeid: str) -> str:
+        name = re.sub(r'[\\/*?:"<>|]', '_', self.queue.nickname(fakeid) or fakeid)
+        path = os.path.join(self.output_dir, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def run_list_job(self, job: Dict) -> None:
+        """抓取一页文章列表：新文章入队，未遇到已下载文章且还有下一页时继续翻页"""
+        fakeid, begin = job['fakeid'], int(job['payload'].get('begin', 0))
+        articles = self.downloader.get_articles_page(fakeid, self.config['token'], begin)
+        new_articles = []
+        caught_up = False
+        for article in articles:
+            link = article.get('link')
+            if not link:
+                continue
+            if self.index.contains(link) or self.ledger.is_downloaded(article):
+                caught_up = True
+                continue
+            new_articles.append({
+                'title': article.get('title', ''),
+                'link': link,
+                'aid': article.get('aid'),
+                'appmsgid': article.get('appmsgid'),
+                'itemidx': article.get('itemidx'),
+                'create_time': article.get('create_time')
+            })
+        self.queue.enqueue_articles(fakeid, new_articles, dedup_key)
+
+        next_begin = begin + len(articles)
+        total = self.downloader.last_list_total
+        has_more = bool(articles) and (total is None or next_begin < total)
+        if has_more and not caught_up:
+            self.queue.enqueue_list_page(fakeid, next_begin)
+        log.info("[%s] %s 列表 begin=%s: %s 篇，新增 %s 篇%s", self.name, fakeid, begin, len(articles),
+                 len(new_articles), '，已追上上次进度' if caught_up else '')
+
+    def run_article_job(self, job: Dict) -> None:
+        """下载并导出一篇文章"""
+        article, fakeid = job['payload'], job['fakeid']
+        if self.index.contains(article['link']):
+            return
+        record = self.downloader.cached_article(article['link']) or self.downloader.fetch_article(article['link'])
+        filepath = self.downloader.save_article(record, self.account_dir(fakeid), self.format_type)
+        self.ledger.mark_done(article, filepath, fakeid)
+        self.index.add(article['link'])
+        log.debug("[%s] 已记录: %s -> %s", self.name, article.get('title', '')[:30], os.path.basename(filepath))
+
+    def run(self, deadline: Optional[float] = None) -> Dict[str, int]:
+        """领取并执行任务，直到队列清空、登录失效或到达截止时间"""
+        counts = {'done': 0, 'failed': 0}
+        metrics = self.downloader.metrics
+        scheduler = self.downloader.scheduler
+        while True:
+            if deadline and time.time() >= deadline:
+                log.info("[%s] 已到达运行时限，剩余任务留待下次", self.name)
+                break
+            job, wait = self.queue.claim(self.name)
+            depth = self.queue.depth()
+            metrics.queue_depth.set(depth.get(STATUS_QUEUED, 0), queue='crawl')
+            if job is None:
+                if wait is None:
+                    break
+                # 队列预算不足或全局暂停中，等待计入分阶段计时
+                wait = min(wait, IDLE_POLL)
+                scheduler.wait(wait)
+                self.downloader.tracer.record(SPAN_SLEEP, wait, kind='queue')
+                continue
+            started = time.perf_counter()
+            try:
+                if job['kind'] == JOB_LIST:
+                    self.run_list_job(job)
+                else:
+                    self.run_article_job(job)
+                    metrics.observe_article(True, time.perf_counter() - started)
+                self.queue.complete(job)
+                counts['done'] += 1
+            except RateLimitedError as e:
+                delay = self.queue.throttle(job)
+                # 下载器已通过调度器记录了这次频率限制，这里把全局暂停登记为该接口的退避
+                scheduler.extend_backoff(ENDPOINT_LIST if job['kind'] == JOB_LIST else ENDPOINT_ARTICLE, delay)
+                log.warning("[%s] 触发微信频率限制，所有进程暂停 %.0f 秒: %s", self.name, delay, e)
+            except SessionExpiredError as e:
+                self.queue.release(job)
+                log.error("[%s] 登录已失效，停止抓取: %s", self.name, e)
+                break
+            except KeyboardInterrupt:
+                self.queue.release(job)
+                raise
+            except Exception as e:
+                if not self.queue.fail(job, str(e)):
+                    counts['failed'] += 1
+                    if job['kind'] == JOB_ARTICLE:
+                        metrics.observe_article(False)
+                if job['kind'] == JOB_ARTICLE:
+                    self.ledger.mark_failed(job['payload'], str(e), job['fakeid'])
+                log.warning("[%s] 任务失败 (%s %s, 第%s次): %s", self.name, job['kind'], job['ref'],
+                            job['attempts'], e)
+        # 工作进程退出时不执行 atexit，结束前写一次指标文件
+        metrics.write_file()
+        return counts
+
+
+def worker_metrics_config(config: dict, index: int, workers: int) -> dict:
+    """多个工作进程时每个进程使用各自的指标端口和文件"""
+    if workers <= 1:
+        return config
+    config = dict(config)
+    if config.get('metrics_port'):
+        config['metrics_port'] = int(config['metrics_port']) + index
+    if config.get('metrics_file'):
+        base, ext = os.path.splitext(config['metrics_file'])
+        config['metrics_file'] = f"{base}.worker-{index + 1}{ext}"
+    return config
+
+
+def run_worker(db_path: str, config: dict, output_dir: str, name: str,
+               deadline: Optional[float] = None) -> Dict[str, int]:
+    """工作进程入口"""
+    configure_from_config(config)
+    queue = CrawlQueue.from_config(db_path, config)
+    try:
+        counts = CrawlWorker(queue, config, output_dir, name).run(deadline)
+        log.info("[%s] 结束: 完成 %s 个任务，失败 %s 个", name, counts['done'], counts['failed'])
+        return counts
+    except KeyboardInterrupt:
+        return {}
+    finally:
+        queue.close()
+
+
+def read_accounts(values: List[str], path: Optional[str]) -> List[Tuple[str, str]]:
+    """解析 fakeid[:名称] 参数和账号文件（每行 fakeid[,名称]，# 开头为注释）"""
+    accounts = [tuple((value.split(':', 1) + [''])[:2]) for value in values]
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    fakeid, _, nickname = line.partition(',')
+                    accounts.append((fakeid.strip(), nickname.strip()))
+    return [(fakeid, nickname) for fakeid, nickname in accounts if fakeid]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多公众号批量抓取')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    add = sub.add_parser('add', help='加入公众号（已加入的公众号重新从第一页刷新）')
+    add.add_argument('--db', required=True, help='任务队列数据库')
+    add.add_argument('accounts', nargs='*', help='fakeid 或 fakeid:名称')
+    add.add_argument('--file', help='账号文件，每行 fakeid[,名称]')
+
+    run = sub.add_parser('run', help='启动工作进程处理队列')
+    run.add_argument('--db', required=True, help='任务队列数据库')
+    run.add_argument('--config', required=True, help='配置文件 (JSON，需包含 cookie 与 token)')
+    run.add_argument('-o', '--output', default='./articles', help='输出目录 (默认: ./articles)')
+    run.add_argument('-w', '--workers', type=int, default=1, help='工作进程数 (默认: 1)')
+    run.add_argument('--max-minutes', type=float, default=0, help='运行时限（分钟），到时停止领取新任务')
+
+    status = sub.add_parser('status', help='查看各公众号的任务状态')
+    status.add_argument('--db', required=True, help='任务队列数据库')
+
+    args = parser.parse_args()
+
+    if args.command == 'add':
+        queue = CrawlQueue(args.db)
+        accounts = read_accounts(args.accounts, args.file)
+        for fakeid, nickname in accounts:
+            queue.add_account(fakeid, nickname)
+        print(f"已加入 {len(accounts)} 个公众号")
+        return
+
+    if args.command == 'status':
+        queue = CrawlQueue(args.db)
+        for fakeid, counts in queue.stats().items():
+            print(f"{counts['nickname'] or fakeid}: 待处理 {counts[STATUS_QUEUED]}, 进行中 {counts[STATUS_RUNNING]}, "
+                  f"完成 {counts[STATUS_DONE]}, 失败 {counts[STATUS_FAILED]}")
+        return
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    if not config.get('cookie') or not config.get('token'):
+        print("配置文件中缺少 cookie 或 token")
+        sys.exit(1)
+
+    deadline = time.time() + args.max_minutes * 60 if args.max_minutes > 0 else None
+    if args.workers <= 1:
+        run_worker(args.db, config, args.output, 'worker-1', deadline)
+        return
+
+    processes = [multiprocessing.Process(target=run_worker, name=f"worker-{i + 1}",
+                                         args=(args.db, worker_metrics_config(config, i, args.workers),
+                                               args.output, f"worker-{i + 1}", deadline))
+                 for i in range(args.workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("正在停止工作进程...")
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
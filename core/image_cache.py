@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+图片URL缓存索引
+
+以 SQLite 记录 图片URL -> 内容哈希/扩展名/ETag/Last-Modified，下载图片前先查询，
+本地已有同一内容时直接复用，不再发起网络请求；开启重新验证时使用条件请求，
+服务器返回 304 时同样不传输图片内容。
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+class ImageUrlCache:
+    """图片URL到内容哈希的持久化索引"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS image_urls (
+                url TEXT PRIMARY KEY,
+                img_hash TEXT NOT NULL,
+                ext TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER,
+                updated_at REAL
+            )
+        """)
+        self._conn.commit()
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """查询图片URL对应的缓存记录"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT img_hash, ext, etag, last_modified, size FROM image_urls WHERE url = ?",
+                (url,)).fetchone()
+        if not row:
+            return None
+        return {
+            'img_hash': row[0],
+            'ext': row[1],
+            'etag': row[2],
+            'last_modified': row[3],
+            'size': row[4]
+        }
+
+    def record(self, url: str, img_hash: str, ext: str, etag: Optional[str] = None,
+               last_modified: Optional[str] = None, size: int = 0) -> None:
+        """记录图片URL对应的内容哈希"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO image_urls (url, img_hash, ext, etag, last_modified, size, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, img_hash, ext, etag, last_modified, size, time.time()))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+内容寻址的全局图片仓库
+
+图片按 sha256 存放在 <root>/<前2位>/<前4位>/<hash>.<ext>，每个公众号输出目录中的
+images/<hash>.<ext> 只是指向仓库文件的硬链接（跨分区时退化为相对符号链接或复制），
+相同图片在整个归档中只保存一份。同一哈希只有一个仓库文件，扩展名以首次写入时为准，
+之后以其他扩展名写入的相同内容也链接到这个文件。
+
+索引保存在 <root>/index.db（SQLite），记录每个图片的扩展名、大小和引用路径，多个进程
+同时写入时由 SQLite 串行化。gc 命令清理已经没有任何引用的图片；最近 GC_GRACE 秒内
+写入或登记的图片、以及写入中的临时文件不会被清理，避免删掉其他进程正在链接的图片。
+旧版本的 index.json 在首次打开时导入。
+
+用法:
+    python -m core.image_store stats --root ./articles/.image_store
+    python -m core.image_store gc --root ./articles/.image_store [--dry-run]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from core.atomic_io import TEMP_SUFFIX, atomic_write
+from core.log import get_logger
+
+log = get_logger('image_store')
+
+
+class ImageStore:
+    """全局图片仓库"""
+
+    INDEX_DB = 'index.db'
+    LEGACY_INDEX = 'index.json'
+    # gc 不清理最近这么多秒内写入或登记的图片（其他进程可能正在 put 与 link 之间）
+    GC_GRACE = 600.0
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.index_path = os.path.join(self.root, self.INDEX_DB)
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self._conn = sqlite3.connect(self.index_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                img_hash TEXT PRIMARY KEY,
+                ext TEXT NOT NULL,
+                size INTEGER,
+                updated_at REAL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS refs (
+                img_hash TEXT NOT NULL,
+                path TEXT NOT NULL,
+                PRIMARY KEY (img_hash, path)
+            )
+        """)
+        self._conn.commit()
+        self._import_legacy_index()
+
+    def _import_legacy_index(self) -> None:
+        """导入旧版本的 index.json，导入后改名为 index.json.imported"""
+        legacy_path = os.path.join(self.root, self.LEGACY_INDEX)
+        if not os.path.exists(legacy_path):
+            return
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            log.warning("读取旧版图片仓库索引失败，跳过导入: %s", e, path=legacy_path)
+            return
+        now = time.time()
+        with self._lock:
+            for img_hash, entry in legacy.items():
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO blobs (img_hash, ext, size, updated_at) VALUES (?, ?, ?, ?)",
+                    (img_hash, entry.get('ext', 'jpg'), entry.get('size', 0), now))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO refs (img_hash, path) VALUES (?, ?)",
+                    [(img_hash, ref) for ref in entry.get('refs', [])])
+            self._conn.commit()
+        os.replace(legacy_path, legacy_path + '.imported')
+        log.info("已导入旧版图片仓库索引: %d 个图片", len(legacy), path=legacy_path)
+
+    def _stored_ext(self, img_hash: str) -> Optional[str]:
+        row = self._conn.execute("SELECT ext FROM blobs WHERE img_hash = ?", (img_hash,)).fetchone()
+        return row[0] if row else None
+
+    def _path(self, img_hash: str, ext: str) -> str:
+        return os.path.join(self.root, img_hash[:2], img_hash[2:4], f"{img_hash}.{ext}")
+
+    def blob_path(self, img_hash: str, ext: str) -> str:
+        """图片在仓库中的路径；已登记的哈希使用登记的扩展名，ext 只用于新图片"""
+        with self._lock:
+            stored = self._stored_ext(img_hash)
+        return self._path(img_hash, stored or ext)
+
+    def contains(self, img_hash: str) -> bool:
+        with self._lock:
+            return self._stored_ext(img_hash) is not None
+
+    def put(self, img_hash: str, ext: str, data: bytes) -> str:
+        """写入图片（已存在则跳过），返回仓库路径"""
+        with self._lock:
+            # 先登记再写文件：gc 看到文件时索引里一定已经有它
+            self._conn.execute(
+                "INSERT OR IGNORE INTO blobs (img_hash, ext, size, updated_at) VALUES (?, ?, ?, ?)",
+                (img_hash, ext, len(data), time.time()))
+            self._conn.execute("UPDATE blobs SET updated_at = ? WHERE img_hash = ?", (time.time(), img_hash))
+            self._conn.commit()
+            path = self._path(img_hash, self._stored_ext(img_hash))
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            atomic_write(path, data)
+        return path
+
+    def link(self, img_hash: str, ext: str, dest_path: str) -> None:
+        """让 dest_path 指向仓库中的图片，并登记引用"""
+        blob = self.blob_path(img_hash, ext)
+        if os.path.lexists(dest_path):
+            # 旧版本直接写入的独立文件不归仓库管理
+            if not self._live_refs(blob, [dest_path]):
+                return
+        else:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            try:
+                os.link(blob, dest_path)
+            except OSError:
+                try:
+                    os.symlink(os.path.relpath(blob, os.path.dirname(dest_path)), dest_path)
+                except OSError:
+                    shutil.copyfile(blob, dest_path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO blobs (img_hash, ext, size, updated_at) VALUES (?, ?, ?, ?)",
+                (img_hash, os.path.splitext(blob)[1][1:], os.path.getsize(blob), time.time()))
+            self._conn.execute("INSERT OR IGNORE INTO refs (img_hash, path) VALUES (?, ?)",
+                               (img_hash, os.path.abspath(dest_path)))
+            self._conn.commit()
+
+    def _live_refs(self, blob: str, refs) -> list:
+        live = []
+        for ref in refs:
+            try:
+                if os.path.samefile(ref, blob):
+                    live.append(ref)
+            except OSError:
+                continue
+        return live
+
+    def gc(self, dry_run: bool = False) -> Tuple[int, int]:
+        """删除不再被任何输出目录引用的图片，返回 (删除数量, 释放字节数)"""
+        removed = 0
+        freed = 0
+        cutoff = time.time() - self.GC_GRACE
+        with self._lock:
+            blobs = self._conn.execute("SELECT img_hash, ext, updated_at FROM blobs").fetchall()
+            refs: Dict[str, list] = {}
+            for img_hash, path in self._conn.execute("SELECT img_hash, path FROM refs"):
+                refs.setdefault(img_hash, []).append(path)
+
+        known = set()
+        for img_hash, ext, updated_at in blobs:
+            blob = self._path(img_hash, ext)
+            known.add(blob)
+            hash_refs = refs.get(img_hash, [])
+            live = self._live_refs(blob, hash_refs)
+            if live or (updated_at or 0) >= cutoff:
+                dead = set(hash_refs) - set(live)
+                if dead and not dry_run:
+                    with self._lock:
+                        self._conn.executemany("DELETE FROM refs WHERE img_hash = ? AND path = ?",
+                                               [(img_hash, path) for path in dead])
+                        self._conn.commit()
+                continue
+            if not dry_run:
+                with self._lock:
+                    # 扫描期间其他进程刚登记了引用或重新写入时保留
+                    row = self._conn.execute("SELECT updated_at FROM blobs WHERE img_hash = ?",
+                                             (img_hash,)).fetchone()
+                    new_refs = [path for (path,) in self._conn.execute(
+                        "SELECT path FROM refs WHERE img_hash = ?", (img_hash,))
+                        if path not in hash_refs]
+                    if not row or (row[0] or 0) >= cutoff or self._live_refs(blob, new_refs):
+                        continue
+                    self._conn.execute("DELETE FROM refs WHERE img_hash = ?", (img_hash,))
+                    self._conn.execute("DELETE FROM blobs WHERE img_hash = ?", (img_hash,))
+                    self._conn.commit()
+            if os.path.exists(blob):
+                freed += os.path.getsize(blob)
+                if not dry_run:
+                    os.remove(blob)
+            removed += 1
+
+        # 索引之外的孤立文件（例如写入后进程中断，或旧版本以其他扩展名保存的同一图片）
+        for dirpath, _, filenames in os.walk(self.root):
+            if dirpath == self.root:
+                continue
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if path in known or filename.endswith(TEMP_SUFFIX):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if stat.st_mtime >= cutoff:
+                    continue
+                stem = filename.split('.', 1)[0]
+                if self._live_refs(path, refs.get(stem, [])):
+                    continue
+                freed += stat.st_size
+                removed += 1
+                if not dry_run:
+                    os.remove(path)
+        return removed, freed
+
+    def stats(self) -> Dict[str, int]:
+        """仓库统计信息"""
+        with self._lock:
+            blobs, stored = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            refs = self._conn.execute("SELECT COUNT(*) FROM refs").fetchone()[0]
+            logical = self._conn.execute("""
+                SELECT COALESCE(SUM(b.size * MAX(1, (SELECT COUNT(*) FROM refs r WHERE r.img_hash = b.img_hash))), 0)
+                FROM blobs b
+            """).fetchone()[0]
+        return {'blobs': blobs, 'refs': refs, 'stored_bytes': stored, 'logical_bytes': logical}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='全局图片仓库维护工具')
+    parser.add_argument('command', choices=['gc', 'stats'], help='gc: 清理无引用图片; stats: 统计信息')
+    parser.add_argument('--root', default='./articles/.image_store', help='图片仓库目录')
+    parser.add_argument('--dry-run', action='store_true', help='只统计不删除')
+    args = parser.parse_args()
+
+    store = ImageStore(args.root)
+    if args.command == 'gc':
+        removed, freed = store.gc(dry_run=args.dry_run)
+        action = '可删除' if args.dry_run else '已删除'
+        print(f"{action} {removed} 个无引用图片，释放 {freed / 1024 / 1024:.2f} MB")
+    else:
+        stats = store.stats()
+        print(f"图片: {stats['blobs']} 个, 引用: {stats['refs']} 处")
+        print(f"实际占用: {stats['stored_bytes'] / 1024 / 1024:.2f} MB, "
+              f"去重前: {stats['logical_bytes'] / 1024 / 1024:.2f} MB")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
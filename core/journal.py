@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+导出任务检查点日志
+
+每次批量导出对应一个任务，任务的工作项（要导出的文章）和列表翻页位置随导出进度
+逐条提交到 SQLite。导出中途崩溃或停止后，以相同的任务键重新开始导出时接着上次的
+任务：已完成的文章不再处理，已列出未完成的文章先导出，列表从上次翻到的位置继续，
+不必从第一页重新扫描。任务中的文章全部处理完后任务结束，下次导出开始新的任务。
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+JOB_RUNNING = 'running'
+JOB_FINISHED = 'finished'
+
+ITEM_PENDING = 'pending'
+ITEM_DONE = 'done'
+ITEM_FAILED = 'failed'
+
+
+class ExportJournal:
+    """导出任务检查点日志"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # 检查点在事务提交时即落盘，断电后也不会回退到更早的进度
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL,
+                output_dir TEXT,
+                format_type TEXT,
+                status TEXT NOT NULL,
+                list_begin INTEGER DEFAULT 0,
+                list_page INTEGER DEFAULT 1,
+                listing_done INTEGER DEFAULT 0,
+                newest TEXT,
+                created_at REAL,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_key ON jobs(key, status);
+            CREATE TABLE IF NOT EXISTS items (
+                job_id INTEGER NOT NULL,
+                link TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                article TEXT,
+                status TEXT NOT NULL,
+                output_path TEXT,
+                error TEXT,
+                updated_at REAL,
+                PRIMARY KEY (job_id, link)
+            );
+            CREATE INDEX IF NOT EXISTS idx_items_status ON items(job_id, status, seq);
+        """)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        """按编号查询任务记录"""
+        with self._lock:
+            return self._job(job_id)
+
+    def _job(self, job_id: int) -> Optional[Dict]:
+        cursor = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        job = dict(zip([c[0] for c in cursor.description], row))
+        job['newest'] = json.loads(job['newest']) if job['newest'] else None
+        job['listing_done'] = bool(job['listing_done'])
+        return job
+
+    def open_job(self, key: str, output_dir: str, format_type: str) -> Dict:
+        """返回相同任务键、相同输出目录和格式的未完成任务，没有时新建
+
+        返回的任务记录中 resumed 表示是否接着上次中断的任务。
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE key = ? AND output_dir = ? AND format_type = ? AND status = ? "
+                "ORDER BY id DESC LIMIT 1", (key, output_dir, format_type, JOB_RUNNING)).fetchone()
+            if row:
+                job = self._job(row[0])
+                job['resumed'] = True
+                return job
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (key, output_dir, format_type, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (key, output_dir, format_type, JOB_RUNNING, now, now))
+            self._conn.commit()
+            job = self._job(cursor.lastrowid)
+        job['resumed'] = False
+        return job
+
+    def add_items(self, job_id: int, articles: Iterable[Dict]) -> int:
+        """登记任务的工作项（已登记的文章忽略），返回新增数量"""
+        now = time.time()
+        added = 0
+        with self._lock:
+            seq = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM items WHERE job_id = ?", (job_id,)).fetchone()[0]
+            for article in articles:
+                seq += 1
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO items (job_id, link, seq, article, status, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, article['link'], seq, json.dumps(article, ensure_ascii=False),
+                     ITEM_PENDING, now))
+                added += cursor.rowcount
+            self._conn.commit()
+        return added
+
+    def add_item(self, job_id: int, article: Dict) -> bool:
+        return self.add_items(job_id, [article]) > 0
+
+    def pending_items(self, job_id: int) -> List[Dict]:
+        """尚未成功完成的工作项（待处理/失败），按登记顺序"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT article FROM items WHERE job_id = ? AND status != ? ORDER BY seq",
+                (job_id, ITEM_DONE)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def done_links(self, job_id: int) -> set:
+        with self._lock:
+            return {row[0] for row in self._conn.execute(
+                "SELECT link FROM items WHERE job_id = ? AND status = ?", (job_id, ITEM_DONE))}
+
+    def _set_item(self, job_id: int, link: str, status: str, output_path: Optional[str],
+                  error: Optional[str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE items SET status = ?, output_path = ?, error = ?, updated_at = ? "
+                "WHERE job_id = ? AND link = ?", (status, output_path, error, now, job_id, link))
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (now, job_id))
+            self._conn.commit()
+
+    def mark_done(self, job_id: int, link: str, output_path: str) -> None:
+        """记录工作项完成（文件已原子写入后调用）"""
+        self._set_item(job_id, link, ITEM_DONE, output_path, None)
+
+    def mark_failed(self, job_id: int, link: str, error: str) -> None:
+        self._set_item(job_id, link, ITEM_FAILED, None, error)
+
+    def checkpoint_listing(self, job_id: int, begin: int, page: int,
+                           newest: Optional[Dict] = None) -> None:
+        """记录列表已处理到的偏移量与页码，以及本次列出的最新文章（用于推进同步水位）"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET list_begin = ?, list_page = ?, newest = COALESCE(?, newest), "
+                "updated_at = ? WHERE id = ?",
+                (begin, page, json.dumps(newest, ensure_ascii=False) if newest else None,
+                 time.time(), job_id))
+            self._conn.commit()
+
+    def finish_listing(self, job_id: int) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET listing_done = 1, updated_at = ? WHERE id = ?",
+                               (time.time(), job_id))
+            self._conn.commit()
+
+    def finish(self, job_id: int) -> None:
+        """任务全部处理完毕，之后以相同任务键导出时开始新任务"""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                               (JOB_FINISHED, time.time(), job_id))
+            self._conn.commit()
+
+    def progress(self, job_id: int) -> Dict[str, int]:
+        """任务各状态的工作项数量"""
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM items WHERE job_id = ? GROUP BY status", (job_id,)))
+        return {status: counts.get(status, 0) for status in (ITEM_PENDING, ITEM_DONE, ITEM_FAILED)}
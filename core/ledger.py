@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文章下载台账
+
+以 SQLite 记录每篇文章的下载状态、输出路径、内容哈希和时间，断点续传时按链接/aid/
+appmsgid 做索引查询，不再逐个读取已导出的文件。首次使用时可通过 import_existing
+从旧版本导出的 Markdown/HTML 文件中导入已下载记录。
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from core.log import get_logger
+
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_PENDING = 'pending'
+
+# 旧版本导出文件中记录原文链接的位置：GUI Markdown、down_load.py Markdown、GUI HTML
+LEGACY_LINK_PATTERNS = [
+    re.compile(r'^原文链接:\s*(\S+)', re.MULTILINE),
+    re.compile(r'^url:\s*(\S+)', re.MULTILINE),
+    re.compile(r'<a href="([^"]+)" target="_blank">原文链接</a>'),
+]
+# 原文链接位于文件开头（HTML在内联样式之后），只需读取前面一小段
+LEGACY_SCAN_BYTES = 8192
+
+log = get_logger('ledger')
+
+
+def file_sha256(path: str) -> str:
+    """计算文件内容的sha256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadLedger:
+    """文章下载台账"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                link TEXT PRIMARY KEY,
+                fakeid TEXT,
+                aid TEXT,
+                appmsgid INTEGER,
+                itemidx INTEGER,
+                title TEXT,
+                create_time INTEGER,
+                status TEXT NOT NULL,
+                output_path TEXT,
+                content_hash TEXT,
+                attempts INTEGER DEFAULT 0,
+                error TEXT,
+                created_at REAL,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_aid ON articles(aid);
+            CREATE INDEX IF NOT EXISTS idx_articles_appmsg ON articles(appmsgid, itemidx);
+            CREATE INDEX IF NOT EXISTS idx_articles_fakeid ON articles(fakeid, status);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                fakeid TEXT PRIMARY KEY,
+                last_create_time INTEGER,
+                last_appmsgid INTEGER,
+                synced_at REAL
+            );
+        """)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def is_downloaded(self, article: Dict) -> bool:
+        """文章是否已成功下载（按链接、aid 或 appmsgid+itemidx 任一匹配）"""
+        clauses = []
+        params = []
+        if article.get('link'):
+            clauses.append("link = ?")
+            params.append(article['link'])
+        if article.get('aid'):
+            clauses.append("aid = ?")
+            params.append(str(article['aid']))
+        if article.get('appmsgid') is not None and article.get('itemidx') is not None:
+            clauses.append("(appmsgid = ? AND itemidx = ?)")
+            params.extend([int(article['appmsgid']), int(article['itemidx'])])
+        if not clauses:
+            return False
+        sql = f"SELECT 1 FROM articles WHERE status = ? AND ({' OR '.join(clauses)}) LIMIT 1"
+        with self._lock:
+            return self._conn.execute(sql, [STATUS_DONE] + params).fetchone() is not None
+
+    def get(self, link: str) -> Optional[Dict]:
+        """按链接查询台账记录"""
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM articles WHERE link = ?", (link,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            return dict(zip([c[0] for c in cursor.description], row))
+
+    def downloaded_links(self, fakeid: Optional[str] = None) -> Set[str]:
+        """已下载文章的链接集合"""
+        sql = "SELECT link FROM articles WHERE status = ?"
+        params = [STATUS_DONE]
+        if fakeid is not None:
+            sql += " AND fakeid = ?"
+            params.append(fakeid)
+        with self._lock:
+            return {row[0] for row in self._conn.execute(sql, params)}
+
+    def count(self, fakeid: Optional[str] = None, status: str = STATUS_DONE) -> int:
+        sql = "SELECT COUNT(*) FROM articles WHERE status = ?"
+        params = [status]
+        if fakeid is not None:
+            sql += " AND fakeid = ?"
+            params.append(fakeid)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def mark(self, article: Dict, status: str, fakeid: Optional[str] = None,
+             output_path: Optional[str] = None, content_hash: Optional[str] = None,
+             error: Optional[str] = None) -> None:
+        """写入/更新一篇文章的状态"""
+        now = time.time()
+        appmsgid = article.get('appmsgid')
+        itemidx = article.get('itemidx')
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO articles (link, fakeid, aid, appmsgid, itemidx, title, create_time,
+                                      status, output_path, content_hash, attempts, error,
+                                      created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(link) DO UPDATE SET
+                    fakeid = COALESCE(excluded.fakeid, fakeid),
+                    aid = COALESCE(excluded.aid, aid),
+                    appmsgid = COALESCE(excluded.appmsgid, appmsgid),
+                    itemidx = COALESCE(excluded.itemidx, itemidx),
+                    title = COALESCE(excluded.title, title),
+                    create_time = COALESCE(excluded.create_time, create_time),
+                    status = CASE WHEN excluded.status = 'pending' AND status = 'done'
+                                  THEN status ELSE excluded.status END,
+                    output_path = COALESCE(excluded.output_path, output_path),
+                    content_hash = COALESCE(excluded.content_hash, content_hash),
+                    attempts = attempts + excluded.attempts,
+                    error = excluded.error,
+                    updated_at = excluded.updated_at
+            """, (
+                article['link'], fakeid,
+                str(article['aid']) if article.get('aid') else None,
+                int(appmsgid) if appmsgid is not None else None,
+                int(itemidx) if itemidx is not None else None,
+                article.get('title'),
+                int(article['create_time']) if str(article.get('create_time') or '').isdigit() else None,
+                status, output_path, content_hash,
+                0 if status == STATUS_PENDING else 1,
+                error, now, now
+            ))
+            self._conn.commit()
+
+    def mark_done(self, article: Dict, output_path: str, fakeid: Optional[str] = None) -> None:
+        """记录文章下载成功"""
+        content_hash = file_sha256(output_path) if os.path.exists(output_path) else None
+        self.mark(article, STATUS_DONE, fakeid, output_path, content_hash)
+
+    def mark_failed(self, article: Dict, error: str, fakeid: Optional[str] = None) -> None:
+        """记录文章下载失败"""
+        self.mark(article, STATUS_FAILED, fakeid, error=error)
+
+    def unfinished_articles(self, fakeid: str) -> list:
+        """已列出但尚未成功下载（待下载/失败）的文章，按发布时间从新到旧"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT link, title, aid, appmsgid, itemidx, create_time FROM articles "
+                "WHERE fakeid = ? AND status IN (?, ?) ORDER BY create_time DESC",
+                (fakeid, STATUS_PENDING, STATUS_FAILED))
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def get_sync_state(self, fakeid: str) -> Optional[Dict]:
+        """公众号文章列表的同步水位（最新一篇已完整同步文章的 create_time/appmsgid）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_create_time, last_appmsgid, synced_at FROM sync_state WHERE fakeid = ?",
+                (fakeid,)).fetchone()
+        if not row:
+            return None
+        return {'last_create_time': row[0], 'last_appmsgid': row[1], 'synced_at': row[2]}
+
+    def update_sync_state(self, fakeid: str, create_time: int, appmsgid: int) -> None:
+        """文章列表完整同步后推进水位"""
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO sync_state (fakeid, last_create_time, last_appmsgid, synced_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(fakeid) DO UPDATE SET
+                    last_create_time = MAX(last_create_time, excluded.last_create_time),
+                    last_appmsgid = CASE WHEN excluded.last_create_time >= last_create_time
+                                         THEN excluded.last_appmsgid ELSE last_appmsgid END,
+                    synced_at = excluded.synced_at
+            """, (fakeid, int(create_time), int(appmsgid or 0), time.time()))
+            self._conn.commit()
+
+    @staticmethod
+    def is_at_or_below(article: Dict, sync_state: Optional[Dict]) -> bool:
+        """文章是否不晚于同步水位（列表按时间倒序，遇到即可停止翻页）"""
+        if not sync_state or article.get('create_time') is None:
+            return False
+        position = (int(article['create_time']), int(article.get('appmsgid') or 0))
+        return position <= (sync_state['last_create_time'], sync_state['last_appmsgid'] or 0)
+
+    def import_existing(self, output_dir: str, fakeid: Optional[str] = None) -> int:
+        """从旧版本导出的文件中导入已下载记录，返回导入数量"""
+        imported = 0
+        try:
+            filenames = os.listdir(output_dir)
+        except OSError:
+            return 0
+        for filename in filenames:
+            if not filename.endswith(('.md', '.html')):
+                continue
+            filepath = os.path.join(output_dir, filename)
+            try:
+                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+                    head = f.read(LEGACY_SCAN_BYTES)
+            except OSError as e:
+                log.warning("读取文件 %s 失败: %s", filename, e)
+                continue
+            for pattern in LEGACY_LINK_PATTERNS:
+                match = pattern.search(head)
+                if match:
+                    link = match.group(1).strip()
+                    self.mark({'link': link, 'title': os.path.splitext(filename)[0]},
+                              STATUS_DONE, fakeid, filepath)
+                    imported += 1
+                    break
+        return imported
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+公众号文章列表增量获取
+
+逐页获取公众号的文章列表，按下载台账、去重索引和同步水位筛出需要下载的文章。
+GUI 与命令行工具共用，调用方可以边迭代边下载。
+"""
+
+import time
+from typing import Callable, Dict, Iterator, Optional
+
+from core.article_id import ArticleIndex
+from core.journal import ExportJournal
+from core.ledger import DownloadLedger
+from core.log import get_logger
+from core.pacing import PACE_LIST, PACE_RETRY
+from core.scheduler import RequestCancelled
+from core.wechat_downloader_core import SessionExpiredError
+
+log = get_logger('listing')
+
+
+def iter_new_articles(downloader, token: str, fakeid: str, ledger: DownloadLedger,
+                      index: ArticleIndex, incremental: bool = True,
+                      journal: Optional[ExportJournal] = None, job: Optional[Dict] = None,
+                      should_stop: Optional[Callable[[], bool]] = None,
+                      on_page: Optional[Callable[[int], None]] = None) -> Iterator[Dict]:
+    """逐页获取公众号文章列表，产出需要下载的文章
+
+    已下载的文章跳过，增量同步时翻页到上次同步位置即停止；列表完整获取后推进
+    同步水位，最后补上之前列出但未成功下载的文章。调用方可以边迭代边下载。
+    传入导出任务 job 时，列出的文章和翻页位置写入检查点日志；接着中断的任务时
+    先产出上次已列出未完成的文章，再从上次翻到的位置继续翻页。
+    """
+    journal = journal if job else None
+    should_stop = should_stop or (lambda: False)
+    yielded = set()  # 已产出文章的去重键，避免同一篇文章以不同链接重复导出
+    begin = 0  # 微信API使用begin参数表示起始位置
+    page = 1
+    has_more = True
+
+    # 增量同步：翻页到上次完整同步的位置即停止
+    sync_state = ledger.get_sync_state(fakeid) if incremental else None
+    newest_article = None  # 本次列出的最新文章，列表完整获取后作为新的同步水位
+    listing_complete = False
+
+    if job and job['resumed']:
+        for article in journal.pending_items(job['id']):
+            key = index.key(article['link'])
+            if key not in yielded and not index.contains(article['link']):
+                yielded.add(key)
+                yield article
+        begin, page, newest_article = job['list_begin'], job['list_page'], job['newest']
+        # 列表上次已完整获取（同步水位也已推进），只需处理剩余文章
+        has_more = not job['listing_done']
+    reached_sync_point = False
+    page_failures = 0  # 当前页连续失败次数，失败的页重新请求而不是跳过
+
+    while has_more:
+        try:
+            # 更新进度
+            if on_page:
+                on_page(page)
+
+            # 获取当前页文章（按begin偏移量翻页，每页数量由下载器自动探测）
+            started = time.perf_counter()
+            articles_list = downloader.get_articles_page(fakeid, token, begin)
+            downloader.pacing.observe(PACE_LIST, time.perf_counter() - started)
+
+            if not articles_list or len(articles_list) == 0:
+                log.info("第%s页没有文章数据，结束获取", page)
+                listing_complete = True
+                break
+
+            # 添加到文章列表（排除已下载的）
+            new_articles_count = 0
+            for article in articles_list:
+                title = article.get('title', '未知标题')
+                link = article.get('link', '')
+
+                if not link:
+                    continue
+
+                if newest_article is None and article.get('create_time') is not None:
+                    newest_article = {'create_time': article['create_time'],
+                                      'appmsgid': article.get('appmsgid')}
+
+                if ledger.is_at_or_below(article, sync_state):
+                    reached_sync_point = True
+                    break
+
+                # 检查是否已下载（按链接/aid/appmsgid查询台账，按文章标识查询去重索引）
+                key = index.key(link)
+                if key in yielded or ledger.is_downloaded(article) or index.contains(link):
+                    log.debug("跳过已下载文章: %s...", title[:30])
+                    continue
+
+                new_article = {
+                    'title': title,
+                    'link': link,
+                    'aid': article.get('aid'),
+                    'appmsgid': article.get('appmsgid'),
+                    'itemidx': article.get('itemidx'),
+                    'create_time': article.get('create_time')
+                }
+                ledger.mark(new_article, 'pending', fakeid)
+                if journal:
+                    journal.add_item(job['id'], new_article)
+                new_articles_count += 1
+                log.debug("添加新文章: %s...", title[:30])
+                yielded.add(key)
+                yield new_article
+
+            log.info("第%s页: 获取%s篇，新增%s篇，累计%s篇", page, len(articles_list), new_articles_count, len(yielded))
+
+            if reached_sync_point:
+                log.info("已到达上次同步位置，停止翻页")
+                listing_complete = True
+                break
+
+            # 按实际返回数量推进偏移量，达到接口给出的文章总数即结束
+            begin += len(articles_list)
+            total_count = downloader.last_list_total
+            if total_count is not None and begin >= total_count:
+                log.info("已获取全部 %s 篇文章的列表", total_count)
+                listing_complete = True
+                break
+
+            page += 1
+            page_failures = 0
+            if journal:
+                # 本页文章都已登记，中断后从下一页继续翻页
+                journal.checkpoint_listing(job['id'], begin, page, newest_article)
+
+            # 添加延迟避免请求过快
+            downloader.pacing.pause(PACE_LIST, should_stop)
+
+        except (SessionExpiredError, RequestCancelled) as e:
+            log.warning("获取第%s页文章中止: %s", page, e)
+            break
+        except Exception as e:
+            # 频率限制已在下载器中按退避时间重试，这里处理其他错误：
+            # 重新请求同一页，连续失败多次则停止翻页（不推进同步水位，下次从头补齐）
+            page_failures += 1
+            log.warning("获取第%s页文章失败 (第%s次): %s", page, page_failures, e)
+            if page_failures >= 3:
+                log.error("第%s页连续失败 %s 次，停止获取列表", page, page_failures)
+                break
+            downloader.pacing.pause(PACE_RETRY)
+            continue
+
+    # 列表完整获取后推进同步水位，未下载完的文章已作为待下载记录在台账中
+    if listing_complete and newest_article:
+        ledger.update_sync_state(fakeid, newest_article['create_time'], newest_article.get('appmsgid'))
+    if listing_complete and journal:
+        journal.finish_listing(job['id'])
+
+    if incremental:
+        # 之前列出但未成功下载的文章一并导出
+        for article in ledger.unfinished_articles(fakeid):
+            key = index.key(article['link'])
+            if key not in yielded and not index.contains(article['link']):
+                yielded.add(key)
+                if journal:
+                    journal.add_item(job['id'], article)
+                yield article
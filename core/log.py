@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+下载器日志
+
+下载过程中每篇文章的细节（请求地址、图片统计、文件名清理、转换调用）记为 DEBUG，
+默认的 INFO 级别每篇文章只输出一行“已保存”，失败和频率限制为 WARNING。
+消息使用 % 参数延迟格式化，级别关闭时不会拼接字符串或生成 repr；关键字参数作为
+结构化字段附在消息后（text 格式为 key=value，json 格式为一行 JSON）。
+
+同一条警告/错误的消息模板（例如某个图片CDN持续失败时的“图片下载失败”）在 log_repeat_window
+秒内最多输出 log_repeat_limit 条，其余的只计数，窗口结束后的下一条注明省略了多少条。
+每篇文章一行的 INFO 日志不受限制。
+
+日志写到当前的 sys.stdout（GUI 控制台与原来的 print 输出一致，命令行工具把它重定向到
+标准错误），log_file 指定时同时追加到文件。日志只在入口（命令行、GUI、crawler 工作进程）
+启动时配置一次，创建下载器不会改动全局日志设置。
+
+配置项:
+    log_level          DEBUG / INFO / WARNING（默认 INFO）
+    log_format         text 或 json（默认 text）
+    log_file           同时写入的日志文件
+    log_repeat_limit   同一警告/错误消息模板在窗口内最多输出的条数（默认 5，0 表示不限制）
+    log_repeat_window  限制窗口秒数（默认 60）
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+ROOT_LOGGER = 'wefetch'
+LOG_FORMATS = ('text', 'json')
+
+# logging 内部使用的关键字参数，其余关键字参数作为结构化字段
+_LOGGING_KWARGS = ('exc_info', 'stack_info', 'stacklevel', 'extra')
+
+
+class FieldLogger(logging.LoggerAdapter):
+    """log.info("已保存: %s", title, path=filepath) —— 关键字参数成为结构化字段"""
+
+    def __init__(self, logger: logging.Logger):
+        super().__init__(logger, {})
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in _LOGGING_KWARGS}
+        if fields:
+            extra = dict(kwargs.get('extra') or {})
+            extra['fields'] = fields
+            kwargs['extra'] = extra
+        return msg, kwargs
+
+
+def get_logger(name: str) -> FieldLogger:
+    """wefetch 下的子日志器，例如 get_logger('downloader')"""
+    return FieldLogger(logging.getLogger(f"{ROOT_LOGGER}.{name}"))
+
+
+def _message(record: logging.LogRecord) -> str:
+    """格式化后的消息，附上 RepeatFilter 的省略说明"""
+    message = record.getMessage()
+    note = getattr(record, 'repeat_prefix', None)
+    if note:
+        message = f"{note} {message}"
+    note = getattr(record, 'repeat_suffix', None)
+    if note:
+        message = f"{message} {note}"
+    return message
+
+
+def _format_field(value) -> str:
+    text = str(value)
+    if not text or any(ch.isspace() for ch in text) or '"' in text:
+        return json.dumps(text, ensure_ascii=False)
+    return text
+
+
+class TextFormatter(logging.Formatter):
+    """消息 + key=value 字段；WARNING 以上带级别前缀"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = _message(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            message += ' ' + ' '.join(f"{key}={_format_field(value)}" for key, value in fields.items()
+                                      if value is not None)
+        if record.levelno >= logging.WARNING:
+            message = f"[{record.levelname}] {message}"
+        if record.exc_info:
+            message += '\n' + self.formatException(record.exc_info)
+        return message
+
+
+class JsonFormatter(logging.Formatter):
+    """一行一个 JSON 对象：time/level/logger/msg 与结构化字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {'time': round(record.created, 3), 'level': record.levelname,
+                'logger': record.name, 'msg': _message(record)}
+        for key, value in (getattr(record, 'fields', None) or {}).items():
+            data.setdefault(key, value)
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class StdoutHandler(logging.StreamHandler):
+    """每次输出时取当前的 sys.stdout，跟随 redirect_stdout 和 GUI 的重定向"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class RepeatFilter(logging.Filter):
+    """同一日志器、级别和消息模板在窗口内最多放行 limit 条（只限制 level 及以上）"""
+
+    def __init__(self, limit: int = 5, window: float = 60.0, level: int = logging.WARNING):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.level = level
+        self._lock = threading.Lock()
+        # (日志器, 级别, 模板) -> [窗口开始时间, 窗口内条数]
+        self._seen: Dict[Tuple[str, int, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # 同一条记录经过多个输出（控制台、文件）时只计数一次
+        decided = getattr(record, 'repeat_allowed', None)
+        if decided is not None:
+            return decided
+        record.repeat_allowed = self._allow(record)
+        return record.repeat_allowed
+
+    def _allow(self, record: logging.LogRecord) -> bool:
+        if self.limit <= 0 or record.levelno < self.level:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            state = self._seen.get(key)
+            if state is None or now - state[0] >= self.window:
+                # 超出 limit 的第一条带着“不再输出”的说明放行，其余才是被省略的
+                suppressed = state[1] - self.limit - 1 if state else 0
+                self._seen[key] = state = [now, 0]
+            else:
+                suppressed = 0
+            state[1] += 1
+            allowed = state[1] <= self.limit
+            if len(self._seen) > 10000:
+                self._seen = {k: v for k, v in self._seen.items() if now - v[0] < self.window}
+        # 说明放在记录的属性中由格式化器附加，不改动 msg（其他过滤器和处理器看到的仍是原模板）
+        if suppressed > 0:
+            # 上一个窗口被省略的条数附在本条前面
+            record.repeat_prefix = f"(前 {self.window:.0f} 秒内省略了 {suppressed} 条相同消息)"
+        elif state[1] == self.limit + 1:
+            record.repeat_suffix = f"(之后 {self.window:.0f} 秒内的相同消息不再输出)"
+            return True
+        return allowed
+
+
+_configured_handlers = []
+_configure_lock = threading.Lock()
+
+
+def configure_logging(level: Optional[str] = None, log_format: str = 'text', log_file: Optional[str] = None,
+                      repeat_limit: int = 5, repeat_window: float = 60.0) -> logging.Logger:
+    """(重新)配置 wefetch 日志器，可以重复调用"""
+    logger = logging.getLogger(ROOT_LOGGER)
+    formatter = JsonFormatter() if log_format == 'json' else TextFormatter()
+    repeat = RepeatFilter(repeat_limit, repeat_window)
+    with _configure_lock:
+        for handler in _configured_handlers:
+            logger.removeHandler(handler)
+            handler.close()
+        _configured_handlers.clear()
+        handlers = [StdoutHandler()]
+        if log_file:
+            handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+            handler.addFilter(repeat)
+            logger.addHandler(handler)
+            _configured_handlers.append(handler)
+        logger.setLevel(str(level or 'INFO').upper())
+        logger.propagate = False
+    return logger
+
+
+def configure_from_config(config: dict) -> None:
+    """按配置项设置日志；未配置过时使用默认设置，配置中没有日志项时不改动已有设置"""
+    keys = ('log_level', 'log_format', 'log_file', 'log_repeat_limit', 'log_repeat_window')
+    if _configured_handlers and not any(key in config for key in keys):
+        return
+    log_format = config.get('log_format', 'text')
+    if log_format not in LOG_FORMATS:
+        log_format = 'text'
+    configure_logging(config.get('log_level'), log_format, config.get('log_file'),
+                      int(config.get('log_repeat_limit', 5)), float(config.get('log_repeat_window', 60)))
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+运行指标（Prometheus 文本格式）
+
+长时间无人值守抓取时用来观察吞吐和频率限制：按接口和状态码统计的请求数与耗时、
+微信 base_resp.ret 返回码、频率限制次数与退避时间、下载字节数、完成/失败文章数与
+最近一分钟的文章/秒、流水线队列长度、图片缓存命中率。
+
+指标在进程内全局累计，同一进程中多次创建下载器（例如GUI每次导出）时继续累加。
+配置项 metrics_port 指定时在 metrics_host（默认 127.0.0.1）上启动 HTTP 服务，
+Prometheus 抓取 /metrics；metrics_file 指定时每隔 metrics_interval 秒（默认 15）
+把同样的文本原子写入该文件（可交给 node_exporter 的 textfile collector），进程退出时再写一次。
+
+用法:
+    python -m core.metrics show http://127.0.0.1:9108/metrics
+    python -m core.metrics show ./articles/.wefetch/metrics.prom
+"""
+
+import argparse
+import atexit
+import collections
+import http.server
+import math
+import os
+import threading
+import time
+import urllib.request
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+from core.atomic_io import atomic_write
+from core.log import get_logger
+
+# 图片请求不经过调度器，单独作为一类接口统计
+ENDPOINT_IMAGE = 'image'
+
+ARTICLE_SAVED = 'saved'
+ARTICLE_FAILED = 'failed'
+
+IMAGE_CACHE_HIT = 'hit'
+IMAGE_CACHE_MISS = 'miss'
+IMAGE_CACHE_NOT_MODIFIED = 'not_modified'
+
+# 请求耗时直方图的分桶（秒）
+REQUEST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 单篇文章从请求到写盘的耗时分桶（秒）
+ARTICLE_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# 文章/秒按最近这段时间计算
+THROUGHPUT_WINDOW = 60.0
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+log = get_logger('metrics')
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class Metric:
+    """带标签的指标，按标签值元组保存数值"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} 的标签应为 {self.label_names}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self) -> Iterator[Tuple[str, Tuple[str, ...], Tuple[str, ...], float]]:
+        """(指标名, 标签名, 标签值, 数值)"""
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, self.label_names, key, value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, label_names, label_values, value in self.samples():
+            lines.append(f"{name}{_format_labels(label_names, label_values)} {_format_value(value)}")
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """只增不减的计数"""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(Metric):
+    """当前值；也可以用 watch() 登记在输出时才读取的函数（例如队列长度）"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def watch(self, function: Callable[[], float], **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def unwatch(self, **labels) -> None:
+        """停止读取函数，保留最后一次读到的值"""
+        key = self._key(labels)
+        with self._lock:
+            function = self._functions.pop(key, None)
+        if function is not None:
+            self.set(function(), **labels)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, function in functions.items():
+            try:
+                values[key] = function()
+            except Exception:
+                continue
+        for key, value in sorted(values.items()):
+            yield self.name, self.label_names, key, value
+
+
+class Histogram(Metric):
+    """分桶计数，输出 _bucket/_sum/_count"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = REQUEST_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        bucket_labels = self.label_names + ('le',)
+        for key, (counts, total) in sorted(values.items()):
+            for bound, count in zip(self.buckets, counts):
+                yield f"{self.name}_bucket", bucket_labels, key + (_format_value(bound),), count
+            yield f"{self.name}_sum", self.label_names, key, total
+            yield f"{self.name}_count", self.label_names, key, counts[-1]
+
+
+class MetricsServer(http.server.ThreadingHTTPServer):
+    """在后台线程中提供 /metrics"""
+
+    daemon_threads = True
+
+    def __init__(self, metrics: 'CrawlMetrics', host: str, port: int):
+        self.metrics = metrics
+        super().__init__((host, port), MetricsHandler)
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CrawlMetrics:
+    """下载器与各导出流程共用的指标集合"""
+
+    def __init__(self):
+        self.requests = Counter('wefetch_http_requests_total',
+                                '按接口和HTTP状态码统计的请求数 (连接失败/超时的状态为 error)',
+                                ('endpoint', 'status'))
+        self.request_seconds = Histogram('wefetch_http_request_duration_seconds',
+                                         '请求耗时（秒）', ('endpoint',), REQUEST_BUCKETS)
+        self.downloaded_bytes = Counter('wefetch_downloaded_bytes_total', '下载的响应体字节数', ('endpoint',))
+        self.wechat_ret = Counter('wefetch_wechat_ret_total', '微信接口 base_resp.ret 返回码', ('endpoint', 'ret'))
+        self.throttles = Counter('wefetch_throttle_events_total', '触发微信频率限制的次数', ('endpoint',))
+        self.backoff_seconds = Counter('wefetch_throttle_backoff_seconds_total',
+                                       '频率限制后安排的退避时间（秒）', ('endpoint',))
+        self.articles = Counter('wefetch_articles_total', '处理完成的文章数', ('result',))
+        self.article_seconds = Histogram('wefetch_article_duration_seconds',
+                                         '单篇文章从开始处理到写盘的耗时（秒）', (), ARTICLE_BUCKETS)
+        self.articles_per_second = Gauge('wefetch_articles_per_second',
+                                         f'最近 {THROUGHPUT_WINDOW:.0f} 秒保存的文章/秒')
+        self.queue_depth = Gauge('wefetch_queue_depth', '导出队列中等待处理的文章数', ('queue',))
+        self.image_cache = Counter('wefetch_image_cache_total',
+                                   '图片URL缓存查询结果 (hit/miss/not_modified)', ('result',))
+        self.image_cache_hit_ratio = Gauge('wefetch_image_cache_hit_ratio',
+                                           '图片URL缓存命中率（含304重新验证）')
+        self.images = Counter('wefetch_images_total', '图片下载结果', ('result',))
+        self.start_time = Gauge('wefetch_start_time_seconds', '进程开始记录指标的时间（Unix时间戳）')
+
+        self.start_time.set(time.time())
+        self.articles_per_second.watch(self._recent_throughput)
+        self.image_cache_hit_ratio.watch(self._image_cache_hit_ratio)
+        self._recent = collections.deque()
+        self._recent_lock = threading.Lock()
+        self._server: Optional[MetricsServer] = None
+        self._file: Optional[str] = None
+        self._file_interval = 15.0
+        self._file_lock = threading.Lock()
+
+    def all(self) -> Tuple[Metric, ...]:
+        return (self.requests, self.request_seconds, self.downloaded_bytes, self.wechat_ret,
+                self.throttles, self.backoff_seconds, self.articles, self.article_seconds,
+                self.articles_per_second, self.queue_depth, self.image_cache, self.image_cache_hit_ratio,
+                self.images, self.start_time)
+
+    def render(self) -> str:
+        """全部指标的 Prometheus 文本格式"""
+        return '\n'.join(metric.render() for metric in self.all()) + '\n'
+
+    # ---- 记录 ----
+
+    def observe_request(self, endpoint: str, status, seconds: float, size: int = 0) -> None:
+        self.requests.inc(endpoint=endpoint, status=status)
+        self.request_seconds.observe(seconds, endpoint=endpoint)
+        if size:
+            self.downloaded_bytes.inc(size, endpoint=endpoint)
+
+    def observe_throttle(self, endpoint: str, delay: float = 0.0) -> None:
+        self.throttles.inc(endpoint=endpoint)
+        self.observe_backoff(endpoint, delay)
+
+    def observe_backoff(self, endpoint: str, delay: float) -> None:
+        if delay > 0:
+            self.backoff_seconds.inc(delay, endpoint=endpoint)
+
+    def observe_article(self, ok: bool, seconds: Optional[float] = None) -> None:
+        """一篇文章处理完成（成功写盘或最终失败）"""
+        self.articles.inc(result=ARTICLE_SAVED if ok else ARTICLE_FAILED)
+        if seconds is not None:
+            self.article_seconds.observe(seconds)
+        if ok:
+            now = time.monotonic()
+            with self._recent_lock:
+                self._recent.append(now)
+
+    def observe_images(self, hits: int = 0, misses: int = 0, not_modified: int = 0, downloaded: int = 0,
+                       failed: int = 0) -> None:
+        if hits:
+            self.image_cache.inc(hits, result=IMAGE_CACHE_HIT)
+        if misses:
+            self.image_cache.inc(misses, result=IMAGE_CACHE_MISS)
+        if not_modified:
+            self.image_cache.inc(not_modified, result=IMAGE_CACHE_NOT_MODIFIED)
+        if downloaded:
+            self.images.inc(downloaded, result='downloaded')
+        if failed:
+            self.images.inc(failed, result='failed')
+
+    def watch_queue(self, name: str, size: Callable[[], int]) -> None:
+        self.queue_depth.watch(size, queue=name)
+
+    def unwatch_queue(self, name: str) -> None:
+        self.queue_depth.unwatch(queue=name)
+
+    def _recent_throughput(self) -> float:
+        cutoff = time.monotonic() - THROUGHPUT_WINDOW
+        with self._recent_lock:
+            while self._recent and self._recent[0] < cutoff:
+                self._recent.popleft()
+            return len(self._recent) / THROUGHPUT_WINDOW
+
+    def _image_cache_hit_ratio(self) -> float:
+        hits = self.image_cache.value(result=IMAGE_CACHE_HIT) + \
+            self.image_cache.value(result=IMAGE_CACHE_NOT_MODIFIED)
+        total = hits + self.image_cache.value(result=IMAGE_CACHE_MISS)
+        return hits / total if total else 0.0
+
+    # ---- 输出 ----
+
+    def start_from_config(self, config: dict) -> None:
+        """按配置启动 HTTP 服务和定时写文件（已启动的不会重复启动）"""
+        port = int(config.get('metrics_port') or 0)
+        if port and self._server is None:
+            self.serve(config.get('metrics_host', '127.0.0.1'), port)
+        if config.get('metrics_file') and self._file is None:
+            self.write_periodically(config['metrics_file'], float(config.get('metrics_interval', 15)))
+
+    def serve(self, host: str, port: int) -> Optional[MetricsServer]:
+        """在后台线程中启动 /metrics 服务；端口被占用时只记录警告，不影响下载"""
+        try:
+            server = MetricsServer(self, host, port)
+        except OSError as e:
+            log.warning("指标服务启动失败 (%s:%s): %s", host, port, e)
+            return None
+        self._server = server
+        threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+        log.info("指标服务: http://%s:%s/metrics", host, server.server_address[1])
+        return server
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def write_file(self) -> None:
+        """立即把当前指标写入 metrics_file"""
+        if not self._file:
+            return
+        with self._file_lock:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self._file)), exist_ok=True)
+                atomic_write(self._file, self.render(), fsync=False)
+            except OSError as e:
+                log.warning("写入指标文件失败: %s", e, path=self._file)
+
+    def write_periodically(self, path: str, interval: float = 15.0) -> None:
+        self._file = path
+        self._file_interval = max(1.0, interval)
+
+        def loop():
+            while True:
+                self.write_file()
+                time.sleep(self._file_interval)
+
+        threading.Thread(target=loop, name='metrics-file', daemon=True).start()
+        atexit.register(self.write_file)
+
+
+_metrics: Optional[CrawlMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> CrawlMetrics:
+    """进程内共享的指标集合"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = CrawlMetrics()
+        return _metrics
+
+
+def parse_metrics(text: str) -> Dict[str, float]:
+    """把文本格式解析成 {'名称{标签}': 数值}"""
+    values = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        name, _, value = line.rpartition(' ')
+        try:
+            values[name] = float(value)
+        except ValueError:
+            continue
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description='运行指标 (metrics_port / metrics_file) 工具')
+    parser.add_argument('command', choices=['show'])
+    parser.add_argument('source', help='指标地址 (http://host:port/metrics) 或 metrics_file 文件')
+    args = parser.parse_args()
+
+    if args.source.startswith(('http://', 'https://')):
+        with urllib.request.urlopen(args.source, timeout=10) as response:
+            text = response.read().decode('utf-8')
+    else:
+        with open(args.source, 'r', encoding='utf-8') as f:
+            text = f.read()
+    values = parse_metrics(text)
+
+    def total(prefix: str) -> Dict[str, float]:
+        return {name[len(prefix):].strip('{}'): value for name, value in values.items()
+                if name.startswith(prefix + '{')}
+
+    started = values.get('wefetch_start_time_seconds')
+    if started:
+        print(f"已运行: {(time.time() - started) / 60:.1f} 分钟")
+    saved = values.get(f'wefetch_articles_total{{result="{ARTICLE_SAVED}"}}', 0)
+    failed = values.get(f'wefetch_articles_total{{result="{ARTICLE_FAILED}"}}', 0)
+    print(f"文章: 成功 {saved:.0f}, 失败 {failed:.0f}, "
+          f"最近 {values.get('wefetch_articles_per_second', 0):.3f} 篇/秒")
+    for labels, count in sorted(total('wefetch_http_requests_total').items()):
+        print(f"请求 {labels}: {count:.0f}")
+    for labels, count in sorted(total('wefetch_wechat_ret_total').items()):
+        print(f"返回码 {labels}: {count:.0f}")
+    for labels, count in sorted(total('wefetch_throttle_events_total').items()):
+        print(f"频率限制 {labels}: {count:.0f}")
+    downloaded = sum(total('wefetch_downloaded_bytes_total').values())
+    print(f"下载: {downloaded / 1024 / 1024:.1f} MB, 图片缓存命中率 "
+          f"{values.get('wefetch_image_cache_hit_ratio', 0):.0%}")
+    for labels, depth in sorted(total('wefetch_queue_depth').items()):
+        print(f"队列 {labels}: {depth:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+请求节奏策略
+
+文章之间、列表翻页之间、失败重试之前的等待时间统一由一个节奏策略对象决定，
+在配置中选择一次后注入下载器和GUI，不再在各处硬编码 random.uniform。
+策略同时统计等待时间与实际工作时间，便于按部署环境调整吞吐量。
+
+配置示例 (下载器配置中的 pacing 项):
+    {"policy": "random", "ranges": {"article": [2, 4], "list": [2, 3]}}
+    {"policy": "fixed", "interval": 3}
+    {"policy": "adaptive", "factor": 2.0, "min_delay": 1, "max_delay": 10}
+    {"policy": "token_bucket", "rate": 0.3, "burst": 2}
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from core.log import get_logger
+from core.scheduler import TokenBucket
+from core.tracing import SPAN_SLEEP
+
+log = get_logger('pacing')
+
+# 等待的场景
+PACE_ARTICLE = 'article'   # 两篇文章之间
+PACE_LIST = 'list'         # 文章列表翻页之间
+PACE_RETRY = 'retry'       # 列表页失败后重试之前
+PACE_FAILURE = 'failure'   # 文章下载失败后继续之前
+
+# 与之前硬编码一致的默认等待区间（秒）
+DEFAULT_RANGES: Dict[str, Tuple[float, float]] = {
+    PACE_ARTICLE: (2.0, 4.0),
+    PACE_LIST: (2.0, 3.0),
+    PACE_RETRY: (3.0, 5.0),
+    PACE_FAILURE: (1.0, 2.0),
+}
+
+# 分段睡眠的粒度，保证停止导出能及时响应
+SLEEP_SLICE = 0.5
+
+
+@dataclass
+class PacingMetrics:
+    """等待时间与工作时间统计"""
+    sleep_seconds: float = 0.0
+    work_seconds: float = 0.0
+    pauses: int = 0
+    works: int = 0
+    sleep_by_kind: Dict[str, float] = field(default_factory=dict)
+    work_by_kind: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def sleep_ratio(self) -> float:
+        """等待时间占总耗时的比例"""
+        total = self.sleep_seconds + self.work_seconds
+        return self.sleep_seconds / total if total else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            'sleep_seconds': round(self.sleep_seconds, 3),
+            'work_seconds': round(self.work_seconds, 3),
+            'pauses': self.pauses,
+            'works': self.works,
+            'sleep_ratio': round(self.sleep_ratio, 3),
+            'sleep_by_kind': {k: round(v, 3) for k, v in self.sleep_by_kind.items()},
+            'work_by_kind': {k: round(v, 3) for k, v in self.work_by_kind.items()},
+        }
+
+    def summary(self) -> str:
+        return (f"节奏统计: 工作 {self.work_seconds:.1f} 秒 ({self.works} 次), "
+                f"等待 {self.sleep_seconds:.1f} 秒 ({self.pauses} 次), "
+                f"等待占比 {self.sleep_ratio:.0%}")
+
+
+class PacingPolicy:
+    """节奏策略基类，子类只需实现 next_delay"""
+
+    name = 'base'
+
+    def __init__(self):
+        self.metrics = PacingMetrics()
+        self._lock = threading.Lock()
+        # 分阶段计时（core.tracing.Tracer），由下载器设置，每次等待记为 sleep 跨度
+        self.tracer = None
+
+    def next_delay(self, kind: str = PACE_ARTICLE) -> float:
+        """下一次等待的秒数"""
+        raise NotImplementedError
+
+    def observe(self, kind: str, seconds: float) -> None:
+        """记录一次工作（请求+处理）耗时"""
+        with self._lock:
+            self.metrics.work_seconds += seconds
+            self.metrics.works += 1
+            self.metrics.work_by_kind[kind] = self.metrics.work_by_kind.get(kind, 0.0) + seconds
+
+    def sleep(self, seconds: float, kind: str = PACE_ARTICLE,
+              should_stop: Optional[Callable[[], bool]] = None) -> float:
+        """分段睡眠并计入统计，should_stop() 返回True时提前结束，返回实际等待秒数"""
+        started = time.monotonic()
+        deadline = started + max(0.0, seconds)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (should_stop and should_stop()):
+                break
+            time.sleep(min(SLEEP_SLICE, remaining))
+        slept = time.monotonic() - started
+        self._record_sleep(slept, kind)
+        return slept
+
+    async def sleep_async(self, seconds: float, kind: str = PACE_ARTICLE) -> float:
+        """sleep 的协程版本，等待期间不阻塞事件循环，返回实际等待秒数"""
+        import asyncio
+
+        started = time.monotonic()
+        await asyncio.sleep(max(0.0, seconds))
+        slept = time.monotonic() - started
+        self._record_sleep(slept, kind)
+        return slept
+
+    def _record_sleep(self, slept: float, kind: str) -> None:
+        with self._lock:
+            self.metrics.sleep_seconds += slept
+            self.metrics.pauses += 1
+            self.metrics.sleep_by_kind[kind] = self.metrics.sleep_by_kind.get(kind, 0.0) + slept
+        if self.tracer is not None:
+            self.tracer.record(SPAN_SLEEP, slept, kind=kind)
+
+    def pause(self, kind: str = PACE_ARTICLE,
+              should_stop: Optional[Callable[[], bool]] = None) -> float:
+        """按策略等待一次"""
+        return self.sleep(self.next_delay(kind), kind, should_stop)
+
+    async def pause_async(self, kind: str = PACE_ARTICLE) -> float:
+        """按策略等待一次（协程版本）"""
+        return await self.sleep_async(self.next_delay(kind), kind)
+
+    def reset_metrics(self) -> None:
+        with self._lock:
+            self.metrics = PacingMetrics()
+
+
+class FixedPacing(PacingPolicy):
+    """固定间隔"""
+
+    name = 'fixed'
+
+    def __init__(self, interval: float = 3.0):
+        super().__init__()
+        self.interval = interval
+
+    def next_delay(self, kind: str = PACE_ARTICLE) -> float:
+        return self.interval
+
+
+class RandomPacing(PacingPolicy):
+    """在每种场景的区间内均匀随机（默认策略，与原先的行为一致）"""
+
+    name = 'random'
+
+    def __init__(self, ranges: Optional[Dict[str, Tuple[float, float]]] = None):
+        super().__init__()
+        self.ranges = dict(DEFAULT_RANGES)
+        for kind, (low, high) in (ranges or {}).items():
+            self.ranges[kind] = (float(low), float(high))
+
+    def next_delay(self, kind: str = PACE_ARTICLE) -> float:
+        low, high = self.ranges.get(kind, self.ranges[PACE_ARTICLE])
+        return random.uniform(low, high)
+
+
+class AdaptivePacing(PacingPolicy):
+    """按最近请求耗时自适应：服务器变慢时放慢节奏，变快时加快
+
+    等待时间 = factor × 工作耗时的指数移动平均，限制在 [min_delay, max_delay]，
+    并加上 ±jitter 的随机扰动。
+    """
+
+    name = 'adaptive'
+
+    def __init__(self, factor: float = 2.0, min_delay: float = 1.0, max_delay: float = 10.0,
+                 initial: float = 3.0, smoothing: float = 0.3, jitter: float = 0.2):
+        super().__init__()
+        self.factor = factor
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.smoothing = smoothing
+        self.jitter = jitter
+        self._latency: Dict[str, float] = {}
+        self._initial = initial
+
+    def observe(self, kind: str, seconds: float) -> None:
+        super().observe(kind, seconds)
+        with self._lock:
+            previous = self._latency.get(kind)
+            self._latency[kind] = seconds if previous is None else (
+                self.smoothing * seconds + (1 - self.smoothing) * previous)
+
+    def next_delay(self, kind: str = PACE_ARTICLE) -> float:
+        with self._lock:
+            latency = self._latency.get(kind)
+        delay = self._initial if latency is None else self.factor * latency
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return min(self.max_delay, max(self.min_delay, delay))
+
+
+class TokenBucketPacing(PacingPolicy):
+    """令牌桶：平均速率 rate 次/秒，允许 burst 次突发"""
+
+    name = 'token_bucket'
+
+    def __init__(self, rate: float = 1 / 3, burst: float = 1.0):
+        super().__init__()
+        self.bucket = TokenBucket(rate, burst)
+
+    def next_delay(self, kind: str = PACE_ARTICLE) -> float:
+        return self.bucket.reserve()
+
+
+PACING_POLICIES = {
+    FixedPacing.name: FixedPacing,
+    RandomPacing.name: RandomPacing,
+    AdaptivePacing.name: AdaptivePacing,
+    TokenBucketPacing.name: TokenBucketPacing,
+}
+
+
+def create_pacing(options: Optional[dict] = None,
+                  default_ranges: Optional[Dict[str, Tuple[float, float]]] = None) -> PacingPolicy:
+    """按配置中的 pacing 项创建节奏策略
+
+    default_ranges 用于调用方覆盖随机策略的默认区间。
+    """
+    options = dict(options or {})
+    policy = options.pop('policy', RandomPacing.name)
+    if policy not in PACING_POLICIES:
+        log.warning("未知的节奏策略 %s，使用随机等待", policy)
+        policy = RandomPacing.name
+
+    if policy == RandomPacing.name:
+        ranges = dict(default_ranges or {})
+        ranges.update(options.get('ranges', {}))
+        return RandomPacing(ranges)
+    if policy == FixedPacing.name:
+        return FixedPacing(float(options.get('interval', 3.0)))
+    if policy == AdaptivePacing.name:
+        keys = ('factor', 'min_delay', 'max_delay', 'initial', 'smoothing', 'jitter')
+        return AdaptivePacing(**{k: float(options[k]) for k in keys if k in options})
+    return TokenBucketPacing(float(options.get('rate', 1 / 3)), float(options.get('burst', 1.0)))
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文章页面原文缓存
+
+把下载过的文章页面原始HTML压缩后保存在 SQLite 中，按文章标识 __biz+mid+idx 索引，
+同一篇文章换一种格式重新导出时直接从缓存解析，不再请求网络。缓存条目超过有效期
+后失效；总大小超过上限时按最近使用时间淘汰（LRU）。
+
+用法:
+    python -m core.page_cache stats --db ./articles/.wefetch/page_cache.db
+    python -m core.page_cache prune --db ./articles/.wefetch/page_cache.db
+    python -m core.page_cache clear --db ./articles/.wefetch/page_cache.db
+"""
+
+import argparse
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+from core.article_id import article_key, dedup_key, key_from_url, normalize_url
+from core.log import get_logger
+
+DEFAULT_TTL_DAYS = 30
+DEFAULT_MAX_MB = 500
+COMPRESS_LEVEL = 6
+
+log = get_logger('page_cache')
+
+
+class ArticlePageCache:
+    """压缩保存文章页面原文的缓存"""
+
+    def __init__(self, db_path: str, ttl_days: float = DEFAULT_TTL_DAYS,
+                 max_mb: float = DEFAULT_MAX_MB):
+        self.db_path = db_path
+        self.ttl = ttl_days * 86400
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                html BLOB NOT NULL,
+                raw_size INTEGER,
+                size INTEGER,
+                fetched_at REAL,
+                accessed_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages(accessed_at);
+            CREATE TABLE IF NOT EXISTS page_urls (
+                url TEXT PRIMARY KEY,
+                key TEXT NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def _resolve(self, url: str) -> Optional[str]:
+        """链接 -> 缓存键：先查下载过的链接，再从长链接参数中取标识（其他链接指向同一篇文章时）"""
+        row = self._conn.execute("SELECT key FROM page_urls WHERE url = ?", (normalize_url(url),)).fetchone()
+        return row[0] if row else key_from_url(url)
+
+    def get(self, url: str) -> Optional[str]:
+        """返回缓存中未过期的页面原文，没有时返回None"""
+        now = time.time()
+        with self._lock:
+            key = self._resolve(url)
+            row = self._conn.execute(
+                "SELECT html, fetched_at FROM pages WHERE key = ?", (key,)).fetchone() if key else None
+            if row and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if not row:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def put(self, url: str, html: str, biz: str = '', mid: str = '', idx: str = '') -> None:
+        """保存页面原文
+
+        链接带 __biz/mid/idx 时以链接为准，页面中的文章标识只用于短链接；两者不一致时
+        不写入，避免页面里错误或共用的标识让不同文章互相覆盖。
+        """
+        url_key = key_from_url(url)
+        page_key = article_key(biz, mid, idx)
+        if url_key and page_key and page_key != url_key:
+            log.warning("页面中的文章标识 %s 与链接不一致，不写入页面缓存", page_key, link=url)
+            return
+        key = url_key or page_key or dedup_key(url)
+        raw = html.encode('utf-8')
+        blob = zlib.compress(raw, COMPRESS_LEVEL)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (key, url, html, raw_size, size, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, sqlite3.Binary(blob), len(raw), len(blob), now, now))
+            self._conn.execute("INSERT OR REPLACE INTO page_urls (url, key) VALUES (?, ?)",
+                               (normalize_url(url), key))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """删除过期条目，总大小仍超过上限时从最久未使用的开始淘汰"""
+        self._conn.execute("DELETE FROM pages WHERE fetched_at < ?", (time.time() - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM pages ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+            total -= size
+        self._conn.execute("DELETE FROM page_urls WHERE key NOT IN (SELECT key FROM pages)")
+
+    def prune(self) -> None:
+        """立即执行一次过期与容量淘汰"""
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("DELETE FROM page_urls")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计信息"""
+        with self._lock:
+            pages, raw, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        return {'pages': pages, 'raw_bytes': raw, 'stored_bytes': stored,
+                'hits': self.hits, 'misses': self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文章页面缓存维护工具')
+    parser.add_argument('command', choices=['stats', 'prune', 'clear'],
+                        help='stats: 统计信息; prune: 清理过期/超出容量的页面; clear: 清空缓存')
+    parser.add_argument('--db', default='./articles/.wefetch/page_cache.db', help='缓存数据库路径')
+    parser.add_argument('--ttl-days', type=float, default=DEFAULT_TTL_DAYS, help='有效期（天）')
+    parser.add_argument('--max-mb', type=float, default=DEFAULT_MAX_MB, help='容量上限（MB）')
+    args = parser.parse_args()
+
+    cache = ArticlePageCache(args.db, args.ttl_days, args.max_mb)
+    if args.command == 'prune':
+        cache.prune()
+    elif args.command == 'clear':
+        cache.clear()
+    stats = cache.stats()
+    ratio = stats['stored_bytes'] / stats['raw_bytes'] if stats['raw_bytes'] else 0
+    print(f"页面: {stats['pages']} 篇, 原文 {stats['raw_bytes'] / 1024 / 1024:.2f} MB, "
+          f"压缩后 {stats['stored_bytes'] / 1024 / 1024:.2f} MB ({ratio:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+流式导出流水线
+
+列表翻页 -> 文章抓取 -> 图片下载 -> 转换 -> 写盘 五个阶段各自在线程中运行，
+阶段之间用有界队列连接：第一页列出后立即开始下载，下游处理不过来时上游在
+put() 上阻塞（背压），同时驻留内存的文章数只取决于队列长度，与公众号文章总数无关。
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, Optional
+
+from core.article_meta import ArticleRecord
+from core.converter import render_job
+from core.log import get_logger
+from core.pacing import PACE_ARTICLE, PACE_FAILURE
+from core.scheduler import RequestCancelled
+from core.tracing import SPAN_CONVERT
+
+# 阶段结束标记
+_STOP = object()
+
+log = get_logger('pipeline')
+
+
+class ExportPipeline:
+    """分阶段流水线导出
+
+    articles 可以是生成器（例如边翻页边产出的文章列表），每项需包含 link (可选 title)。
+    on_result(article, filepath, error) 在写盘线程中按完成顺序调用。
+    should_stop() 返回True时停止列出和抓取新文章，已抓取的文章继续处理完。
+    """
+
+    def __init__(self, downloader, output_dir: str, format_type: str = 'markdown',
+                 fetch_workers: int = 1, image_workers: int = 1, queue_size: int = 4,
+                 on_result: Optional[Callable] = None,
+                 should_stop: Optional[Callable[[], bool]] = None):
+        self.downloader = downloader
+        self.output_dir = output_dir
+        self.format_type = format_type
+        self.fetch_workers = max(1, fetch_workers)
+        self.image_workers = max(1, image_workers)
+        self.queue_size = max(1, queue_size)
+        self.on_result = on_result
+        self.should_stop = should_stop or (lambda: False)
+        self.stats = {'listed': 0, 'success': 0, 'failed': 0, 'processed': 0, 'stopped': False}
+        self._stats_lock = threading.Lock()
+        # 文章开始抓取的时间，写盘后计入单篇耗时指标
+        self._started: Dict[int, float] = {}
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _stopping(self) -> bool:
+        if self.should_stop():
+            self.stats['stopped'] = True
+            return True
+        return False
+
+    def _list(self, articles: Iterable[Dict], out_q: queue.Queue) -> None:
+        """列表阶段：逐篇放入抓取队列，队列满时翻页自然暂停"""
+        try:
+            for article in articles:
+                if self._stopping():
+                    break
+                out_q.put((article, None))
+                self._count('listed')
+        except Exception as e:
+            log.error("获取文章列表失败: %s", e)
+        finally:
+            for _ in range(self.fetch_workers):
+                out_q.put(_STOP)
+
+    def _fetch(self, article: Dict, _) -> Optional[ArticleRecord]:
+        """抓取阶段：下载并解析文章页面，之后按节奏策略等待"""
+        if self._stopping():
+            return None
+        pacing = self.downloader.pacing
+        started = time.perf_counter()
+        with self._stats_lock:
+            self._started[id(article)] = started
+        try:
+            article_data = self.downloader.get_article_content(article['link'])
+        except RequestCancelled:
+            self.stats['stopped'] = True
+            return None
+        except Exception:
+            pacing.pause(PACE_FAILURE, self._stopping)
+            raise
+        pacing.observe(PACE_ARTICLE, time.perf_counter() - started)
+        if not article_data.from_cache:
+            pacing.pause(PACE_ARTICLE, self._stopping)
+        return article_data
+
+    def _localize_images(self, article: Dict, article_data: ArticleRecord) -> Dict:
+        """图片阶段：本地化图片并打包转换任务，之后只保留正文HTML，解析树随即释放"""
+        return self.downloader.build_conversion_job(article_data, self.output_dir, self.format_type)
+
+    def _convert(self, article: Dict, job: Dict):
+        """转换阶段：有转换进程池时只提交任务，由写盘阶段等待结果"""
+        pool = self.downloader.convert_pool
+        if pool:
+            return pool.submit(job)
+        with self.downloader.tracer.span(SPAN_CONVERT):
+            return render_job(job)
+
+    def _write(self, in_q: queue.Queue) -> None:
+        """写盘阶段：单线程按顺序写入文件并回报结果"""
+        while True:
+            item = in_q.get()
+            if item is _STOP:
+                break
+            article, result = item
+            filepath, error = None, None
+            with self._stats_lock:
+                started = self._started.pop(id(article), None)
+            try:
+                if isinstance(result, Exception):
+                    raise result
+                with self.downloader.tracer.article(article.get('link')):
+                    if isinstance(result, Future):
+                        # 等待转换进程的结果
+                        with self.downloader.tracer.span(SPAN_CONVERT, pool=True):
+                            result = result.result()
+                    content, clean_title = result
+                    filepath = self.downloader.write_article(content, clean_title, self.output_dir,
+                                                             self.format_type)
+                self._count('success')
+            except Exception as e:
+                error = e
+                self._count('failed')
+                log.warning("下载文章失败: %s, 错误: %s", article.get('title', ''), e, link=article.get('link'))
+            self._count('processed')
+            self.downloader.metrics.observe_article(
+                error is None, time.perf_counter() - started if started is not None else None)
+            if self.on_result:
+                self.on_result(article, filepath, error)
+
+    def _stage(self, handler: Callable, in_q: queue.Queue, out_q: queue.Queue,
+               workers: int, downstream_workers: int) -> list:
+        """启动一个阶段的工作线程；最后一个退出的线程向下游发送结束标记"""
+        remaining = [workers]
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                item = in_q.get()
+                if item is _STOP:
+                    break
+                article, payload = item
+                if isinstance(payload, Exception):
+                    # 上游失败的文章直接交给写盘阶段记录
+                    out_q.put(item)
+                    continue
+                try:
+                    with self.downloader.tracer.article(article.get('link')):
+                        result = handler(article, payload)
+                except Exception as e:
+                    result = e
+                if result is not None:
+                    out_q.put((article, result))
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                for _ in range(downstream_workers):
+                    out_q.put(_STOP)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def run(self, articles: Iterable[Dict]) -> Dict:
+        """运行流水线直到所有文章处理完毕，返回统计信息"""
+        fetch_q = queue.Queue(self.queue_size)
+        image_q = queue.Queue(self.queue_size)
+        convert_q = queue.Queue(self.queue_size)
+        write_q = queue.Queue(self.queue_size)
+
+        threads = [threading.Thread(target=self._list, args=(articles, fetch_q), daemon=True)]
+        threads += self._stage(self._fetch, fetch_q, image_q, self.fetch_workers, self.image_workers)
+        threads += self._stage(self._localize_images, image_q, convert_q, self.image_workers, 1)
+        threads += self._stage(self._convert, convert_q, write_q, 1, 1)
+        threads.append(threading.Thread(target=self._write, args=(write_q,), daemon=True))
+        queues = {'fetch': fetch_q, 'image': image_q, 'convert': convert_q, 'write': write_q}
+        metrics = self.downloader.metrics
+        for name, q in queues.items():
+            metrics.watch_queue(name, q.qsize)
+        threads[0].start()
+        threads[-1].start()
+        for thread in threads:
+            thread.join()
+        for name in queues:
+            metrics.unwatch_queue(name)
+        return self.stats
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+请求调度器
+
+搜索、文章列表、文章页面三类请求共用一个令牌桶限速；微信返回频率限制
+(base_resp.ret == 200013) 时，按接口分别做带抖动的指数退避，退避期间同一接口的
+请求都会等待，失败的那一页由调用方重新请求而不是跳过。
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+from core.tracing import SPAN_SLEEP
+
+ENDPOINT_SEARCH = 'search'
+ENDPOINT_LIST = 'list'
+ENDPOINT_ARTICLE = 'article'
+
+# base_resp.ret 分类
+RET_OK = 0
+THROTTLE_RETS = (200013,)          # 操作频繁/频率限制
+SESSION_RETS = (200003,)           # 登录态失效，需要重新登录
+RET_KIND_OK = 'ok'
+RET_KIND_THROTTLE = 'throttle'
+RET_KIND_SESSION = 'session'
+RET_KIND_ERROR = 'error'
+
+
+def classify_ret(ret: Optional[int]) -> str:
+    """把微信接口的 base_resp.ret 归类"""
+    if ret == RET_OK:
+        return RET_KIND_OK
+    if ret in THROTTLE_RETS:
+        return RET_KIND_THROTTLE
+    if ret in SESSION_RETS:
+        return RET_KIND_SESSION
+    return RET_KIND_ERROR
+
+
+class RequestCancelled(Exception):
+    """调度器被取消（例如用户点击停止导出）"""
+
+
+class TokenBucket:
+    """线程安全的令牌桶"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def configure(self, rate: float, capacity: float) -> None:
+        """调整速率和容量，已有令牌不超过新容量"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            self.capacity = max(1.0, capacity)
+            self._tokens = min(self._tokens, self.capacity)
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """预占令牌，返回需要等待的秒数（令牌可以透支，等待结束时恰好补足）"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= tokens
+            if self._tokens >= 0 or self.rate <= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class RequestScheduler:
+    """搜索/列表/文章请求共用的调度器"""
+
+    def __init__(self, rate: float = 2.0, burst: float = 4.0, base_backoff: float = 60.0,
+                 max_backoff: float = 3600.0, jitter: float = 0.2):
+        self.bucket = TokenBucket(rate, burst)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        # endpoint -> 连续触发频率限制次数 / 退避结束时间
+        self._strikes: Dict[str, int] = {}
+        self._blocked_until: Dict[str, float] = {}
+        # 分阶段计时（core.tracing.Tracer），由下载器设置，退避和限速等待记为 sleep 跨度
+        self.tracer = None
+        # 运行指标（core.metrics.CrawlMetrics），由下载器设置，记录频率限制次数与退避时间
+        self.metrics = None
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'RequestScheduler':
+        return cls(rate=float(config.get('request_rate', 2.0)),
+                   burst=float(config.get('request_burst', 4.0)),
+                   base_backoff=float(config.get('throttle_backoff', 60.0)),
+                   max_backoff=float(config.get('throttle_max_backoff', 3600.0)))
+
+    def configure(self, rate: Optional[float] = None, burst: Optional[float] = None,
+                  base_backoff: Optional[float] = None, max_backoff: Optional[float] = None) -> None:
+        """就地调整限速和退避参数，保留下载器设置的 tracer/metrics"""
+        if rate is not None or burst is not None:
+            self.bucket.configure(self.bucket.rate if rate is None else rate,
+                                  self.bucket.capacity if burst is None else burst)
+        with self._lock:
+            if base_backoff is not None:
+                self.base_backoff = base_backoff
+            if max_backoff is not None:
+                self.max_backoff = max_backoff
+
+    def cancel(self) -> None:
+        """取消所有等待中的请求"""
+        self._cancel.set()
+
+    def reset(self) -> None:
+        """清除取消状态，开始新的任务前调用"""
+        self._cancel.clear()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def wait(self, seconds: float) -> None:
+        """可被 cancel() 打断的等待"""
+        if seconds > 0 and self._cancel.wait(seconds):
+            raise RequestCancelled("请求已取消")
+        if self._cancel.is_set():
+            raise RequestCancelled("请求已取消")
+
+    def acquire(self, endpoint: str) -> None:
+        """发请求前调用：等待该接口的退避结束并取得令牌"""
+        with self._lock:
+            blocked = self._blocked_until.get(endpoint, 0.0) - time.monotonic()
+        self.wait(max(0.0, blocked))
+        delay = self.bucket.reserve()
+        self.wait(delay)
+        if self.tracer is not None:
+            self.tracer.record(SPAN_SLEEP, max(0.0, blocked), kind='backoff', endpoint=endpoint)
+            self.tracer.record(SPAN_SLEEP, delay, kind='rate_limit', endpoint=endpoint)
+
+    def report_success(self, endpoint: str) -> None:
+        with self._lock:
+            self._strikes.pop(endpoint, None)
+
+    def report_throttle(self, endpoint: str) -> float:
+        """接口触发频率限制，返回本次退避秒数"""
+        with self._lock:
+            strikes = self._strikes.get(endpoint, 0)
+            self._strikes[endpoint] = strikes + 1
+            delay = min(self.max_backoff, self.base_backoff * (2 ** strikes))
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+            self._blocked_until[endpoint] = time.monotonic() + delay
+        if self.metrics is not None:
+            self.metrics.observe_throttle(endpoint, delay)
+        return delay
+
+    def extend_backoff(self, endpoint: str, delay: float) -> None:
+        """由外部决定的退避（例如 crawler 任务队列的全局暂停）：该接口至少等待 delay 秒
+
+        频率限制已由 report_throttle 计数，这里只把延长的时间计入退避指标。
+        """
+        with self._lock:
+            now = time.monotonic()
+            current = self._blocked_until.get(endpoint, 0.0)
+            extra = now + delay - max(now, current)
+            if extra <= 0:
+                return
+            self._blocked_until[endpoint] = now + delay
+        if self.metrics is not None:
+            self.metrics.observe_backoff(endpoint, extra)
+
+    def strikes(self, endpoint: str) -> int:
+        with self._lock:
+            return self._strikes.get(endpoint, 0)
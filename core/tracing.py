@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+下载过程分阶段计时
+
+把导出过程拆成几类跨度 (span)：list_page 翻页、fetch_article 请求文章页面、parse 解析、
+images 下载图片、convert 转换、write 写文件、sleep 节奏等待/限速/退避。每个跨度记录
+开始时间、耗时、线程、所属文章链接和字节数。跨度可以嵌套（例如转换HTML时下载图片），
+汇总时按扣除子跨度后的自身耗时统计，各类耗时相加就是实际花掉的时间。
+
+导出结束时 summary_table() 列出各类跨度的次数、总耗时、平均/最大耗时和字节数。配置项
+trace_file 指定时，每个跨度结束即追加一行 JSON（Chrome Trace Event 格式的完整事件），
+可以用下面的命令转换成 chrome://tracing、Perfetto 或 speedscope 能打开的时间线文件。
+
+用法:
+    python -m core.tracing summary trace.jsonl
+    python -m core.tracing chrome trace.jsonl -o trace.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+SPAN_LIST_PAGE = 'list_page'
+SPAN_FETCH_ARTICLE = 'fetch_article'
+SPAN_PARSE = 'parse'
+SPAN_IMAGES = 'images'
+SPAN_CONVERT = 'convert'
+SPAN_WRITE = 'write'
+SPAN_SLEEP = 'sleep'
+
+SPAN_ORDER = (SPAN_LIST_PAGE, SPAN_FETCH_ARTICLE, SPAN_PARSE, SPAN_IMAGES, SPAN_CONVERT, SPAN_WRITE,
+              SPAN_SLEEP)
+
+
+class Span:
+    """进行中的跨度，set() 可以在结束前补充字节数等字段"""
+
+    __slots__ = ('name', 'fields', 'child_seconds')
+
+    def __init__(self, name: str, fields: Dict):
+        self.name = name
+        self.fields = fields
+        self.child_seconds = 0.0
+
+    def set(self, **fields) -> None:
+        self.fields.update(fields)
+
+
+class Tracer:
+    """跨度记录器：内存中按类别汇总，可选逐条写入 JSONL 文件"""
+
+    def __init__(self, trace_file: Optional[str] = None):
+        self.trace_file = trace_file
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._file = None
+        # perf_counter 与墙钟时间的对应关系，事件时间戳使用墙钟时间，多次运行写入同一文件时不重叠
+        self._wall_offset = time.time() - time.perf_counter()
+        self.reset()
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'Tracer':
+        return cls(config.get('trace_file'))
+
+    def reset(self) -> None:
+        """清空汇总，每次导出开始时调用"""
+        with self._lock:
+            # 类别 -> [次数, 自身耗时, 最长耗时, 字节数]
+            self._totals: Dict[str, List[float]] = {}
+            # 等待按原因细分：article/list/retry/failure（节奏策略）、rate_limit（限速）、backoff（退避）
+            self._sleep_kinds: Dict[str, float] = {}
+            self.started = time.perf_counter()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def article(self, link: Optional[str]) -> Iterator[None]:
+        """之后在当前线程中开始的跨度都归属这篇文章"""
+        previous = getattr(self._local, 'link', None)
+        self._local.link = link
+        try:
+            yield
+        finally:
+            self._local.link = previous
+
+    @contextlib.contextmanager
+    def span(self, name: str, **fields) -> Iterator[Span]:
+        """计时一个跨度"""
+        span = Span(name, fields)
+        stack = self._stack()
+        stack.append(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        finally:
+            duration = time.perf_counter() - started
+            stack.pop()
+            if stack:
+                stack[-1].child_seconds += duration
+            self._finish(name, started, duration, duration - span.child_seconds, span.fields)
+
+    def record(self, name: str, seconds: float, **fields) -> None:
+        """记录一个已经测得耗时、刚刚结束的跨度（例如睡眠）"""
+        if seconds <= 0:
+            return
+        stack = self._stack()
+        if stack:
+            stack[-1].child_seconds += seconds
+        self._finish(name, time.perf_counter() - seconds, seconds, seconds, fields)
+
+    def _finish(self, name: str, started: float, duration: float, self_seconds: float, fields: Dict) -> None:
+        fields.setdefault('link', getattr(self._local, 'link', None))
+        size = fields.get('bytes') or 0
+        with self._lock:
+            totals = self._totals.setdefault(name, [0, 0.0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += self_seconds
+            totals[2] = max(totals[2], duration)
+            totals[3] += size
+            if name == SPAN_SLEEP:
+                kind = fields.get('kind') or '-'
+                self._sleep_kinds[kind] = self._sleep_kinds.get(kind, 0.0) + self_seconds
+            if self.trace_file:
+                self._write_event(name, started, duration, self_seconds, fields)
+
+    def _write_event(self, name: str, started: float, duration: float, self_seconds: float,
+                     fields: Dict) -> None:
+        if self._file is None:
+            directory = os.path.dirname(os.path.abspath(self.trace_file))
+            os.makedirs(directory, exist_ok=True)
+            self._file = open(self.trace_file, 'a', encoding='utf-8')
+        args = {key: value for key, value in fields.items() if value is not None}
+        args['self_ms'] = round(self_seconds * 1000, 3)
+        event = {'name': name, 'cat': name, 'ph': 'X',
+                 'ts': round((started + self._wall_offset) * 1e6),
+                 'dur': round(duration * 1e6),
+                 'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args}
+        self._file.write(json.dumps(event, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def summary(self) -> Dict:
+        """{类别: {count, seconds, mean_ms, max_ms, bytes}}，seconds 为自身耗时"""
+        with self._lock:
+            totals = {name: list(values) for name, values in self._totals.items()}
+            sleep_kinds = dict(self._sleep_kinds)
+        return summarize(totals, sleep_kinds, time.perf_counter() - self.started)
+
+    def summary_table(self) -> str:
+        return format_summary(self.summary())
+
+
+def summarize(totals: Dict[str, List[float]], sleep_kinds: Dict[str, float], wall_seconds: float) -> Dict:
+    names = [name for name in SPAN_ORDER if name in totals] + sorted(set(totals) - set(SPAN_ORDER))
+    spans = {}
+    for name in names:
+        count, seconds, longest, size = totals[name]
+        spans[name] = {'count': int(count), 'seconds': round(seconds, 3),
+                       'mean_ms': round(seconds * 1000 / count, 2) if count else 0.0,
+                       'max_ms': round(longest * 1000, 2), 'bytes': int(size)}
+    return {'wall_seconds': round(wall_seconds, 3), 'spans': spans,
+            'sleep_by_kind': {kind: round(seconds, 3) for kind, seconds in
+                              sorted(sleep_kinds.items(), key=lambda item: item[1], reverse=True)}}
+
+
+def format_bytes(size: int) -> str:
+    if not size:
+        return '-'
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+def format_summary(summary: Dict) -> str:
+    """各类跨度的耗时汇总表（多线程并行时各类耗时之和可以超过总耗时）"""
+    spans = summary['spans']
+    if not spans:
+        return "分阶段耗时: 没有记录"
+    traced = sum(span['seconds'] for span in spans.values())
+    lines = [f"分阶段耗时 (总耗时 {summary['wall_seconds']:.1f} 秒):",
+             f"  {'阶段':14s} {'次数':>6s} {'耗时(秒)':>10s} {'占比':>6s} {'平均(ms)':>10s} {'最长(ms)':>10s} {'数据量':>10s}"]
+    for name, span in spans.items():
+        share = span['seconds'] / traced if traced else 0
+        lines.append(f"  {name:14s} {span['count']:6d} {span['seconds']:10.2f} {share:6.0%} "
+                     f"{span['mean_ms']:10.1f} {span['max_ms']:10.1f} {format_bytes(span['bytes']):>10s}")
+    if summary.get('sleep_by_kind'):
+        lines.append("  等待细分: " + ', '.join(f"{kind} {seconds:.1f} 秒"
+                                             for kind, seconds in summary['sleep_by_kind'].items()))
+    return '\n'.join(lines)
+
+
+def read_trace(path: str) -> List[Dict]:
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                events.append(json.loads(line))
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分阶段计时记录 (trace_file) 工具')
+    parser.add_argument('command', choices=['summary', 'chrome'])
+    parser.add_argument('trace', help='JSONL 计时记录文件')
+    parser.add_argument('-o', '--output', help='chrome: 输出的时间线 JSON 文件 (默认: 记录文件名.json)')
+    args = parser.parse_args()
+
+    events = read_trace(args.trace)
+    if args.command == 'summary':
+        totals, sleep_kinds = {}, {}
+        for event in events:
+            self_seconds = event['args'].get('self_ms', event['dur'] / 1000) / 1000
+            values = totals.setdefault(event['name'], [0, 0.0, 0.0, 0])
+            values[0] += 1
+            values[1] += self_seconds
+            values[2] = max(values[2], event['dur'] / 1e6)
+            values[3] += event['args'].get('bytes') or 0
+            if event['name'] == SPAN_SLEEP:
+                kind = event['args'].get('kind') or '-'
+                sleep_kinds[kind] = sleep_kinds.get(kind, 0.0) + self_seconds
+        wall = (max(e['ts'] + e['dur'] for e in events) - min(e['ts'] for e in events)) / 1e6 if events else 0
+        print(format_summary(summarize(totals, sleep_kinds, wall)))
+        return
+
+    output = args.output or os.path.splitext(args.trace)[0] + '.json'
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    print(f"已写入 {len(events)} 个事件到 {output}")
+
+
+if __name__ == "__main__":
+    main()
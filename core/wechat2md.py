@@ -1,4 +1,5 @@
 import os
+import sys
 import requests
 import markdownify
 from bs4 import BeautifulSoup
@@ -9,7 +10,6 @@ import time
 import json
 import csv
 import argparse
-import random
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict
 from pathlib import Path
@@ -38,6 +38,7 @@ class WeChatArticleDownloader:
 
     def __init__(self, config_path: Optional[str] = None):
         self.config_path = config_path or self.CONFIG_FILE
+        self.pacing_options = {}
         self.filter_config = self._load_config()
 
     def _load_config(self) -> ContentFilterConfig:
@@ -46,6 +47,7 @@ class WeChatArticleDownloader:
             if Path(self.config_path).exists():
                 with open(self.config_path, 'r', encoding='utf-8') as f:
                     config_data = json.load(f)
+                    self.pacing_options = config_data.get('pacing', {})
                     return ContentFilterConfig(
                         paragraph_keywords=config_data.get('paragraph_keywords', []),
                         image_hashes=config_data.get('image_hashes', []),
@@ -63,7 +65,8 @@ class WeChatArticleDownloader:
                     'paragraph_keywords': self.filter_config.paragraph_keywords,
                     'image_hashes': self.filter_config.image_hashes,
                     'skip_ads': self.filter_config.skip_ads,
-                    'skip_promotions': self.filter_config.skip_promotions
+                    'skip_promotions': self.filter_config.skip_promotions,
+                    'pacing': self.pacing_options
                 }, f, indent=2, ensure_ascii=False)
         except Exception as e:
             print(f"保存配置文件失败: {str(e)}")
@@ -115,12 +118,14 @@ class WeChatArticleDownloader:
 
     def download_images(self, soup: BeautifulSoup, account_dir: str) -> None:
         """下载文章中的所有图片并保存到本地"""
+        from core.atomic_io import atomic_write
+
         # 创建images目录（与markdown文件同级）
         image_folder = os.path.join(account_dir, 'images')
         os.makedirs(image_folder, exist_ok=True)
         for img in soup.find_all('img'):
             img_link = img.get('data-src') or img.get('src')
-            if not img_link:
+            if not img_link or img_link.startswith('./images/'):
                 continue
             img_link = img_link.replace(' ', '%20')
 
@@ -139,8 +144,7 @@ class WeChatArticleDownloader:
                     filepath = os.path.join(image_folder, filename)
 
                     if not os.path.exists(filepath):
-                        with open(filepath, 'wb') as f:
-                            f.write(file_content)
+                        atomic_write(filepath, file_content)
                     # 更新图片属性指向本地文件（使用相对路径 ./images/）
                     relative_path = f"./images/{filename}"
                     img['data-src'] = relative_path
@@ -153,11 +157,6 @@ class WeChatArticleDownloader:
         """将HTML内容转换为Markdown格式"""
         self.download_images(content_soup, account_dir)
         markdown_content = markdownify.markdownify(str(content_soup))
-        # 处理图片路径（确保使用相对路径）
-        markdown_soup = BeautifulSoup(markdown_content, 'html.parser')
-        for img in markdown_soup.find_all('img'):
-            if img.get('data-src') and not img['data-src'].startswith(('http://', 'https://')):
-                img['src'] = img['data-src']
         markdown_content = '\n'.join([line + '\n' for line in markdown_content.split('\n') if line.strip()])
         clean_title = self.remove_nonvisible_chars(title)
 
@@ -170,7 +169,9 @@ class WeChatArticleDownloader:
         return self.filter_content(markdown), clean_title
 
     def get_title_with_retry(self, url: str, max_retries: int = 3) -> tuple:
-        """获取文章标题，带有重试机制"""
+        """获取文章标题，带有重试机制，返回 (标题, 解析树, 页面元数据)"""
+        from core.article_meta import scan_article_meta
+
         retries = 0
         while retries < max_retries:
             try:
@@ -182,7 +183,9 @@ class WeChatArticleDownloader:
                 response = requests.get(url, headers=headers, timeout=10)
                 response.raise_for_status()
 
-                soup = BeautifulSoup(response.text, 'lxml')
+                html = response.text
+                meta = scan_article_meta(html)
+                soup = BeautifulSoup(html, 'lxml')
                 title_element = soup.find('h1', id="activity-name")
                 if not title_element:
                     # 尝试其他可能的标题位置
@@ -192,7 +195,7 @@ class WeChatArticleDownloader:
                 if title_element:
                     title = title_element.text.strip()
                     if title:  # 确保标题不为空
-                        return title, soup
+                        return title, soup, meta
 
                 raise AttributeError("Title element not found")
 
@@ -205,7 +208,7 @@ class WeChatArticleDownloader:
                 else:
                     print(
                         f"Failed to retrieve title for URL {url} after {max_retries} retries. Last error: {error_msg}")
-                    return None, None
+                    return None, None, None
 
     def process_url(self, url_data: Dict, output_base: str) -> bool:
         """处理单个URL数据"""
@@ -215,17 +218,22 @@ class WeChatArticleDownloader:
         # 创建公众号专属目录
         account_dir = os.path.join(output_base, account_name)
         os.makedirs(account_dir, exist_ok=True)
-        title, soup = self.get_title_with_retry(url)
+        title, soup, meta = self.get_title_with_retry(url)
         if not title or not soup:
             return False
+        content_soup = soup.find('div', {'class': 'rich_media_content'})
+        return self.save_markdown(url_data, account_dir, url, title, content_soup,
+                                  meta.get('create_time', ''))
+
+    def save_markdown(self, url_data: Dict, account_dir: str, url: str, title: str,
+                      content_soup: Optional[BeautifulSoup], page_time: str = '') -> bool:
+        """将文章正文转换为Markdown并写入公众号目录"""
+        from core.atomic_io import atomic_write
+
+        account_name = url_data.get('account', 'unknown_account') or 'unknown_account'
         # 使用CSV中的日期或从网页提取
-        create_time = url_data.get('date', '')
-        if not create_time:
-            match = re.search(r'createTime\s+=\s+\'(.*)\'', str(soup))
-            if match:
-                create_time = match.group(1)
+        create_time = url_data.get('date', '') or page_time
         create_time = f"publish_time: {create_time}" if create_time else "publish_time: unknown"
-        content_soup = soup.find('div', {'class': 'rich_media_content'})
         if not content_soup:
             return False
         markdown, clean_title = self.convert_to_markdown(
@@ -236,13 +244,46 @@ class WeChatArticleDownloader:
         filename = re.sub(r'[\\/*?:"<>|]', '', filename)
         filepath = os.path.join(account_dir, f"{filename}.md")
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(markdown)
+        atomic_write(filepath, markdown)
 
         print(f'Processed: {account_name} - {filename}.md')
         return True
 
-    def run(self, csv_path: str, output_dir: str = "./articles", url_column: str = "链接"):
+    def run_async(self, urls_data: List[Dict], output_dir: str, concurrency: int) -> int:
+        """使用核心异步引擎并发抓取文章页面和图片，返回成功数量"""
+        import asyncio
+        from core.async_downloader import AsyncWeChatArticleDownloader
+
+        async_downloader = AsyncWeChatArticleDownloader({'page_concurrency': concurrency})
+        async_downloader.filter_config = self.filter_config
+
+        async def process(url_data: Dict) -> bool:
+            url = url_data['url']
+            account_name = url_data.get('account', 'unknown_account') or 'unknown_account'
+            account_dir = os.path.join(output_dir, account_name)
+            os.makedirs(account_dir, exist_ok=True)
+            try:
+                article_data = await async_downloader.get_article_content(url)
+            except Exception as e:
+                print(f"Failed to retrieve URL {url}: {e}")
+                return False
+            # 先并发下载图片，转换时 download_images 会跳过已本地化的图片
+            await async_downloader.fetch_images(article_data.content_soup, account_dir)
+            return await asyncio.to_thread(self.save_markdown, url_data, account_dir, url,
+                                           article_data.title, article_data.content_soup,
+                                           article_data.create_time)
+
+        async def run_all() -> int:
+            try:
+                results = await asyncio.gather(*(process(url_data) for url_data in urls_data))
+                return sum(1 for ok in results if ok)
+            finally:
+                await async_downloader.close()
+
+        return asyncio.run(run_all())
+
+    def run(self, csv_path: str, output_dir: str = "./articles", url_column: str = "链接",
+            concurrency: int = 1):
         """运行下载器"""
         urls_data = self.load_urls_from_csv(csv_path, url_column)
         if not urls_data:
@@ -250,16 +291,27 @@ class WeChatArticleDownloader:
             return
         os.makedirs(output_dir, exist_ok=True)
 
+        if concurrency > 1:
+            success_count = self.run_async(urls_data, output_dir, concurrency)
+            print(f"\n处理完成: 共{len(urls_data)}条, 成功{success_count}条")
+            return
+
+        from core.pacing import create_pacing, PACE_ARTICLE
+
+        # 默认每篇随机等待3-8秒，可在配置文件的 pacing 项中更换策略
+        pacing = create_pacing(self.pacing_options, {PACE_ARTICLE: (3, 8)})
         success_count = 0
         for url_data in urls_data:
+            started = time.perf_counter()
             if self.process_url(url_data, output_dir):
                 success_count += 1
-            # 随机延迟3-8秒，避免过于频繁请求
-            delay = random.uniform(3, 8)
+            pacing.observe(PACE_ARTICLE, time.perf_counter() - started)
+            delay = pacing.next_delay(PACE_ARTICLE)
             print(f"等待 {delay:.2f} 秒后继续...")
-            time.sleep(delay)
+            pacing.sleep(delay, PACE_ARTICLE)
 
         print(f"\n处理完成: 共{len(urls_data)}条, 成功{success_count}条")
+        print(pacing.metrics.summary())
 
 
 def main():
@@ -270,9 +322,18 @@ def main():
     parser.add_argument('-c', '--column', default='链接',
                         help='CSV中包含URL的列名 (默认: 链接)')
     parser.add_argument('--config', help='自定义配置文件路径')
+    parser.add_argument('-j', '--concurrency', type=int, default=1,
+                        help='并发抓取的文章数，大于1时使用异步引擎 (默认: 1)')
 
     args = parser.parse_args()
 
+    # 异步引擎和日志位于 core 包中，需要项目根目录在Python路径上
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from core.log import configure_logging
+    configure_logging()
+
     # 初始化下载器
     downloader = WeChatArticleDownloader(args.config)
 
@@ -280,7 +341,8 @@ def main():
     downloader.run(
         csv_path=args.csv_file,
         output_dir=args.output,
-        url_column=args.column
+        url_column=args.column,
+        concurrency=args.concurrency
     )
 
 
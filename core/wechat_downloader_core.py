@@ -6,20 +6,33 @@
 """
 
 import requests
-import markdownify
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import re
-import unicodedata
 import hashlib
 import time
-import json
-import csv
-import random
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict
-from pathlib import Path
+from requests.adapters import HTTPAdapter
 import os
 
+from core.image_cache import ImageUrlCache
+from core.image_store import ImageStore
+from core.page_cache import ArticlePageCache
+from core.article_id import ArticleIndex
+from core.atomic_io import atomic_write
+from core.log import get_logger
+from core.metrics import get_metrics, ENDPOINT_IMAGE
+from core.pacing import create_pacing, PACE_RETRY
+from core.tracing import (Tracer, SPAN_CONVERT, SPAN_FETCH_ARTICLE, SPAN_IMAGES, SPAN_LIST_PAGE,
+                          SPAN_PARSE, SPAN_WRITE)
+from core.article_meta import ArticleRecord, scan_article_meta
+from core.converter import (ConversionPool, render_markdown, render_html, filter_content,
+                            filter_paragraphs, remove_nonvisible_chars, FORMAT_MARKDOWN)
+from core.scheduler import (RequestScheduler, RequestCancelled, classify_ret,
+                            ENDPOINT_SEARCH, ENDPOINT_LIST, ENDPOINT_ARTICLE,
+                            RET_KIND_OK, RET_KIND_THROTTLE, RET_KIND_SESSION)
+
 
 @dataclass
 class ContentFilterConfig:
@@ -30,6 +43,36 @@ class ContentFilterConfig:
     skip_promotions: bool = False
 
 
+# 文章列表每页数量候选值，从大到小探测
+PAGE_SIZE_CANDIDATES = (20, 10, 5)
+
+# 文章页面被限流时返回的验证页特征
+THROTTLE_PAGE_MARKERS = ('环境异常', 'wappoc_appmsgcaptcha')
+
+log = get_logger('downloader')
+
+DEFAULT_BASE_URL = 'https://mp.weixin.qq.com'
+
+# 常规文章页面只需要标题和正文两个元素，其余节点（脚本、评论、推荐阅读等）不建树
+ARTICLE_PARTS = SoupStrainer(id=['activity-name', 'js_content'])
+
+
+class WeChatAPIError(Exception):
+    """微信接口返回 base_resp.ret != 0"""
+
+    def __init__(self, message: str, ret: Optional[int] = None):
+        super().__init__(message)
+        self.ret = ret
+
+
+class RateLimitedError(WeChatAPIError):
+    """触发微信频率限制 (ret=200013 或文章验证页)"""
+
+
+class SessionExpiredError(WeChatAPIError):
+    """登录态失效，需要重新登录"""
+
+
 class WeChatArticleDownloader:
     """微信公众号文章下载器核心类"""
     
@@ -47,6 +90,60 @@ class WeChatArticleDownloader:
         
         if self.config.get('cookie'):
             self.session.headers["Cookie"] = self.config['cookie']
+        
+        # 公众号平台地址，离线基准/测试时指向本地替身服务器
+        self.base_url = self.config.get('base_url', DEFAULT_BASE_URL).rstrip('/')
+        
+        # 图片并发下载线程数，连接池大小与之匹配以复用keep-alive连接
+        self.image_workers = max(1, int(self.config.get('image_workers', 8)))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(10, self.image_workers))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # 最近一篇文章的图片下载统计
+        self.last_image_stats = {}
+        
+        # 文章列表每页数量，0 表示首次翻页时自动探测
+        self.page_size = int(self.config.get('page_size', 0))
+        self.last_list_total = None
+        
+        # 搜索/列表/文章请求共用的限速与退避调度器
+        self.scheduler = RequestScheduler.from_config(self.config)
+        self.max_throttle_retries = int(self.config.get('max_throttle_retries', 5))
+        
+        # 文章/翻页之间的等待节奏，统计等待与工作时间
+        self.pacing = create_pacing(self.config.get('pacing'))
+        
+        # 分阶段计时（翻页、请求、解析、图片、转换、写文件、等待），trace_file 指定时逐条写入
+        self.tracer = Tracer.from_config(self.config)
+        self.pacing.tracer = self.tracer
+        self.scheduler.tracer = self.tracer
+        
+        # 进程内共享的运行指标（请求、返回码、频率限制、字节数、文章数），
+        # metrics_port / metrics_file 指定时提供 /metrics 服务或定时写文件
+        self.metrics = get_metrics()
+        self.metrics.start_from_config(self.config)
+        self.scheduler.metrics = self.metrics
+        
+        # Markdown/HTML 渲染进程池（可选），convert_workers > 0 时启用
+        convert_workers = int(self.config.get('convert_workers', 0))
+        self.convert_pool = ConversionPool(convert_workers) if convert_workers > 0 else None
+        
+        # 全局图片仓库（可选），输出目录中的图片硬链接到仓库，跨公众号去重
+        self.image_store = ImageStore(self.config['image_store']) if self.config.get('image_store') else None
+        
+        # 图片URL缓存（可选），已下载过的图片不再请求；revalidate_images 时改用条件请求
+        self.image_cache = ImageUrlCache(self.config['image_cache']) if self.config.get('image_cache') else None
+        self.revalidate_images = bool(self.config.get('revalidate_images', False))
+        
+        # 文章页面原文缓存（可选），换格式重新导出时不再请求网络
+        self.page_cache = ArticlePageCache(
+            self.config['page_cache'],
+            float(self.config.get('page_cache_ttl_days', 30)),
+            float(self.config.get('page_cache_max_mb', 500))) if self.config.get('page_cache') else None
+        
+        # 已下载文章的去重索引（可选），下载页面后登记短链接指向的文章标识
+        self.article_index = ArticleIndex(self.config['article_index']) if self.config.get('article_index') else None
 
     @staticmethod
     def hash_byte_data(byte_data: bytes) -> str:
@@ -56,13 +153,40 @@ class WeChatArticleDownloader:
     @staticmethod
     def remove_nonvisible_chars(text: str) -> str:
         """移除不可见字符"""
-        return ''.join(c for c in text if (unicodedata.category(c) != 'Cn'
-                                           and c not in (' ', '\n', '\r')))
+        return remove_nonvisible_chars(text)
+
+    def check_base_resp(self, data: Dict, endpoint: str, default_msg: str) -> None:
+        """检查接口返回的 base_resp，按返回码抛出对应异常"""
+        base_resp = data.get('base_resp', {})
+        ret = base_resp.get('ret')
+        self.metrics.wechat_ret.inc(endpoint=endpoint, ret=ret)
+        kind = classify_ret(ret)
+        if kind == RET_KIND_OK:
+            self.scheduler.report_success(endpoint)
+            return
+        err_msg = base_resp.get('err_msg') or default_msg
+        if kind == RET_KIND_THROTTLE:
+            raise RateLimitedError(err_msg, ret)
+        if kind == RET_KIND_SESSION:
+            raise SessionExpiredError(err_msg, ret)
+        raise WeChatAPIError(err_msg, ret)
+
+    def http_get(self, endpoint: str, url: str, **kwargs) -> requests.Response:
+        """通过共享会话发GET请求，按接口记录请求数、状态码、耗时和响应字节数"""
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, **kwargs)
+        except requests.exceptions.RequestException:
+            self.metrics.observe_request(endpoint, 'error', time.perf_counter() - started)
+            raise
+        self.metrics.observe_request(endpoint, response.status_code, time.perf_counter() - started,
+                                     len(response.content))
+        return response
 
     def search_accounts(self, keyword: str, token: str) -> List[Dict]:
         """搜索公众号"""
         try:
-            url = "https://mp.weixin.qq.com/cgi-bin/searchbiz"
+            url = f"{self.base_url}/cgi-bin/searchbiz"
             params = {
                 "action": "search_biz",
                 "begin": 0,
@@ -75,26 +199,36 @@ class WeChatArticleDownloader:
                 "ajax": 1
             }
             
-            response = self.session.get(url, params=params, timeout=10)
+            self.scheduler.acquire(ENDPOINT_SEARCH)
+            response = self.http_get(ENDPOINT_SEARCH, url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
             
-            if data.get('base_resp', {}).get('ret') == 0:
-                return data.get('list', [])
-            else:
-                raise Exception(data.get('base_resp', {}).get('err_msg', '搜索失败'))
+            self.check_base_resp(data, ENDPOINT_SEARCH, '搜索失败')
+            return data.get('list', [])
                 
+        except RequestCancelled:
+            raise
+        except WeChatAPIError as e:
+            if isinstance(e, RateLimitedError):
+                self.scheduler.report_throttle(ENDPOINT_SEARCH)
+            raise type(e)(f"搜索公众号失败: {str(e)}", e.ret)
         except Exception as e:
             raise Exception(f"搜索公众号失败: {str(e)}")
 
-    def get_articles_list(self, fakeid: str, token: str, page: int = 1, count: int = 5) -> List[Dict]:
-        """获取文章列表"""
+    def get_articles_list(self, fakeid: str, token: str, page: int = 1, count: int = 5,
+                          begin: Optional[int] = None) -> List[Dict]:
+        """获取文章列表
+
+        begin 指定时按偏移量获取，否则按 (page - 1) * count 计算。
+        接口返回的文章总数记录在 self.last_list_total 中。
+        """
         try:
-            url = "https://mp.weixin.qq.com/cgi-bin/appmsg"
+            url = f"{self.base_url}/cgi-bin/appmsg"
             params = {
                 "action": "list_ex",
-                "begin": (page - 1) * count,
+                "begin": begin if begin is not None else (page - 1) * count,
                 "count": count,
                 "fakeid": fakeid,
                 "type": "9",
@@ -104,152 +238,379 @@ class WeChatArticleDownloader:
                 "ajax": 1
             }
             
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            self.scheduler.acquire(ENDPOINT_LIST)
+            with self.tracer.span(SPAN_LIST_PAGE, begin=params['begin']) as span:
+                response = self.http_get(ENDPOINT_LIST, url, params=params, timeout=10)
+                response.raise_for_status()
+                span.set(bytes=len(response.content))
+                
+                data = response.json()
             
-            if data.get('base_resp', {}).get('ret') == 0:
-                return data.get('app_msg_list', [])
-            else:
-                raise Exception(data.get('base_resp', {}).get('err_msg', '获取文章列表失败'))
+            self.check_base_resp(data, ENDPOINT_LIST, '获取文章列表失败')
+            if data.get('app_msg_cnt') is not None:
+                self.last_list_total = int(data['app_msg_cnt'])
+            return data.get('app_msg_list', [])
                 
+        except RequestCancelled:
+            raise
+        except WeChatAPIError as e:
+            raise type(e)(f"获取文章列表失败: {str(e)}", e.ret)
         except Exception as e:
             raise Exception(f"获取文章列表失败: {str(e)}")
 
-    def get_article_content(self, url: str, max_retries: int = 3) -> Dict:
-        """获取文章内容"""
-        retries = 0
-        while retries < max_retries:
+    def probe_page_size(self, fakeid: str, token: str) -> List[Dict]:
+        """探测接口接受的最大每页数量，返回探测时拿到的第一页文章"""
+        for count in PAGE_SIZE_CANDIDATES:
             try:
-                print(f"正在获取文章内容: {url}")
-                response = self.session.get(url, timeout=10)
-                response.raise_for_status()
+                articles = self.get_articles_list(fakeid, token, count=count, begin=0)
+            except WeChatAPIError as e:
+                # 频率限制、会话过期等子类不是页大小的问题，直接抛出
+                if count == PAGE_SIZE_CANDIDATES[-1] or type(e) is not WeChatAPIError:
+                    raise
+                log.info("每页%s篇被拒绝 (ret=%s)，尝试更小的页大小", count, e.ret)
+                continue
+            total = self.last_list_total
+            # 返回数量少于请求数量且不是因为文章总数不足，说明被截断
+            if (len(articles) < count and total is not None and len(articles) < total
+                    and count != PAGE_SIZE_CANDIDATES[-1]):
+                log.info("每页%s篇被截断为%s篇，尝试更小的页大小", count, len(articles))
+                continue
+            self.page_size = count
+            log.info("文章列表每页数量: %s", count)
+            return articles
+        return []
 
-                soup = BeautifulSoup(response.text, 'lxml')
-                title_element = soup.find('h1', id="activity-name")
-                
-                if not title_element:
-                    title_element = soup.find('h2', class_="rich_media_title") or \
-                                    soup.find('h1', class_="article-title")
+    def get_articles_page(self, fakeid: str, token: str, begin: int) -> List[Dict]:
+        """从 begin 偏移量获取一页文章
 
-                if not title_element:
-                    raise AttributeError("Title element not found")
+        页大小自动探测并在被拒绝/截断时回退；触发频率限制时按退避时间等待后
+        重新请求同一页，连续超过 max_throttle_retries 次才抛出 RateLimitedError。
+        """
+        throttled = 0
+        while True:
+            try:
+                if not self.page_size:
+                    articles = self.probe_page_size(fakeid, token)
+                    if begin == 0:
+                        return articles
+                articles = self.get_articles_list(fakeid, token, count=self.page_size, begin=begin)
+            except RateLimitedError:
+                throttled += 1
+                delay = self.scheduler.report_throttle(ENDPOINT_LIST)
+                if throttled > self.max_throttle_retries:
+                    raise
+                log.warning("触发微信频率限制，%.0f 秒后重新获取本页 (第%s次)", delay, throttled)
+                continue
+            except SessionExpiredError:
+                raise
+            except WeChatAPIError as e:
+                smaller = [c for c in PAGE_SIZE_CANDIDATES if c < self.page_size]
+                if not smaller:
+                    raise
+                log.info("每页%s篇被拒绝 (ret=%s)，回退到每页%s篇", self.page_size, e.ret, smaller[0])
+                self.page_size = smaller[0]
+                continue
+            total = self.last_list_total
+            if len(articles) < self.page_size and total is not None and begin + len(articles) < total:
+                fitting = [c for c in PAGE_SIZE_CANDIDATES if c <= max(len(articles), PAGE_SIZE_CANDIDATES[-1])]
+                log.info("每页%s篇被截断为%s篇，回退到每页%s篇", self.page_size, len(articles), fitting[0])
+                self.page_size = fitting[0]
+            return articles
 
-                title = title_element.text.strip()
-                
-                # 获取发布时间
-                create_time = ""
-                match = re.search(r'createTime\s+=\s*\'(.*)\'', str(soup))
-                if match:
-                    create_time = match.group(1)
-                
-                # 获取内容
-                content_soup = soup.find('div', {'class': 'rich_media_content'})
-                if not content_soup:
-                    content_soup = soup.find('div', {'id': 'js_content'})
-                
-                if not content_soup:
-                    raise Exception("无法找到文章内容")
+    def parse_article_html(self, html: str, url: str) -> ArticleRecord:
+        """解析文章页面HTML，提取标题、发布时间和正文
 
-                # 验证必要的数据
-                if not title:
-                    title = "未命名文章"
-                
-                # 确保content_soup不为None
-                if content_soup is None:
-                    raise Exception("文章内容解析失败")
+        元数据直接从响应原文中扫描；常规页面只为标题和正文建树，结构不同的页面才解析整页。
+        正文子树从解析树上摘下，其余节点随即释放，返回的记录只持有正文。
+        """
+        with self.tracer.span(SPAN_PARSE, link=url, chars=len(html)):
+            return self._parse_article_html(html, url)
 
-                # 验证数据完整性
-                if not title:
-                    title = "未命名文章"
-                
-                if not content_soup:
-                    raise Exception("文章内容解析失败：content_soup为空")
-                
-                # 确保content_soup是BeautifulSoup对象
-                if not hasattr(content_soup, 'find_all'):
-                    raise Exception(f"文章内容格式错误：content_soup不是BeautifulSoup对象，类型为{type(content_soup)}")
-                
-                # 检查content_soup的copy方法
-                if not hasattr(content_soup, 'copy'):
-                    print(f"警告：content_soup没有copy方法，类型: {type(content_soup)}")
-                    # 尝试重新创建
-                    content_soup = BeautifulSoup(str(content_soup), 'html.parser')
-                elif not callable(getattr(content_soup, 'copy')):
-                    print(f"警告：content_soup.copy不是可调用的，类型: {type(content_soup)}")
-                    content_soup = BeautifulSoup(str(content_soup), 'html.parser')
-                
-                result = {
-                    'title': title,
-                    'create_time': create_time,
-                    'content_soup': content_soup,
-                    'url': url,
-                    'full_soup': soup
-                }
-                
-                print(f"文章内容获取成功，标题: {title}")
-                print(f"content_soup类型: {type(content_soup)}, 是否有copy方法: {hasattr(content_soup, 'copy')}")
-                return result
+    def _parse_article_html(self, html: str, url: str) -> ArticleRecord:
+        meta = scan_article_meta(html)
+        soup = BeautifulSoup(html, 'lxml', parse_only=ARTICLE_PARTS)
+        title_element, content_soup = self.find_article_parts(soup)
+        if not title_element or not content_soup:
+            soup.decompose()
+            soup = BeautifulSoup(html, 'lxml')
+            title_element, content_soup = self.find_article_parts(soup)
 
+        if not title_element and not meta.get('msg_title'):
+            raise AttributeError("Title element not found")
+
+        title = title_element.text.strip() if title_element else meta['msg_title']
+        
+        if not content_soup:
+            raise Exception("无法找到文章内容")
+
+        # 验证必要的数据
+        if not title:
+            title = "未命名文章"
+        
+        # 摘下正文后拆除整页解析树：树中父子节点互相引用，不拆除要等到循环垃圾回收才能释放
+        content_soup.extract()
+        soup.decompose()
+        if self.article_index:
+            self.article_index.alias(url, meta.get('biz'), meta.get('mid'), meta.get('idx'))
+        return ArticleRecord.from_meta(title, url, content_soup, meta)
+
+    @staticmethod
+    def find_article_parts(soup: BeautifulSoup) -> tuple:
+        """在解析树中查找标题元素和正文元素"""
+        title_element = soup.find('h1', id="activity-name")
+        if not title_element:
+            title_element = soup.find('h2', class_="rich_media_title") or \
+                            soup.find('h1', class_="article-title")
+        
+        content_soup = soup.find('div', {'class': 'rich_media_content'})
+        if not content_soup:
+            content_soup = soup.find('div', {'id': 'js_content'})
+        return title_element, content_soup
+
+    def cached_article(self, url: str) -> Optional[ArticleRecord]:
+        """从页面缓存中解析文章，没有缓存时返回None"""
+        html = self.page_cache.get(url) if self.page_cache else None
+        if html is None:
+            return None
+        try:
+            result = self.parse_article_html(html, url)
+        except Exception as e:
+            log.warning("缓存的文章页面解析失败，重新下载: %s", e, link=url)
+            return None
+        log.debug("使用缓存的文章页面: %s", url)
+        result.from_cache = True
+        return result
+
+    def cache_article_page(self, html: str, result: ArticleRecord) -> None:
+        """解析成功的页面写入缓存（验证页、异常页不会走到这里）"""
+        if self.page_cache:
+            self.page_cache.put(result.url, html, result.biz, result.mid, result.idx)
+
+    def check_article_page(self, html: str, final_url: str = '') -> None:
+        """文章请求被重定向到验证页时登记退避并抛出 RateLimitedError"""
+        if any(marker in final_url or marker in html[:4096] for marker in THROTTLE_PAGE_MARKERS):
+            delay = self.scheduler.report_throttle(ENDPOINT_ARTICLE)
+            raise RateLimitedError(f"文章请求触发频率限制，{delay:.0f} 秒后重试")
+        self.scheduler.report_success(ENDPOINT_ARTICLE)
+
+    def fetch_article(self, url: str) -> ArticleRecord:
+        """请求并解析一次文章页面（不重试），成功后写入页面缓存"""
+        log.debug("正在获取文章内容: %s", url)
+        self.scheduler.acquire(ENDPOINT_ARTICLE)
+        with self.tracer.span(SPAN_FETCH_ARTICLE, link=url) as span:
+            response = self.http_get(ENDPOINT_ARTICLE, url, timeout=10)
+            response.raise_for_status()
+            span.set(bytes=len(response.content))
+            # response.text 每次访问都会重新解码，只取一次
+            html = response.text
+        self.check_article_page(html, response.url)
+
+        result = self.parse_article_html(html, url)
+        self.cache_article_page(html, result)
+        log.debug("文章内容获取成功，标题: %s", result.title)
+        return result
+
+    def get_article_content(self, url: str, max_retries: int = 3) -> ArticleRecord:
+        """获取文章内容，页面缓存中有未过期的原文时不请求网络"""
+        cached = self.cached_article(url)
+        if cached:
+            return cached
+        
+        retries = 0
+        while retries < max_retries:
+            try:
+                return self.fetch_article(url)
+
+            except RequestCancelled:
+                raise
             except Exception as e:
-                print(f"获取文章内容失败 (尝试 {retries + 1}/{max_retries}): {e}")
+                log.warning("获取文章内容失败 (尝试 %s/%s): %s", retries + 1, max_retries, e, link=url)
                 retries += 1
                 if retries < max_retries:
-                    time.sleep(2 ** retries)
+                    self.pacing.sleep(2 ** retries, PACE_RETRY)
                 else:
                     raise Exception(f"获取文章内容失败: {str(e)}")
 
-    def download_images(self, soup: BeautifulSoup, output_dir: str) -> None:
-        """下载文章中的所有图片并保存到本地"""
-        # 创建images目录
-        image_folder = os.path.join(output_dir, 'images')
-        os.makedirs(image_folder, exist_ok=True)
+    def image_link(self, img) -> Optional[str]:
+        """返回<img>需要下载的远程地址，已本地化的图片返回None"""
+        img_link = img.get('data-src') or img.get('src')
+        if not img_link or img_link.startswith('./images/'):
+            return None
+
+        img_link = img_link.replace(' ', '%20')
+
+        if not img_link.startswith(('http://', 'https://')):
+            img_link = self.base_url + img_link
+        return img_link
+
+    def store_image(self, img, file_content: bytes, image_folder: str) -> tuple:
+        """保存图片内容并将<img>属性指向本地文件，返回 (哈希, 扩展名)"""
+        img_hash = self.hash_byte_data(file_content)
+        file_ext = (img.get('data-type') or 'jpg').split('?')[0]
+        if img_hash in self.filter_config.image_hashes:
+            return img_hash, file_ext
+            
+        filename = f"{img_hash}.{file_ext}"
+        filepath = os.path.join(image_folder, filename)
+
+        if self.image_store:
+            self.image_store.put(img_hash, file_ext, file_content)
+            self.image_store.link(img_hash, file_ext, filepath)
+        elif not os.path.exists(filepath):
+            atomic_write(filepath, file_content)
         
+        # 更新图片属性指向本地文件
+        relative_path = f"./images/{filename}"
+        img['data-src'] = relative_path
+        img['src'] = relative_path
+        return img_hash, file_ext
+
+    def cached_image_available(self, cached: Dict, image_folder: str) -> bool:
+        """缓存记录对应的图片内容在本地（输出目录或图片仓库）是否可用"""
+        filename = f"{cached['img_hash']}.{cached['ext']}"
+        if os.path.exists(os.path.join(image_folder, filename)):
+            return True
+        return bool(self.image_store and
+                    os.path.exists(self.image_store.blob_path(cached['img_hash'], cached['ext'])))
+
+    def use_cached_image(self, img, cached: Dict, image_folder: str) -> None:
+        """不经网络，直接把<img>指向已缓存的本地图片"""
+        img_hash, file_ext = cached['img_hash'], cached['ext']
+        if img_hash in self.filter_config.image_hashes:
+            return
+        filename = f"{img_hash}.{file_ext}"
+        filepath = os.path.join(image_folder, filename)
+        if self.image_store and not os.path.exists(filepath):
+            self.image_store.link(img_hash, file_ext, filepath)
+        relative_path = f"./images/{filename}"
+        img['data-src'] = relative_path
+        img['src'] = relative_path
+
+    def plan_image_downloads(self, soup: BeautifulSoup, image_folder: str) -> tuple:
+        """找出需要下载的图片，URL缓存命中的直接改写为本地路径
+
+        返回 (待下载列表[(img, 链接, 缓存记录)], 缓存命中数)。开启 revalidate_images 时
+        命中的图片也会进入待下载列表，并以条件请求重新验证。
+        """
+        tasks = []
+        hits = 0
         for img in soup.find_all('img'):
-            img_link = img.get('data-src') or img.get('src')
+            img_link = self.image_link(img)
             if not img_link:
                 continue
-                
-            img_link = img_link.replace(' ', '%20')
+            cached = self.image_cache.lookup(img_link) if self.image_cache else None
+            if cached and not self.cached_image_available(cached, image_folder):
+                cached = None
+            if cached and not self.revalidate_images:
+                self.use_cached_image(img, cached, image_folder)
+                hits += 1
+                continue
+            tasks.append((img, img_link, cached))
+        if self.image_cache:
+            self.metrics.observe_images(hits=hits)
+        return tasks, hits
 
-            if not img_link.startswith(('http://', 'https://')):
-                img_link = 'https://mp.weixin.qq.com' + img_link
-                
+    def apply_image_results(self, tasks: list, results: list, image_folder: str) -> tuple:
+        """按文档顺序回写<img>属性并更新URL缓存，返回 (失败数, 下载字节数, 304命中数)"""
+        failed = 0
+        total_bytes = 0
+        not_modified = 0
+        for (img, img_link, cached), result in zip(tasks, results):
+            if isinstance(result, Exception):
+                failed += 1
+                log.warning("图片下载失败，URL: %s, 错误: %s", img_link, result)
+                continue
+            if result is None:
+                # 304 Not Modified，沿用缓存内容
+                self.use_cached_image(img, cached, image_folder)
+                not_modified += 1
+                continue
+            file_content, etag, last_modified = result
+            total_bytes += len(file_content)
+            img_hash, file_ext = self.store_image(img, file_content, image_folder)
+            if self.image_cache:
+                self.image_cache.record(img_link, img_hash, file_ext, etag, last_modified, len(file_content))
+        self.metrics.observe_images(misses=len(tasks) - not_modified if self.image_cache else 0,
+                                    not_modified=not_modified,
+                                    downloaded=len(tasks) - failed - not_modified, failed=failed)
+        return failed, total_bytes, not_modified
+
+    @staticmethod
+    def conditional_headers(cached: Optional[Dict]) -> Dict:
+        """根据缓存记录构造条件请求头"""
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    def fetch_image(self, img_link: str, cached: Optional[Dict] = None):
+        """通过共享会话下载单张图片
+
+        返回 (内容, ETag, Last-Modified)；条件请求返回304时返回None。
+        """
+        with self.http_get(ENDPOINT_IMAGE, img_link, headers=self.conditional_headers(cached),
+                           timeout=10) as response:
+            if response.status_code == 304 and cached:
+                return None
+            response.raise_for_status()
+            return response.content, response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+    def report_image_stats(self, count: int, failed: int, total_bytes: int, started: float,
+                           cached: int = 0) -> None:
+        """记录并打印单篇文章的图片下载耗时"""
+        elapsed = time.perf_counter() - started
+        self.last_image_stats = {
+            'count': count,
+            'failed': failed,
+            'cached': cached,
+            'bytes': total_bytes,
+            'seconds': elapsed
+        }
+        if count:
+            log.debug("图片下载完成: %s/%s 张 (缓存命中 %s 张), %.1f KB, 耗时 %.2f 秒",
+                      count - failed, count, cached, total_bytes / 1024, elapsed)
+
+    def download_images(self, soup: BeautifulSoup, output_dir: str) -> None:
+        """并发下载文章中的所有图片并保存到本地"""
+        with self.tracer.span(SPAN_IMAGES) as span:
+            self._download_images(soup, output_dir)
+            span.set(bytes=self.last_image_stats.get('bytes', 0), images=self.last_image_stats.get('count', 0))
+
+    def _download_images(self, soup: BeautifulSoup, output_dir: str) -> None:
+        started = time.perf_counter()
+        # 创建images目录
+        image_folder = os.path.join(output_dir, 'images')
+        os.makedirs(image_folder, exist_ok=True)
+        
+        tasks, hits = self.plan_image_downloads(soup, image_folder)
+        
+        def fetch(task):
+            _, img_link, cached = task
             try:
-                with requests.get(img_link, stream=True, timeout=10) as response:
-                    response.raise_for_status()
-                    file_content = response.content
-
-                    img_hash = self.hash_byte_data(file_content)
-                    if img_hash in self.filter_config.image_hashes:
-                        continue
-                        
-                    file_ext = (img.get('data-type') or 'jpg').split('?')[0]
-                    filename = f"{img_hash}.{file_ext}"
-                    filepath = os.path.join(image_folder, filename)
-
-                    if not os.path.exists(filepath):
-                        with open(filepath, 'wb') as f:
-                            f.write(file_content)
-                    
-                    # 更新图片属性指向本地文件
-                    relative_path = f"./images/{filename}"
-                    img['data-src'] = relative_path
-                    img['src'] = relative_path
-                    
+                return self.fetch_image(img_link, cached)
             except requests.exceptions.RequestException as e:
-                print(f"图片下载失败，URL: {img_link}, 错误: {e}")
+                return e
+        
+        results = []
+        if tasks:
+            with ThreadPoolExecutor(max_workers=min(self.image_workers, len(tasks))) as executor:
+                results = list(executor.map(fetch, tasks))
+        
+        failed, total_bytes, not_modified = self.apply_image_results(tasks, results, image_folder)
+        self.report_image_stats(len(tasks) + hits, failed, total_bytes, started, hits + not_modified)
 
-    def convert_to_markdown(self, article_data: Dict, output_dir: str) -> str:
+    def convert_to_markdown(self, article_data: ArticleRecord, output_dir: str) -> str:
         """将文章内容转换为Markdown格式"""
-        content_soup = article_data.get('content_soup')
+        content_soup = article_data.content_soup
         if content_soup is None:
             raise Exception("文章内容为空，无法转换为Markdown")
         
         # 确保content_soup是BeautifulSoup对象
         if isinstance(content_soup, str):
-            print("检测到content_soup是字符串，正在转换为BeautifulSoup对象...")
+            log.debug("检测到content_soup是字符串，正在转换为BeautifulSoup对象...")
             content_soup = BeautifulSoup(content_soup, 'html.parser')
         elif not hasattr(content_soup, 'find_all'):
             raise Exception(f"文章内容格式错误，期望BeautifulSoup对象，实际类型: {type(content_soup)}")
@@ -257,291 +618,125 @@ class WeChatArticleDownloader:
         # 下载图片
         self.download_images(content_soup, output_dir)
         
-        # 转换为Markdown
-        markdown_content = markdownify.markdownify(str(content_soup))
-        
-        # 处理图片路径
-        markdown_soup = BeautifulSoup(markdown_content, 'html.parser')
-        for img in markdown_soup.find_all('img'):
-            if img.get('data-src') and not img['data-src'].startswith(('http://', 'https://')):
-                img['src'] = img['data-src']
-        markdown_content = '\n'.join([line + '\n' for line in markdown_content.split('\n') if line.strip()])
-        
-        # 清理标题
-        clean_title = self.remove_nonvisible_chars(article_data['title'])
-        
-        # 格式化时间
-        create_time_str = ""
-        if article_data['create_time']:
-            try:
-                create_time_str = time.strftime("%Y-%m-%d %H:%M:%S", 
-                                               time.localtime(int(article_data['create_time'])))
-            except:
-                create_time_str = article_data['create_time']
-        
-        # 构建完整Markdown
-        markdown = f"# {clean_title}\n\n"
-        if create_time_str:
-            markdown += f"发布时间: {create_time_str}\n\n"
-        markdown += f"原文链接: {article_data['url']}\n\n"
-        markdown += markdown_content
-        
-        # 清理多余字符
-        markdown = re.sub('\xa0{1,}', '\n', markdown, flags=re.UNICODE)
-        markdown = re.sub(r'\]\(http([^)]*)\)',
-                          lambda x: '](http' + x.group(1).replace(' ', '%20') + ')',
-                          markdown)
-        
-        # 确保不过滤时出现问题
-        try:
-            filtered_markdown = self.filter_content(markdown) if self.filter_content else markdown
-        except Exception as e:
-            print(f"过滤markdown内容时出错: {e}")
-            filtered_markdown = markdown
-        
-        return filtered_markdown, clean_title
+        with self.tracer.span(SPAN_CONVERT):
+            return render_markdown(content_soup, article_data.title, article_data.create_time,
+                                   article_data.url,
+                                   self.filter_config.paragraph_keywords if self.filter_config else None)
 
-    def convert_to_html(self, article_data: Dict, output_dir: str) -> str:
+    def convert_to_html(self, article_data: ArticleRecord, output_dir: str) -> str:
         """将文章内容转换为HTML格式"""
-        content_soup = article_data.get('content_soup')
+        content_soup = article_data.content_soup
         if content_soup is None:
             raise Exception("文章内容为空，无法转换为HTML")
         
         # 确保content_soup是BeautifulSoup对象
         if isinstance(content_soup, str):
-            print("检测到content_soup是字符串，正在转换为BeautifulSoup对象...")
+            log.debug("检测到content_soup是字符串，正在转换为BeautifulSoup对象...")
             content_soup = BeautifulSoup(content_soup, 'html.parser')
         elif not hasattr(content_soup, 'find_all'):
             raise Exception(f"content_soup不是有效的HTML对象，类型: {type(content_soup)}")
         
-        # 创建内容副本进行清理
-        try:
-            content_soup = content_soup.copy()
-        except Exception as e:
-            print(f"复制content_soup失败，尝试直接使用: {e}")
-            # 如果复制失败，直接使用原对象
-        
-        # 移除隐藏样式
-        if content_soup.get('style'):
-            content_soup['style'] = content_soup['style'].replace('visibility: hidden;', '').replace('opacity: 0;', '')
-        
-        # 移除所有隐藏元素的style属性
-        for element in content_soup.find_all(style=True):
-            if 'visibility: hidden' in element.get('style', '') or 'opacity: 0' in element.get('style', ''):
-                element['style'] = element['style'].replace('visibility: hidden;', '').replace('opacity: 0;', '')
-        
-        # 清理微信特有的标签和属性
-        for tag in content_soup.find_all():
-            # 移除微信特有属性
-            attrs_to_remove = ['data-pm-slice', 'leaf', 'textstyle', 'nodeleaf', 'data-backh', 'data-backw', 'data-imgfileid', 
-                              'data-ratio', 'data-s', 'data-type', 'data-w', 'type']
-            for attr in attrs_to_remove:
-                if tag.get(attr):
-                    del tag[attr]
-            
-            # 清理class属性
-            if tag.get('class'):
-                # 保留一些有用的class，移除微信特有的
-                classes = tag['class']
-                if isinstance(classes, list):
-                    tag['class'] = [c for c in classes if not c.startswith(('js_', 'rich_media_', 'wxw-', 'autoTypeSetting'))]
-                    if not tag['class']:
-                        del tag['class']
-                else:
-                    tag['class'] = ''
-        
-        # 下载图片
+        # 先下载图片再清理属性（清理会删除决定扩展名的 data-type），与 Markdown、
+        # 转换进程池和异步引擎的顺序一致
         self.download_images(content_soup, output_dir)
         
-        # 清理HTML内容，移除空的span和font标签
-        for empty_span in content_soup.find_all('span'):
-            if not empty_span.get_text(strip=True) and not empty_span.find('img'):
-                empty_span.decompose()
-        
-        for empty_font in content_soup.find_all('font'):
-            if not empty_font.get_text(strip=True) and not empty_font.find('img'):
-                empty_font.decompose()
-        
-        # 获取清理后的HTML内容
-        clean_content = str(content_soup)
-        
-        # 创建完整的HTML
-        title = article_data['title']
-        
-        # 格式化时间
-        create_time_str = ""
-        if article_data['create_time']:
-            try:
-                create_time_str = time.strftime("%Y-%m-%d %H:%M:%S", 
-                                               time.localtime(int(article_data['create_time'])))
-            except:
-                create_time_str = article_data['create_time']
-        
-        html_template = f"""<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'PingFang SC', 'Hiragino Sans GB', 'Microsoft YaHei', 'Helvetica Neue', Helvetica, Arial, sans-serif;
-            line-height: 1.6;
-            color: #333;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 20px;
-        }}
-        .article-header {{
-            border-bottom: 1px solid #eee;
-            padding-bottom: 20px;
-            margin-bottom: 30px;
-        }}
-        .article-title {{
-            font-size: 24px;
-            font-weight: bold;
-            margin-bottom: 10px;
-        }}
-        .article-meta {{
-            color: #666;
-            font-size: 14px;
-        }}
-        .article-content {{
-            font-size: 16px;
-        }}
-        .article-content p {{
-            margin-bottom: 1em;
-            line-height: 1.75em;
-        }}
-        .article-content section {{
-            text-align: center;
-            margin: 2em 0;
-        }}
-        img {{
-            max-width: 100%;
-            height: auto;
-            display: block;
-            margin: 10px auto;
-        }}
-    </style>
-</head>
-<body>
-    <div class="article-header">
-        <h1 class="article-title">{title}</h1>
-        <div class="article-meta">
-            {'发布时间: ' + create_time_str if create_time_str else ''}
-            <br>
-            <a href="{article_data['url']}" target="_blank">原文链接</a>
-        </div>
-    </div>
-    <div class="article-content">
-        {clean_content}
-    </div>
-</body>
-</html>"""
-        
-        # 确保返回值不为None
-        if html_template is None:
-            html_template = ""
-        if title is None:
-            title = "untitled"
-            
-        return html_template, title
+        with self.tracer.span(SPAN_CONVERT):
+            return render_html(content_soup, article_data.title, article_data.create_time,
+                               article_data.url)
 
     def filter_content(self, text: str) -> str:
         """过滤内容"""
-        try:
-            if self.filter_config and self.filter_config.paragraph_keywords:
-                text = self._filter_paragraphs(text, self.filter_config.paragraph_keywords)
-            return text
-        except Exception as e:
-            print(f"过滤内容时出错: {e}")
-            return text
+        return filter_content(text, self.filter_config.paragraph_keywords if self.filter_config else None)
 
     def _filter_paragraphs(self, text: str, keywords: List[str]) -> str:
         """过滤包含特定关键词的段落"""
-        lines = [line.strip() for line in text.split('\n')]
-        filtered_lines = []
-        current_paragraph = []
-
-        for line in lines:
-            if not line.strip():
-                if not self._paragraph_contains_keywords(current_paragraph, keywords):
-                    filtered_lines.extend(current_paragraph)
-                current_paragraph = []
-            else:
-                current_paragraph.append(line)
-                
-        if not self._paragraph_contains_keywords(current_paragraph, keywords):
-            filtered_lines.extend(current_paragraph)
-            
-        return '\n\n'.join(filtered_lines) + '\n\n'
+        return filter_paragraphs(text, keywords)
 
-    def _paragraph_contains_keywords(self, paragraph: List[str], keywords: List[str]) -> bool:
-        """检查段落是否包含关键词"""
-        paragraph_text = ' '.join(paragraph)
-        return any(keyword in paragraph_text for keyword in keywords)
+    def build_conversion_job(self, article_data: ArticleRecord, output_dir: str,
+                             format_type: str = 'markdown') -> Dict:
+        """本地化图片后把正文HTML和元数据打包成可交给转换进程的任务"""
+        content_soup = article_data.content_soup
+        self.download_images(content_soup, output_dir)
+        return {
+            'content_html': str(content_soup),
+            'title': article_data.title,
+            'create_time': article_data.create_time,
+            'url': article_data.url,
+            'format_type': format_type,
+            'keywords': list(self.filter_config.paragraph_keywords) if self.filter_config else []
+        }
 
-    def save_article(self, article_data: Dict, output_dir: str, format_type: str = 'markdown') -> str:
+    def write_article(self, content: str, clean_title: str, output_dir: str,
+                      format_type: str = 'markdown') -> str:
+        """把转换结果写入输出目录，返回文件路径"""
+        filename = f"{clean_title}.md" if format_type == FORMAT_MARKDOWN else f"{clean_title}.html"
+        log.debug("清理前的文件名: %s", clean_title)
+        # 清理文件名
+        filename = re.sub(r'[\\/*?:"<>|]', '_', filename)
+        log.debug("清理后的文件名: %s", filename)
+        filepath = os.path.join(output_dir, filename)
+        
+        # 确保目录存在
+        os.makedirs(output_dir, exist_ok=True)
+        
+        log.debug("保存文件到: %s", filepath)
+        size = len(content.encode('utf-8'))
+        # 先写临时文件再改名，中断时不会留下不完整的文章
+        with self.tracer.span(SPAN_WRITE, bytes=size):
+            atomic_write(filepath, content)
+        
+        # 默认日志级别下每篇文章只有这一行
+        log.info("已保存: %s", filename, kb=round(size / 1024, 1), dir=output_dir)
+        return filepath
+
+    def save_article(self, article_data: ArticleRecord, output_dir: str, format_type: str = 'markdown') -> str:
         """保存文章"""
+        # 图片、转换、写文件的计时都归属这篇文章
+        with self.tracer.article(getattr(article_data, 'url', None)):
+            return self._save_article(article_data, output_dir, format_type)
+
+    def _save_article(self, article_data: ArticleRecord, output_dir: str, format_type: str = 'markdown') -> str:
         try:
-            print(f"开始保存文章，格式: {format_type}")
-            print(f"文章数据: {list(article_data.keys())}")
+            log.debug("开始保存文章，格式: %s", format_type)
+            log.debug("文章数据: %r", article_data)
             
             # 验证文章数据完整性
-            if not article_data or not isinstance(article_data, dict):
+            if not isinstance(article_data, ArticleRecord):
                 raise Exception("文章数据为空或格式错误")
             
-            if 'content_soup' not in article_data:
-                raise Exception("文章数据中缺少content_soup字段")
-            
-            content_soup = article_data['content_soup']
+            content_soup = article_data.content_soup
             if content_soup is None:
                 raise Exception("文章内容为空，可能是获取文章内容时失败")
             
-            print(f"content_soup详细信息: 类型={type(content_soup)}, 值={content_soup}")
+            if not isinstance(content_soup, str) and not hasattr(content_soup, 'find_all'):
+                raise Exception(f"content_soup对象错误，类型: {type(content_soup)}")
             
-            if not hasattr(content_soup, 'copy'):
-                raise Exception(f"content_soup对象错误，无法调用copy方法，类型: {type(content_soup)}")
-            
-            if 'title' not in article_data or not article_data['title']:
+            if not article_data.title:
                 raise Exception("文章标题为空")
             
-            if format_type == 'markdown':
-                print("调用convert_to_markdown...")
+            if self.convert_pool:
+                # 在转换进程中渲染，当前线程只负责图片本地化和写文件
+                job = self.build_conversion_job(article_data, output_dir, format_type)
+                with self.tracer.span(SPAN_CONVERT, pool=True):
+                    content, clean_title = self.convert_pool.render(job)
+            elif format_type == 'markdown':
+                log.debug("调用convert_to_markdown...")
                 result = self.convert_to_markdown(article_data, output_dir)
-                print(f"convert_to_markdown返回: {type(result)}, 值: {result}")
+                log.debug("convert_to_markdown返回: %s", type(result))
                 if not isinstance(result, tuple) or len(result) != 2:
                     raise Exception(f"convert_to_markdown返回值错误: {result}")
                 content, clean_title = result
-                filename = f"{clean_title}.md"
             else:  # html
-                print("调用convert_to_html...")
+                log.debug("调用convert_to_html...")
                 result = self.convert_to_html(article_data, output_dir)
-                print(f"convert_to_html返回: {type(result)}, 值: {result}")
+                log.debug("convert_to_html返回: %s", type(result))
                 if not isinstance(result, tuple) or len(result) != 2:
                     raise Exception(f"convert_to_html返回值错误: {result}")
                 content, clean_title = result
-                filename = f"{clean_title}.html"
-            
-            print(f"清理前的文件名: {clean_title}")
-            # 清理文件名
-            filename = re.sub(r'[\\/*?:"<>|]', '_', filename)
-            print(f"清理后的文件名: {filename}")
-            filepath = os.path.join(output_dir, filename)
-            
-            # 确保目录存在
-            os.makedirs(output_dir, exist_ok=True)
-            
-            print(f"保存文件到: {filepath}")
-            # 保存文件
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
             
-            return filepath
+            return self.write_article(content, clean_title, output_dir, format_type)
             
         except Exception as e:
-            import traceback
-            error_detail = traceback.format_exc()
-            print(f"保存文章详细错误: {error_detail}")
+            # 失败由调用方按文章记录，调用栈只在 DEBUG 级别输出
+            log.debug("保存文章失败: %s", e, exc_info=True)
             raise Exception(f"保存文章失败: {str(e)}")
\ No newline at end of file
@@ -1,4 +1,5 @@
 import os
+import sys
 import uuid
 import requests
 import re
@@ -11,9 +12,14 @@ import unicodedata
 import hashlib
 from datetime import datetime
 import pandas as pd
-import openpyxl
 import random
 
+# 去重索引位于项目根目录的 core 包中
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.article_id import ArticleIndex
+from core.article_store import ArticleMetaStore, export_xlsx
+from core.atomic_io import atomic_write
+
 # 给定的 URL
 url = "https://mp.weixin.qq.com/s?__biz=MzU1MTk2NDE4Mg==&mid=2247489209&idx=1&sn=67694d6afbb51b0b2a4866cd310224f8&chksm=fb880dc0ccff84d6e16a1a33a726c682659bfd2c6d5e1128440d95dadd9950b201b6db82bb54#rd"
 
@@ -99,8 +105,7 @@ def process_url(url_data: Dict, output_base: str) -> bool:
     filename = re.sub(r'[\\/*?:"<>|]', '', filename)
     filepath = os.path.join(account_dir, f"{filename}.md")
 
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(markdown)
+    atomic_write(filepath, markdown)
 
     print(f'Processed: {account_name} - {filename}.md')
     return True
@@ -110,11 +115,6 @@ def convert_to_markdown(url: str, title: str, create_time: str,
     """将HTML内容转换为Markdown格式"""
     download_images(content_soup, account_dir)
     markdown_content = markdownify.markdownify(str(content_soup))
-    # 处理图片路径（确保使用相对路径）
-    markdown_soup = BeautifulSoup(markdown_content, 'html.parser')
-    for img in markdown_soup.find_all('img'):
-        if img.get('data-src') and not img['data-src'].startswith(('http://', 'https://')):
-            img['src'] = img['data-src']
     markdown_content = '\n'.join([line + '\n' for line in markdown_content.split('\n') if line.strip()])
     clean_title = remove_nonvisible_chars(title)
 
@@ -152,8 +152,7 @@ def download_images(soup: BeautifulSoup, account_dir: str) -> None:
                 filepath = os.path.join(image_folder, filename)
 
                 if not os.path.exists(filepath):
-                    with open(filepath, 'wb') as f:
-                        f.write(file_content)
+                    atomic_write(filepath, file_content)
                 # 更新图片属性指向本地文件（使用相对路径 ./images/）
                 relative_path = f"./images/{filename}"
                 img['data-src'] = relative_path
@@ -168,12 +167,9 @@ def remove_nonvisible_chars(text: str) -> str:
 
 
 
-def savetolist(resultPath, account, curl, title, result):
-    wb = openpyxl.load_workbook(resultPath)
-    ws = wb.active
-    srow = [account, title, curl, result]
-    ws.append(srow)
-    wb.save(resultPath)
+def savetolist(store, account, curl, title, result):
+    # 每篇文章只写入一行数据库记录，Excel 在全部下载完后一次导出
+    store.record_result(curl, title, result, account)
 
 
 if __name__ == "__main__":
@@ -184,29 +180,39 @@ if __name__ == "__main__":
     # 读取 Excel 文件
     file_path = output_dir + "\\wxlist.xlsx"
 
-    wb_save = openpyxl.load_workbook(file_path)
-    ws_save = wb_save.active
+    # 文章列表与下载结果保存在数据库中，第一次运行时导入旧的 wxlist.xlsx
+    os.makedirs(os.path.join(output_dir, '.wefetch'), exist_ok=True)
+    store = ArticleMetaStore(os.path.join(output_dir, '.wefetch', 'articles_meta.db'))
+    if not len(store) and os.path.exists(file_path):
+        store.import_xlsx(file_path)
 
     wx_list = []
-    # 读取每一行的值
-    for row in ws_save.iter_rows(values_only=True):
+    for article in store.scan():
         wx_list.append({
             'account': '禾木AI笔记-all',
-            'title': row[0],
-            'url': row[1]
+            'title': article['title'],
+            'url': article['link']
             # 'date': row.get('日期', '').strip()
         })
 
+    # 已下载文章的去重索引：同一篇文章换了链接形式也不会重复下载
+    article_index = ArticleIndex(os.path.join(output_dir, '.wefetch', 'article_index.db'))
+
     #print(wx_list)
     for item in wx_list:
+        if article_index.contains(item['url']):
+            print(f"跳过已下载文章: {item['title']}")
+            continue
         rs = 'success'
         try:
             time.sleep(random.randint(5, 10))
-            process_url(item, output_dir)
+            if process_url(item, output_dir):
+                article_index.add(item['url'])
         except Exception as e:
             # 捕获异常并处理（例如打印错误信息）
             print(f"发生错误: {e}")
             rs = str(e)
-        # 文件路径
-        # 写入 Excel
-        savetolist(result_path, item['account'], item['url'], item['title'], rs)
+        # 记录下载结果
+        savetolist(store, item['account'], item['url'], item['title'], rs)
+
+    export_xlsx(store.results(), result_path, columns=('account', 'title', 'link', 'result'))
@@ -1,12 +1,16 @@
 import os.path
 import shutil
-import openpyxl
+import sys
 import config
 import time
-import json
+
+# 文章列表元数据库位于项目根目录的 core 包中
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.article_store import ArticleMetaStore, export_xlsx
 
 rootPath = config.rootPath
 wxlistfile = rootPath + '\\wxlist.xlsx'
+wxlistdb = os.path.join(rootPath, '.wefetch', 'articles_meta.db')
 wxlistfilefinal = rootPath + '\\wxlist-final.xlsx'
 # wxlist-final-ad
 wxlistfilefinal = rootPath + '\\wxlist-final-ad.xlsx'
@@ -39,26 +43,20 @@ class Article:
         return time.strftime("%Y-%m",time.localtime(int(self.create_time)))
         #return datetime.fromtimestamp(self.update_time).strftime('%Y-%m')
 
-def fill_toc():
-    wb = openpyxl.load_workbook(wxlistfile)
-    ws = wb.active
-    # 读取每一行的值
-    data_list = []
-    for row in ws.iter_rows(values_only=True):
-        data_list.append(row[2])
-    data_list.reverse()
+def open_store():
+    """打开文章列表数据库；第一次使用时导入旧的 wxlist.xlsx"""
+    os.makedirs(os.path.dirname(wxlistdb), exist_ok=True)
+    store = ArticleMetaStore(wxlistdb)
+    if not len(store) and os.path.exists(wxlistfile):
+        print(f"导入 {wxlistfile}: {store.import_xlsx(wxlistfile)} 篇文章")
+    return store
 
-    articles = []
-    for row in data_list:
-        # 解析 JSON 字符串
-        data_dict = json.loads(row)
-        copyright_type = data_dict.get("copyright_type")
-        #if copyright_type == 0:
-        #    print(f'广告：{data_dict.get("title")}')
-        #    continue
-        # 创建对象
-        article = Article(data_dict)
-        articles.append(article)
+
+def fill_toc():
+    store = open_store()
+    # 按发布时间从旧到新读取
+    articles = [Article(data) for data in store.scan()]
+    #articles = [Article(data) for data in store.scan(copyright_type=1)]
 
     # 按月份分类
     articles_by_month = {}
@@ -80,31 +78,13 @@ def fill_toc():
                 print(f"## {article.title}")
 
 def save_final():
-    wb = openpyxl.load_workbook(wxlistfile)
-    ws = wb.active
-    # 读取每一行的值
-    data_list = []
-    for row in ws.iter_rows(values_only=True):
-        data_list.append(row[2])
-    data_list.reverse()
-
-    articles = []
-    wb_save = openpyxl.load_workbook(wxlistfilefinal)
-    ws_save = wb_save.active
-
-    for row in data_list:
-        # 解析 JSON 字符串
-        data_dict = json.loads(row)
-        copyright_type = data_dict.get("copyright_type")
-        if copyright_type == 0:
-            create_time = data_dict.get("create_time")
-            title = data_dict.get("title")
-            link = data_dict.get("link")
-            aid = data_dict.get("aid")
-            row = [aid, title, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(int(create_time))), link]
-            ws_save.append(row)
-
-    wb_save.save(wxlistfilefinal)
+    # 与原来一样追加到已有的 wxlist-final 工作簿末尾
+    store = open_store()
+    try:
+        count = export_xlsx(store.scan(copyright_type=0), wxlistfilefinal, append=True)
+    finally:
+        store.close()
+    print(f"已追加 {count} 篇文章到 {wxlistfilefinal}")
 
 if __name__ == '__main__':
     fill_toc()
@@ -9,26 +9,33 @@
 import tkinter as tk
 import os
 import time
-import random
 import threading
 import json
+import hashlib
 import requests
 import webbrowser
-import qrcode
 from io import BytesIO
 from tkinter import ttk, messagebox, scrolledtext, filedialog, simpledialog
-from PIL import Image, ImageTk
 from urllib.parse import quote
 from core.wechat_downloader_core import WeChatArticleDownloader
-from login.wechat_login import WeChatPlatformLogin
-from login.real_qr_login import RealWeChatQRLogin
-from login.working_wechat_login import WorkingWeChatLogin
-from login.selenium_wechat_login import SeleniumWeChatLogin
-from data.cookie_helper import create_cookie_helper_window
-from bs4 import BeautifulSoup
+from core.pacing import PACE_ARTICLE, PACE_FAILURE
+from core.image_cache import ImageUrlCache
+from core.image_store import ImageStore
+from core.page_cache import ArticlePageCache
+from core.article_id import ArticleIndex, dedup_key
+from core.ledger import DownloadLedger
+from core.journal import ExportJournal
+from core.atomic_io import remove_stale_temp_files
+from core.converter import ConversionPool
+from core.pipeline import ExportPipeline
+from core.listing import iter_new_articles
+from core.log import configure_logging
+# 登录方式（Selenium、二维码）、Pillow/qrcode 和异步引擎(aiohttp)只在用到时导入，加快启动
 
 class WeChatDownloaderGUI:
     def __init__(self, root=None):
+        # 下载器日志输出到控制台（跟随 sys.stdout 的重定向），只在启动时配置一次
+        configure_logging()
         if root is None:
             self.root = tk.Tk()
         else:
@@ -97,8 +104,12 @@ class WeChatDownloaderGUI:
                             print(f"✅ 应用图标加载成功 (ICO: {icon_file})")
                             return
                         else:
-                            # PNG文件使用iconphoto方法
-                            icon = ImageTk.PhotoImage(file=icon_path)
+                            # PNG文件使用iconphoto方法，Tk 8.6 可直接读取PNG，更早的版本改用Pillow
+                            try:
+                                icon = tk.PhotoImage(file=icon_path)
+                            except tk.TclError:
+                                from PIL import ImageTk
+                                icon = ImageTk.PhotoImage(file=icon_path)
                             self.root.iconphoto(True, icon)
                             print(f"✅ 应用图标加载成功 (PNG: {icon_file})")
                             return
@@ -417,6 +428,22 @@ class WeChatDownloaderGUI:
         ttk.Checkbutton(options_frame, text="包含原始链接", 
                        variable=self.include_original_link).pack(anchor='w', pady=5)
         
+        self.use_async_engine = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="并发下载（异步引擎，适合大量文章）", 
+                       variable=self.use_async_engine).pack(anchor='w', pady=5)
+        
+        self.incremental_sync = tk.BooleanVar(value=True)
+        ttk.Checkbutton(options_frame, text="增量同步（导出所有文章时只翻页到上次同步的位置）", 
+                       variable=self.incremental_sync).pack(anchor='w', pady=5)
+        
+        self.use_image_store = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="跨公众号共享图片（全局图片仓库，节省磁盘）", 
+                       variable=self.use_image_store).pack(anchor='w', pady=5)
+        
+        self.use_process_pool = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="多进程转换（Markdown/HTML渲染使用多个CPU核心，界面更流畅）", 
+                       variable=self.use_process_pool).pack(anchor='w', pady=5)
+        
         # 导出按钮
         export_btn_frame = ttk.Frame(main_container)
         export_btn_frame.pack(fill='x', pady=(20, 0))
@@ -480,6 +507,7 @@ class WeChatDownloaderGUI:
     def open_cookie_helper(self):
         """打开Cookie获取助手"""
         try:
+            from data.cookie_helper import create_cookie_helper_window
             create_cookie_helper_window()
         except Exception as e:
             self.show_error(f"无法打开助手工具: {str(e)}")
@@ -547,6 +575,7 @@ class WeChatDownloaderGUI:
             
             # 创建Selenium登录实例
             if not self.selenium_login:
+                from login.selenium_wechat_login import SeleniumWeChatLogin
                 self.selenium_login = SeleniumWeChatLogin()
             
             # 启动扫码登录
@@ -680,6 +709,7 @@ class WeChatDownloaderGUI:
             
             # 使用真正可用的登录方式
             if not self.working_login:
+                from login.working_wechat_login import WorkingWeChatLogin
                 self.working_login = WorkingWeChatLogin()
             
             # 在新线程中获取二维码
@@ -698,6 +728,8 @@ class WeChatDownloaderGUI:
             result = self.working_login.direct_qr_login()
             
             if result.get('success') and 'qr_data' in result:
+                from PIL import Image, ImageTk
+                
                 # 显示二维码
                 img = Image.open(BytesIO(result['qr_data']))
                 img = Image.open(BytesIO(result['qr_data']))
@@ -1079,6 +1111,9 @@ appmsglist_action_xxx=...; ua_id=...; wxuin=...
             # 创建一个包含完整操作步骤的网页链接
             guide_url = "https://mp.weixin.qq.com/"
             
+            import qrcode
+            from PIL import ImageTk
+            
             # 生成指向微信登录页面的二维码
             qr = qrcode.QRCode(version=1, box_size=8, border=2)
             qr.add_data(guide_url)
@@ -1449,11 +1484,13 @@ appmsglist_action_xxx=...; ua_id=...; wxuin=...
             if not self.downloader:
                 self.downloader = WeChatArticleDownloader(self.config)
             
+            if not self.downloader.page_size:
+                self.downloader.probe_page_size(self.current_account['fakeid'], self.config['token'])
             articles = self.downloader.get_articles_list(
                 self.current_account['fakeid'], 
                 self.config['token'], 
                 page, 
-                5
+                self.downloader.page_size
             )
             self.root.after(0, lambda: self.display_articles(articles, page))
                 
@@ -1497,7 +1534,8 @@ appmsglist_action_xxx=...; ua_id=...; wxuin=...
         
         # 更新分页按钮状态
         self.prev_btn.config(state='normal' if page > 1 else 'disabled')
-        self.next_btn.config(state='normal' if len(articles) == 5 else 'disabled')
+        page_size = self.downloader.page_size if self.downloader else 5
+        self.next_btn.config(state='normal' if len(articles) == page_size else 'disabled')
         
         self.update_status(f"第 {page} 页，共 {len(articles)} 篇文章")
         
@@ -1510,6 +1548,97 @@ appmsglist_action_xxx=...; ua_id=...; wxuin=...
         """下一页"""
         self.load_articles(self.current_page + 1)
         
+    def state_dir(self):
+        """输出根目录下保存缓存/索引等状态文件的目录"""
+        path = os.path.join(self.output_dir.get(), '.wefetch')
+        os.makedirs(path, exist_ok=True)
+        return path
+        
+    def get_ledger(self):
+        """当前输出目录的下载台账"""
+        ledger_path = os.path.join(self.state_dir(), 'ledger.db')
+        if getattr(self, 'ledger', None) is None or self.ledger.db_path != ledger_path:
+            self.ledger = DownloadLedger(ledger_path)
+        return self.ledger
+        
+    def get_journal(self):
+        """当前输出目录的导出任务检查点日志"""
+        journal_path = os.path.join(self.state_dir(), 'journal.db')
+        if getattr(self, 'journal', None) is None or self.journal.db_path != journal_path:
+            self.journal = ExportJournal(journal_path)
+        return self.journal
+        
+    def start_export_job(self, key, output_path):
+        """打开导出任务：上次同一任务中断时接着上次的检查点，并清理中断写入留下的临时文件"""
+        removed = remove_stale_temp_files(output_path)
+        if removed:
+            print(f"清理上次中断留下的 {removed} 个临时文件")
+        job = self.get_journal().open_job(key, output_path, self.export_format.get())
+        if job['resumed']:
+            progress = self.get_journal().progress(job['id'])
+            listing = '已获取完毕' if job['listing_done'] else f"从第{job['list_page']}页继续"
+            print(f"从检查点继续导出任务 #{job['id']}: 已完成 {progress['done']} 篇，"
+                  f"待处理 {progress['pending'] + progress['failed']} 篇，列表{listing}")
+        self.export_job = job
+        return job
+        
+    def finish_export_job(self):
+        """导出结束：未停止且文章列表已完整获取时关闭任务，否则保留检查点供下次继续"""
+        job, self.export_job = getattr(self, 'export_job', None), None
+        if not job or self.stop_export_flag:
+            return
+        journal = self.get_journal()
+        if journal.get(job['id'])['listing_done']:
+            journal.finish(job['id'])
+        
+    def get_article_index(self):
+        """当前输出目录的文章去重索引，首次使用时从下载台账导入已下载的链接"""
+        index_path = os.path.join(self.state_dir(), 'article_index.db')
+        if getattr(self, 'article_index', None) is None or self.article_index.db_path != index_path:
+            self.article_index = ArticleIndex(index_path)
+            if len(self.article_index) == 0:
+                self.article_index.add_many(self.get_ledger().downloaded_links())
+        return self.article_index
+        
+    def apply_export_options(self, downloader):
+        """把导出选项应用到下载器实例"""
+        # 图片URL缓存：重复导出时已下载过的图片不再请求
+        cache_path = os.path.join(self.state_dir(), 'image_cache.db')
+        if getattr(self, 'image_cache', None) is None or self.image_cache.db_path != cache_path:
+            self.image_cache = ImageUrlCache(cache_path)
+        downloader.image_cache = self.image_cache
+        
+        # 文章页面缓存：换一种格式重新导出时直接使用缓存的页面原文
+        page_cache_path = os.path.join(self.state_dir(), 'page_cache.db')
+        if getattr(self, 'page_cache', None) is None or self.page_cache.db_path != page_cache_path:
+            self.page_cache = ArticlePageCache(page_cache_path,
+                                               float(self.config.get('page_cache_ttl_days', 30)),
+                                               float(self.config.get('page_cache_max_mb', 500)))
+        downloader.page_cache = self.page_cache
+        
+        # 文章去重索引：下载页面后登记短链接指向的文章，同一篇文章换链接也不会重复下载
+        downloader.article_index = self.get_article_index()
+        
+        downloader.image_store = None
+        if self.use_image_store.get():
+            store_root = os.path.join(self.output_dir.get(), '.image_store')
+            if getattr(self, 'image_store', None) is None or self.image_store.root != os.path.abspath(store_root):
+                self.image_store = ImageStore(store_root)
+            downloader.image_store = self.image_store
+        
+        # 转换进程池在多次导出之间复用，避免反复启动子进程
+        downloader.convert_pool = None
+        if self.use_process_pool.get():
+            if getattr(self, 'convert_pool', None) is None:
+                self.convert_pool = ConversionPool(int(self.config.get('convert_workers', 0)))
+            downloader.convert_pool = self.convert_pool
+        
+        # 清除上一次停止导出留下的取消状态，节奏统计和分阶段计时按每次导出重新计算
+        downloader.scheduler.reset()
+        downloader.pacing.reset_metrics()
+        downloader.tracer.reset()
+        return downloader
+        
     def choose_output_dir(self):
         """选择输出目录"""
         directory = filedialog.askdirectory(initialdir=self.output_dir.get())
@@ -1524,11 +1653,16 @@ appmsglist_action_xxx=...; ua_id=...; wxuin=...
             return
             
         articles = []
+        selected_keys = set()  # 同一篇文章以不同链接出现时只导出一次
         for item in selection:
             article_data = self.articles_tree.item(item)
+            link = article_data['values'][2]
+            if dedup_key(link) in selected_keys:
+                continue
+            selected_keys.add(dedup_key(link))
             articles.append({
                 'title': article_data['values'][0],
-                'link': article_data['values'][2]
+                'link': link
             })
             
         self.export_articles(articles)
@@ -1550,6 +1684,17 @@ appmsglist_action_xxx=...; ua_id=...; wxuin=...
         # 在新线程中获取所有文章并导出
         threading.Thread(target=self.do_export_all_articles, daemon=True).start()
     
+    def iter_new_articles(self, ledger, fakeid, job=None):
+        """逐页获取公众号文章列表，产出需要下载的文章（见 core.listing.iter_new_articles）"""
+        def on_page(page):
+            self.root.after(0, lambda p=page:
+                          self.progress_label.config(text=f"正在获取文章列表: 第{p}页"))
+        
+        return iter_new_articles(self.downloader, self.config['token'], fakeid, ledger,
+                                 self.get_article_index(), self.incremental_sync.get(),
+                                 self.get_journal(), job,
+                                 should_stop=lambda: self.stop_export_flag, on_page=on_page)
+    
     def do_export_all_articles(self):
         """执行所有文章导出"""
         try:
@@ -1558,6 +1703,7 @@ appmsglist_action_xxx=...; ua_id=...; wxuin=...
             
             if not self.downloader:
                 self.downloader = WeChatArticleDownloader(self.config)
+            self.apply_export_options(self.downloader)
             
             # 创建输出目录
             output_path = self.output_dir.get()
@@ -1565,107 +1711,27 @@ appmsglist_action_xxx=...; ua_id=...; wxuin=...
                 output_path = os.path.join(output_path, self.current_account['nickname'])
             os.makedirs(output_path, exist_ok=True)
             
-            # 检查已下载的文章（断点续传）
-            downloaded_articles = set()
-            try:
-                for file in os.listdir(output_path):
-                    if file.endswith('.md') or file.endswith('.html'):
-                        # 从文件内容中提取文章链接来准确判断
-                        try:
-                            file_path = os.path.join(output_path, file)
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                                # 查找原文链接
-                                if '原文链接:' in content:
-                                    lines = content.split('\n')
-                                    for line in lines:
-                                        if line.startswith('原文链接:'):
-                                            article_link = line.replace('原文链接:', '').strip()
-                                            downloaded_articles.add(article_link)
-                                            print(f"发现已下载文章链接: {article_link[:50]}...")
-                                            break
-                        except Exception as e:
-                            print(f"读取文件 {file} 失败: {e}")
-            except Exception as e:
-                print(f"检查已下载文件失败: {e}")
-            
-            print(f"已下载 {len(downloaded_articles)} 篇文章")
-            
-            # 获取所有文章
-            all_articles = []
-            begin = 0  # 微信API使用begin参数表示起始位置
-            page = 1
-            has_more = True
-            
-            while has_more:
-                try:
-                    # 更新进度
-                    current_page = page
-                    self.root.after(0, lambda p=current_page: 
-                                  self.progress_label.config(text=f"正在获取文章列表: 第{p}页"))
-                    
-                    # 获取当前页文章（使用begin而不是page）
-                    articles_list = self.downloader.get_articles_list(
-                        self.current_account['fakeid'], 
-                        self.config['token'], 
-                        page, 
-                        5  # 每页显示数量
-                    )
-                    
-                    if not articles_list or len(articles_list) == 0:
-                        print(f"第{page}页没有文章数据，结束获取")
-                        break
-                        
-                    # 添加到文章列表（排除已下载的）
-                    new_articles_count = 0
-                    for article in articles_list:
-                        title = article.get('title', '未知标题')
-                        link = article.get('link', '')
-                        
-                        if not link:
-                            continue
-                        
-                        # 检查是否已下载（通过文章链接）
-                        if link in downloaded_articles:
-                            print(f"跳过已下载文章: {title[:30]}...")
-                            continue
-                        
-                        all_articles.append({
-                            'title': title,
-                            'link': link
-                        })
-                        new_articles_count += 1
-                        print(f"添加新文章: {title[:30]}...")
-                    
-                    print(f"第{page}页: 获取{len(articles_list)}篇，新增{new_articles_count}篇，累计{len(all_articles)}篇")
-                    
-                    # 如果这页没有新文章，可能已经到最后一页
-                    if new_articles_count == 0 and len(articles_list) < 5:
-                        print("本页没有新文章且数量不足，可能到达最后一页")
-                        break
-                    
-                    # 如果获取的文章数量少于每页数量，说明可能到最后一页
-                    if len(articles_list) < 5:
-                        print(f"第{page}页文章数量 {len(articles_list)} < 每页数量 5，可能到达最后一页")
-                        # 再试下一页确认
-                        page += 1
-                        time.sleep(random.uniform(2, 3))
-                        continue
-                    
-                    page += 1
-                    begin += len(articles_list)
-                    
-                    # 添加延迟避免请求过快
-                    time.sleep(random.uniform(2, 3))
-                    
-                except Exception as e:
-                    print(f"获取第{page}页文章失败: {e}")
-                    # 失败了也试试下一页
-                    page += 1
-                    time.sleep(random.uniform(3, 5))
-                    continue
+            # 检查已下载的文章（断点续传），台账为空时从旧版本导出的文件导入一次
+            ledger = self.get_ledger()
+            fakeid = self.current_account['fakeid']
+            if ledger.count(fakeid) == 0:
+                imported = ledger.import_existing(output_path, fakeid)
+                if imported:
+                    print(f"从已导出文件导入 {imported} 条下载记录")
+            
+            print(f"已下载 {ledger.count(fakeid)} 篇文章")
+            
+            job = self.start_export_job(f"all:{fakeid}", output_path)
+            articles = self.iter_new_articles(ledger, fakeid, job)
+            if not self.use_async_engine.get():
+                # 边翻页边下载，不必等全部列表获取完
+                self.stream_export_articles(articles, output_path)
+                return
             
+            # 异步引擎按完整列表调度并发，先获取全部列表
+            all_articles = list(articles)
             if not all_articles:
+                self.finish_export_job()
                 self.root.after(0, lambda: self.show_info("所有文章都已下载完成！"))
                 self.root.after(0, lambda: self.update_status("没有新文章需要下载"))
                 return
@@ -1699,14 +1765,84 @@ appmsglist_action_xxx=...; ua_id=...; wxuin=...
             print(f"清理文件名失败: {e}")
             return filename
     
+    def pace_between_articles(self):
+        """两篇文章之间按下载器的节奏策略等待，停止导出时立即返回"""
+        pacing = self.downloader.pacing
+        sleep_time = pacing.next_delay(PACE_ARTICLE)
+        self.root.after(0, lambda t=sleep_time: 
+                      self.update_status(f"下载完成，等待 {t:.1f} 秒后继续..."))
+        pacing.sleep(sleep_time, PACE_ARTICLE, lambda: self.stop_export_flag)
+    
     def stop_export(self):
         """停止导出"""
         if self.exporting:
             self.stop_export_flag = True
+            if self.downloader:
+                # 打断频率限制退避等待
+                self.downloader.scheduler.cancel()
             self.update_status("正在停止导出...")
             self.stop_export_btn.config(state='disabled')
             self.show_info("正在停止导出，请稍候...")
     
+    def stream_export_articles(self, articles, output_path):
+        """流水线导出：列表、抓取、图片、转换、写盘分阶段同时进行"""
+        try:
+            # 设置导出状态
+            self.exporting = True
+            self.stop_export_flag = False
+            self.root.after(0, lambda: self.stop_export_btn.config(state='normal'))
+            self.root.after(0, lambda: self.update_status("正在边获取文章列表边下载..."))
+            
+            def on_result(article, filepath, error):
+                self.record_export_result(article, filepath, error)
+                stats = pipeline.stats
+                self.root.after(0, lambda p=stats['processed'] / max(1, stats['listed']) * 100:
+                              self.progress_var.set(p))
+                self.root.after(0, lambda d=stats['processed'], n=stats['listed'], title=article.get('title', ''):
+                              self.progress_label.config(text=f"已完成: {d}/{n} (已列出) - {title[:20]}..."))
+            
+            pipeline = ExportPipeline(self.downloader, output_path, self.export_format.get(),
+                                      fetch_workers=int(self.config.get('fetch_workers', 1)),
+                                      on_result=on_result,
+                                      should_stop=lambda: self.stop_export_flag)
+            stats = pipeline.run(articles)
+            success, failed = stats['success'], stats['failed']
+            self.finish_export_job()
+            
+            # 完成导出
+            self.exporting = False
+            self.root.after(0, lambda: self.stop_export_btn.config(state='disabled'))
+            print(self.downloader.pacing.metrics.summary())
+            print(self.downloader.tracer.summary_table())
+            
+            if self.stop_export_flag:
+                result_msg = f"导出已停止！\n\n📊 统计信息:\n✅ 成功: {success} 篇\n❌ 失败: {failed} 篇\n⏹️ 已处理: {stats['processed']}/{stats['listed']} 篇\n📁 保存位置: {output_path}"
+            elif stats['listed'] == 0:
+                self.root.after(0, lambda: self.show_info("所有文章都已下载完成！"))
+                self.root.after(0, lambda: self.update_status("没有新文章需要下载"))
+                return
+            else:
+                self.root.after(0, lambda: self.progress_var.set(100))
+                result_msg = f"导出完成！\n\n📊 统计信息:\n✅ 成功: {success} 篇\n❌ 失败: {failed} 篇\n📁 保存位置: {output_path}"
+                
+                if failed > 0:
+                    result_msg += f"\n\n⚠️ 提示: 有 {failed} 篇文章下载失败，可能是网络问题或文章已被删除"
+            
+            self.root.after(0, lambda: self.progress_label.config(
+                text=f"{'停止' if self.stop_export_flag else '完成'}: 成功 {success} 篇，失败 {failed} 篇"))
+            self.root.after(0, lambda: self.update_status(f"导出{'已停止' if self.stop_export_flag else '完成'}: 成功 {success}/{stats['listed']} 篇文章"))
+            self.root.after(0, lambda: self.show_info(result_msg))
+            
+        except Exception as e:
+            self.exporting = False
+            import traceback
+            error_detail = traceback.format_exc()
+            print(f"流水线导出失败详细错误: {error_detail}")
+            error_msg = f"批量导出过程中出错: {str(e)}"
+            self.root.after(0, lambda: self.stop_export_btn.config(state='disabled'))
+            self.root.after(0, lambda msg=error_msg: self.show_error(msg))
+            self.root.after(0, lambda: self.update_status("批量导出失败"))
+    
     def batch_export_articles(self, articles, output_path):
         """批量导出文章"""
         try:
@@ -1719,54 +1855,60 @@ appmsglist_action_xxx=...; ua_id=...; wxuin=...
             success = 0
             failed = 0
             
-            for i, article in enumerate(articles):
-                # 检查是否需要停止
-                if self.stop_export_flag:
-                    self.root.after(0, lambda: self.update_status("导出已停止"))
-                    self.root.after(0, lambda: self.progress_label.config(
-                        text=f"已停止: 成功 {success} 篇，失败 {failed} 篇 (共处理 {i}/{total} 篇)"))
-                    break
+            if self.use_async_engine.get():
+                success, failed, processed = self.async_batch_export_articles(articles, output_path)
+                i = processed - 1
+            else:
+                for i, article in enumerate(articles):
+                    # 检查是否需要停止
+                    if self.stop_export_flag:
+                        self.root.after(0, lambda: self.update_status("导出已停止"))
+                        self.root.after(0, lambda: self.progress_label.config(
+                            text=f"已停止: 成功 {success} 篇，失败 {failed} 篇 (共处理 {i}/{total} 篇)"))
+                        break
                 
-                try:
-                    # 更新进度
-                    progress = (i / total) * 100
-                    self.root.after(0, lambda p=progress: self.progress_var.set(p))
-                    self.root.after(0, lambda i=i, total=total: 
-                                  self.progress_label.config(text=f"正在下载: {i+1}/{total} - {article['title'][:20]}..."))
+                    try:
+                        # 更新进度
+                        progress = (i / total) * 100
+                        self.root.after(0, lambda p=progress: self.progress_var.set(p))
+                        self.root.after(0, lambda i=i, total=total: 
+                                      self.progress_label.config(text=f"正在下载: {i+1}/{total} - {article['title'][:20]}..."))
                     
-                    # 获取文章内容
-                    article_data = self.downloader.get_article_content(article['link'])
+                        # 获取文章内容
+                        started = time.perf_counter()
+                        article_data = self.downloader.get_article_content(article['link'])
                     
-                    # 保存文章
-                    format_type = self.export_format.get()
-                    filepath = self.downloader.save_article(article_data, output_path, format_type)
+                        # 保存文章
+                        format_type = self.export_format.get()
+                        filepath = self.downloader.save_article(article_data, output_path, format_type)
+                        elapsed = time.perf_counter() - started
+                        self.downloader.pacing.observe(PACE_ARTICLE, elapsed)
+                        self.downloader.metrics.observe_article(True, elapsed)
+                        self.record_export_result(article, filepath)
                     
-                    success += 1
-                    print(f"成功下载并保存: {article['title'][:30]}... -> {os.path.basename(filepath)}")
+                        success += 1
                     
-                    # 人类点击速度：每篇文章间隔2-4秒，模拟真实用户行为
-                    sleep_time = random.uniform(2.0, 4.0)
-                    self.root.after(0, lambda t=sleep_time: 
-                                  self.update_status(f"下载完成，等待 {t:.1f} 秒后继续..."))
+                        # 人类点击速度：每篇文章之间按节奏策略等待，模拟真实用户行为（缓存命中时没有请求，不必等待）
+                        if not article_data.from_cache:
+                            self.pace_between_articles()
                     
-                    # 分段睡眠，支持中断
-                    for _ in range(int(sleep_time * 2)):  # 每0.5秒检查一次
                         if self.stop_export_flag:
                             break
-                        time.sleep(0.5)
-                    
-                    if self.stop_export_flag:
-                        break
                     
-                except Exception as e:
-                    failed += 1
-                    print(f"下载文章失败: {article.get('title', '')}, 错误: {e}")
-                    # 如果失败，稍等一下再继续
-                    time.sleep(random.uniform(1, 2))
+                    except Exception as e:
+                        failed += 1
+                        self.downloader.metrics.observe_article(False)
+                        self.record_export_result(article, None, e)
+                        print(f"下载文章失败: {article.get('title', '')}, 错误: {e}")
+                        # 如果失败，稍等一下再继续
+                        self.downloader.pacing.pause(PACE_FAILURE, lambda: self.stop_export_flag)
+            self.finish_export_job()
             
             # 完成导出
             self.exporting = False
             self.root.after(0, lambda: self.stop_export_btn.config(state='disabled'))
+            print(self.downloader.pacing.metrics.summary())
+            print(self.downloader.tracer.summary_table())
             
             if self.stop_export_flag:
                 result_msg = f"导出已停止！\n\n📊 统计信息:\n✅ 成功: {success} 篇\n❌ 失败: {failed} 篇\n⏹️ 已处理: {i+1}/{total} 篇\n📁 保存位置: {output_path}"
@@ -1792,6 +1934,45 @@ appmsglist_action_xxx=...; ua_id=...; wxuin=...
             self.root.after(0, lambda msg=error_msg: self.show_error(msg))
             self.root.after(0, lambda: self.update_status("批量导出失败"))
         
+    def async_batch_export_articles(self, articles, output_path):
+        """使用异步引擎并发导出文章，返回 (成功数, 失败数, 已处理数)"""
+        from core.async_downloader import AsyncWeChatArticleDownloader
+        
+        async_downloader = AsyncWeChatArticleDownloader(self.config)
+        if self.downloader:
+            async_downloader.filter_config = self.downloader.filter_config
+            # 共用调度器，频率限制退避与停止导出对两个引擎同时生效
+            async_downloader.scheduler = self.downloader.scheduler
+        self.apply_export_options(async_downloader)
+        
+        def on_progress(done, total, article, filepath, error):
+            self.record_export_result(article, filepath, error)
+            self.root.after(0, lambda p=done / total * 100: self.progress_var.set(p))
+            self.root.after(0, lambda d=done, t=total, title=article.get('title', ''):
+                          self.progress_label.config(text=f"已完成: {d}/{t} - {title[:20]}..."))
+        
+        stats = async_downloader.run_export(articles, output_path, self.export_format.get(),
+                                            on_progress=on_progress,
+                                            should_stop=lambda: self.stop_export_flag)
+        return stats['success'], stats['failed'], stats['processed']
+    
+    def record_export_result(self, article, filepath, error=None):
+        """把单篇文章的导出结果写入下载台账"""
+        try:
+            fakeid = self.current_account['fakeid'] if self.current_account else None
+            job = getattr(self, 'export_job', None)
+            if filepath:
+                self.get_ledger().mark_done(article, filepath, fakeid)
+                self.get_article_index().add(article['link'])
+                if job:
+                    self.get_journal().mark_done(job['id'], article['link'], filepath)
+            else:
+                self.get_ledger().mark_failed(article, str(error), fakeid)
+                if job:
+                    self.get_journal().mark_failed(job['id'], article['link'], str(error))
+        except Exception as e:
+            print(f"写入下载台账失败: {e}")
+    
     def export_articles(self, articles):
         """导出文章"""
         if not articles:
@@ -1818,6 +1999,7 @@ appmsglist_action_xxx=...; ua_id=...; wxuin=...
             
             if not self.downloader:
                 self.downloader = WeChatArticleDownloader(self.config)
+            self.apply_export_options(self.downloader)
             
             # 创建输出目录
             output_path = self.output_dir.get()
@@ -1825,6 +2007,19 @@ appmsglist_action_xxx=...; ua_id=...; wxuin=...
                 output_path = os.path.join(output_path, self.current_account['nickname'])
             os.makedirs(output_path, exist_ok=True)
             
+            # 同一批文章中断后再次导出时跳过检查点中已完成的文章
+            links = '\n'.join(sorted(article['link'] for article in articles))
+            job = self.start_export_job(f"selected:{hashlib.sha1(links.encode('utf-8')).hexdigest()}",
+                                        output_path)
+            journal = self.get_journal()
+            if job['resumed']:
+                done = journal.done_links(job['id'])
+                articles = [article for article in articles if article['link'] not in done]
+                print(f"跳过检查点中已完成的 {len(done)} 篇文章")
+            else:
+                journal.add_items(job['id'], articles)
+                journal.finish_listing(job['id'])
+            
             total = len(articles)
             success = 0
             
@@ -1843,35 +2038,36 @@ appmsglist_action_xxx=...; ua_id=...; wxuin=...
                     self.root.after(0, lambda i=i, total=total: self.progress_label.config(text=f"正在下载第 {i+1}/{total} 篇文章"))
                     
                     # 获取文章内容
+                    started = time.perf_counter()
                     article_data = self.downloader.get_article_content(article['link'])
                     
                     # 保存文章
                     format_type = self.export_format.get()
                     filepath = self.downloader.save_article(article_data, output_path, format_type)
+                    elapsed = time.perf_counter() - started
+                    self.downloader.pacing.observe(PACE_ARTICLE, elapsed)
+                    self.downloader.metrics.observe_article(True, elapsed)
+                    self.record_export_result(article, filepath)
                     
                     success += 1
-                    print(f"成功下载并保存: {article['title'][:30]}... -> {os.path.basename(filepath)}")
                     
-                    # 人类点击速度：每篇文章间隔2-4秒
-                    sleep_time = random.uniform(2.0, 4.0)
-                    self.root.after(0, lambda t=sleep_time: 
-                                  self.update_status(f"下载完成，等待 {t:.1f} 秒后继续..."))
-                    
-                    # 分段睡眠，支持中断
-                    for _ in range(int(sleep_time * 2)):  # 每0.5秒检查一次
-                        if self.stop_export_flag:
-                            break
-                        time.sleep(0.5)
+                    # 人类点击速度：每篇文章之间按节奏策略等待（缓存命中时没有请求，不必等待）
+                    if not article_data.from_cache:
+                        self.pace_between_articles()
                     
                     if self.stop_export_flag:
                         break
                     
                 except Exception as e:
+                    self.downloader.metrics.observe_article(False)
                     print(f"导出文章失败: {article.get('title', '')}, 错误: {e}")
+            self.finish_export_job()
             
             # 完成导出
             self.exporting = False
             self.root.after(0, lambda: self.stop_export_btn.config(state='disabled'))
+            print(self.downloader.pacing.metrics.summary())
+            print(self.downloader.tracer.summary_table())
             
             if self.stop_export_flag:
                 self.root.after(0, lambda: self.progress_var.set((i+1)/total*100))
@@ -1,5 +1,46 @@
+import os
+import random
+import re
+import shutil
+import sys
+import time
+import urllib.parse
+import urllib.request
 
-def getwxlist(wxid, rootpath):
+import requests
+import yaml
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.article_id import ArticleIndex
+from core.article_store import ArticleMetaStore
+
+
+def get_article_index(rootpath):
+    """rootpath 下的已下载文章去重索引（按 __biz/mid/idx 识别同一篇文章的不同链接）"""
+    return ArticleIndex(os.path.join(rootpath, '.wefetch', 'article_index.db'))
+
+
+def get_article_store(rootpath):
+    """rootpath 下的文章列表元数据库（文章列表与保存记录，Excel 只在需要时导出）"""
+    return ArticleMetaStore(os.path.join(rootpath, '.wefetch', 'articles_meta.db'))
+
+
+def run(wxid, rootpath):
+    """列出新文章并逐篇保存，整个运行共用一个去重索引和文章列表数据库"""
+    os.makedirs(os.path.join(rootpath, '.wefetch'), exist_ok=True)
+    article_index = get_article_index(rootpath)
+    store = get_article_store(rootpath)
+    try:
+        getwxlist(wxid, rootpath, article_index, store)
+        for article in store.scan(fakeid=wxid):
+            saveData(article['link'], rootpath, article_index, store)
+    finally:
+        store.close()
+        article_index.close()
+
+
+def getwxlist(wxid, rootpath, history, store):
     with open("wechat.yaml", "r", encoding=('utf-8')) as file:
         file_data = file.read()
     config = yaml.safe_load(file_data)
@@ -21,11 +62,7 @@ def getwxlist(wxid, rootpath):
         "f": "json",
         "ajax": "1"
     }
-    wxlistfile = rootpath + "/wxlist.xlsx"
-    # 获取历史抓取记录
-    history = geturl(wxid, rootpath)
-    wb = openpyxl.load_workbook(wxlistfile)
-    ws = wb.active
+    # 历史抓取记录：已下载的文章（去重索引）和已列出的文章（文章列表数据库）
     # 在不知道公众号有多少文章的情况下，使用while语句
     # 也方便重新运行时设置页数
     i = 0
@@ -49,21 +86,20 @@ def getwxlist(wxid, rootpath):
             break
         msg = resp.json()
         if "app_msg_list" in msg:
+            new_items = []
             for item in msg["app_msg_list"]:
-                if item['link'] in history:
+                if history.contains(item['link']) or store.contains(item['link']):
                     flag = True
                     break
-                row = [item['title'], item['link']]
-                ws.append(row)
-
-                j += 1
+                new_items.append(item)
+            # 整页追加，保留接口返回的全部字段
+            j += store.append(new_items, wxid)
             print(f"第{i}页爬取成功\n")
         if flag == True:
             print(f"新增页面抓取已完成,{j}篇文章已添加\n")
             break
         # 翻页
         i += 1
-    wb.save(wxlistfile)
 
 
 def make_soup(curl):
@@ -94,7 +130,10 @@ def get_content(curl):
     return data
 
 
-def saveData(curl, rootpath):
+def saveData(curl, rootpath, article_index, store):
+    if article_index.contains(curl):
+        print(f"跳过已下载文章: {curl}")
+        return
     data = get_content(curl)
     htmlroot = rootpath + '/html'
     image_links = []
@@ -145,11 +184,12 @@ def saveData(curl, rootpath):
 
         with open(saveDst, "wt", encoding=("utf-8")) as f:
             f.write(htmlcontent)
-        savetolist(curl, data['title'], saveDst, data['date'], rootpath)
+        savetolist(store, curl, data['title'], saveDst, data['date'])
+        article_index.add(curl)
     else:
         saveDst = "None"
         saveDate = time.strftime('%Y-%m-%d')
-        savetolist(curl, data['title'], saveDst, saveDate, rootpath)
+        savetolist(store, curl, data['title'], saveDst, saveDate)
 
 
 def validateTitle(title):
@@ -158,10 +198,6 @@ def validateTitle(title):
     return new_title
 
 
-def savetolist(curl, ctitle, lcfile, date, rootpath):
-    lclist = rootpath + '/lclist.xlsx'
-    wb = openpyxl.load_workbook(lclist)
-    ws = wb.active
-    row = [curl, ctitle, lcfile, date]
-    ws.append(row)
-    wb.save(lclist)
\ No newline at end of file
+def savetolist(store, curl, ctitle, lcfile, date):
+    result = 'success' if lcfile != "None" else 'no content'
+    store.record_result(curl, ctitle, result, output_path=lcfile)
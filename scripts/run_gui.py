@@ -7,6 +7,7 @@
 
 import sys
 import os
+import importlib.util
 
 def main():
     """主函数"""
@@ -23,40 +24,14 @@ def main():
     print("🔍 检查依赖包...")
     missing_deps = []
     
-    try:
-        import tkinter
-        print("✅ tkinter - 可用")
-    except ImportError:
-        missing_deps.append("tkinter")
-        print("❌ tkinter - 缺失")
-    
-    try:
-        import requests
-        print("✅ requests - 可用")
-    except ImportError:
-        missing_deps.append("requests")
-        print("❌ requests - 缺失")
-    
-    try:
-        import bs4
-        print("✅ beautifulsoup4 - 可用")
-    except ImportError:
-        missing_deps.append("beautifulsoup4")
-        print("❌ beautifulsoup4 - 缺失")
-    
-    try:
-        import PIL
-        print("✅ Pillow - 可用")
-    except ImportError:
-        missing_deps.append("Pillow")
-        print("❌ Pillow - 缺失")
-    
-    try:
-        import qrcode
-        print("✅ qrcode - 可用")
-    except ImportError:
-        missing_deps.append("qrcode")
-        print("❌ qrcode - 缺失")
+    # 只查找模块是否存在而不导入，Pillow/qrcode 等在用到时才加载
+    for module, package in (('tkinter', 'tkinter'), ('requests', 'requests'),
+                            ('bs4', 'beautifulsoup4'), ('PIL', 'Pillow'), ('qrcode', 'qrcode')):
+        if importlib.util.find_spec(module) is not None:
+            print(f"✅ {package} - 可用")
+        else:
+            missing_deps.append(package)
+            print(f"❌ {package} - 缺失")
     
     if missing_deps:
         print(f"\n❌ 缺少依赖包: {', '.join(missing_deps)}")
@@ -7,6 +7,7 @@
 
 import sys
 import os
+import importlib.util
 
 def main():
     """主函数"""
@@ -17,16 +18,11 @@ def main():
     
     try:
         # 检查依赖
-        try:
-            import tkinter
-            import requests
-            import bs4
-            import PIL
-            import qrcode
-            import markdownify
-            import openpyxl
-        except ImportError as e:
-            print(f"缺少依赖包: {e}")
+        # 只查找模块是否存在而不导入，Pillow/qrcode 等在用到时才加载
+        missing = [name for name in ('tkinter', 'requests', 'bs4', 'PIL', 'qrcode', 'markdownify', 'openpyxl')
+                   if importlib.util.find_spec(name) is None]
+        if missing:
+            print(f"缺少依赖包: {', '.join(missing)}")
             print("请运行: pip install -r requirements.txt")
             return
         
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+# 与 tools/ 下的脚本一样，从仓库根目录导入 core.*
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
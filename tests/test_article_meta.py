@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""core/article_meta.py 页面元数据提取"""
+
+from core.article_meta import scan_article_meta
+
+
+def test_reads_js_declarations():
+    html = ("<script>var createTime = '2024-01-01 10:00'; var ct = \"1704074400\";\n"
+            "var msg_title = '标题&amp;副标题'.html(false);\n"
+            'var biz = "MzA5" || ""; var mid = "2650" || ""; var idx = "1" || ""; var sn = "abc" || "";</script>')
+    assert scan_article_meta(html) == {'create_time': '2024-01-01 10:00', 'ct': '1704074400',
+                                       'msg_title': '标题&副标题', 'biz': 'MzA5', 'mid': '2650',
+                                       'idx': '1', 'sn': 'abc'}
+
+
+def test_ignores_html_attributes_before_script():
+    """正文中的 data-mid/data-idx 属性出现在脚本之前时不能当作文章标识"""
+    html = ('<div data-mid="111" data-idx="9"></div>'
+            '<script>var biz = "AAA"; var mid = "222"; var idx = "1";</script>')
+    assert scan_article_meta(html) == {'biz': 'AAA', 'mid': '222', 'idx': '1'}
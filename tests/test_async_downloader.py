@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""core/async_downloader.py 异步引擎"""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from core.async_downloader import AsyncWeChatArticleDownloader  # noqa: E402
+from core.pacing import PACE_RETRY  # noqa: E402
+from core.scheduler import ENDPOINT_ARTICLE  # noqa: E402
+
+
+def test_retry_waits_use_pacing_policy():
+    """文章页面请求失败后按节奏策略的重试间隔等待"""
+    downloader = AsyncWeChatArticleDownloader({'pacing': {'policy': 'fixed', 'interval': 0.01},
+                                               'request_rate': 1000, 'request_burst': 10})
+
+    async def run():
+        try:
+            with pytest.raises(Exception, match='获取文章内容失败'):
+                await downloader.get_article_content('http://127.0.0.1:9/s/missing', max_retries=3)
+        finally:
+            await downloader.close()
+
+    asyncio.run(run())
+    assert downloader.pacing.metrics.sleep_by_kind[PACE_RETRY] >= 0.02
+    assert downloader.pacing.metrics.pauses == 2
+
+
+class CaptchaRedirect(BaseHTTPRequestHandler):
+    """文章请求被重定向到验证页，验证页正文里没有可识别的文字"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith('/s/'):
+            self.send_response(302)
+            self.send_header('Location', '/mp/wappoc_appmsgcaptcha?poc_token=x')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = '<html><body><p>请完成验证</p></body></html>'.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def test_captcha_redirect_reports_throttle(monkeypatch):
+    """按重定向后的地址识别验证页，与同步版本一样登记频率限制"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CaptchaRedirect)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    downloader = AsyncWeChatArticleDownloader({'pacing': {'policy': 'fixed', 'interval': 0}})
+    reported = []
+    monkeypatch.setattr(downloader.scheduler, 'report_throttle', lambda endpoint: reported.append(endpoint) or 0)
+
+    async def run():
+        try:
+            with pytest.raises(Exception, match='获取文章内容失败'):
+                await downloader.get_article_content(
+                    f'http://127.0.0.1:{server.server_address[1]}/s/abc', max_retries=1)
+        finally:
+            await downloader.close()
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.shutdown()
+    assert reported == [ENDPOINT_ARTICLE]
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""tools/corpus 标准输出：转换结果与 <名称>.expected.md / .expected.html / .filtered.md 逐字节一致"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+from bench_convert import CORPUS_DIR, GOLDEN_SUFFIXES, convert_all, load_corpus
+from core.wechat_downloader_core import WeChatArticleDownloader
+
+PAGES = load_corpus()
+
+
+@pytest.fixture(scope='module')
+def shanghai_tz():
+    """发布时间按本地时区格式化，标准输出按 Asia/Shanghai 生成"""
+    if not hasattr(time, 'tzset'):
+        pytest.skip('需要 time.tzset')
+    original = os.environ.get('TZ')
+    os.environ['TZ'] = 'Asia/Shanghai'
+    time.tzset()
+    yield
+    if original is None:
+        os.environ.pop('TZ', None)
+    else:
+        os.environ['TZ'] = original
+    time.tzset()
+
+
+@pytest.fixture(scope='module')
+def downloader():
+    return WeChatArticleDownloader()
+
+
+@pytest.mark.parametrize('name,html', PAGES, ids=[name for name, _ in PAGES])
+def test_matches_golden(shanghai_tz, downloader, tmp_path, name, html):
+    outputs = convert_all(downloader, name, html, str(tmp_path))
+    for step, suffix in GOLDEN_SUFFIXES.items():
+        with open(os.path.join(CORPUS_DIR, name + suffix), 'r', encoding='utf-8', newline='') as f:
+            expected = f.read()
+        assert outputs[step] == expected, f"{name}{suffix} 与当前输出不一致"
+
+
+def test_corpus_not_empty():
+    assert len(PAGES) >= 5
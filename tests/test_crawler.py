@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""core/crawler.py 跨进程任务队列的请求预算"""
+
+from core.crawler import JOB_ARTICLE, CrawlQueue
+
+
+def articles(count: int) -> list:
+    return [{'link': f'https://mp.weixin.qq.com/s?__biz=MzA5&mid={n}&idx=1'} for n in range(count)]
+
+
+def test_zero_rates_are_unlimited(tmp_path):
+    """request_rate / account_rate 为 0 时不限制，不会除以零"""
+    queue = CrawlQueue(str(tmp_path / 'crawl.db'), rate=0, burst=1, account_rate=0, account_burst=1)
+    queue.add_account('fake', '测试号')
+    queue.enqueue_articles('fake', articles(5), lambda link: link)
+    claimed = [queue.claim('w1')[0] for _ in range(6)]
+    assert [job['kind'] for job in claimed[:5]] == [JOB_ARTICLE] * 5
+    assert claimed[5]['ref'] == '0'
+
+
+def test_budget_limits_claims(tmp_path):
+    queue = CrawlQueue(str(tmp_path / 'crawl.db'), rate=0.5, burst=2, account_rate=10, account_burst=10)
+    queue.add_account('fake')
+    queue.enqueue_articles('fake', articles(5), lambda link: link)
+    assert queue.claim('w1')[0] and queue.claim('w1')[0]
+    job, wait = queue.claim('w1')
+    assert job is None and 0 < wait <= 2
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""图片本地化顺序：各条导出路径都在清理 data-type 之前下载图片"""
+
+import pytest
+
+from core.converter import render_job
+from core.wechat_downloader_core import WeChatArticleDownloader
+
+PAGE = """<html><head><title>t</title></head><body>
+<h1 id="activity-name">图片测试</h1>
+<div class="rich_media_content" id="js_content">
+<p>正文</p>
+<p><img data-src="https://mmbiz.qpic.cn/mmbiz_png/a/640?wx_fmt=png" data-type="png"></p>
+<p><img data-src="https://mmbiz.qpic.cn/mmbiz_gif/b/640?wx_fmt=gif" data-type="gif"></p>
+</div></body></html>"""
+URL = 'https://mp.weixin.qq.com/s/order'
+
+
+@pytest.fixture
+def downloader(monkeypatch):
+    downloader = WeChatArticleDownloader()
+    monkeypatch.setattr(downloader, 'fetch_image', lambda link, cached=None: (link.encode(), None, None))
+    return downloader
+
+
+def assert_typed(content: str) -> None:
+    assert '.png' in content and '.gif' in content
+    assert '.jpg' not in content
+
+
+def test_html_path(downloader, tmp_path):
+    page, _ = downloader.convert_to_html(downloader.parse_article_html(PAGE, URL), str(tmp_path))
+    assert_typed(page)
+
+
+def test_markdown_path(downloader, tmp_path):
+    markdown, _ = downloader.convert_to_markdown(downloader.parse_article_html(PAGE, URL), str(tmp_path))
+    assert_typed(markdown)
+
+
+@pytest.mark.parametrize('format_type', ['markdown', 'html'])
+def test_conversion_job_path(downloader, tmp_path, format_type):
+    job = downloader.build_conversion_job(downloader.parse_article_html(PAGE, URL), str(tmp_path), format_type)
+    content, _ = render_job(job)
+    assert_typed(content)
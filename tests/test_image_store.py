@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""core/image_store.py 全局图片仓库"""
+
+import json
+import os
+
+from core.image_store import ImageStore
+
+DATA = b'\x89PNG same bytes'
+HASH = 'ab' * 32
+
+
+def test_same_bytes_share_one_blob(tmp_path):
+    """相同内容先按 png 再按 jpg 写入时只有一个仓库文件，两个链接都指向它"""
+    store = ImageStore(str(tmp_path / 'store'))
+    png_path = store.put(HASH, 'png', DATA)
+    jpg_path = store.put(HASH, 'jpg', DATA)
+    assert png_path == jpg_path == store.blob_path(HASH, 'jpg')
+
+    first = tmp_path / 'a' / 'images' / f'{HASH}.png'
+    second = tmp_path / 'b' / 'images' / f'{HASH}.jpg'
+    store.link(HASH, 'png', str(first))
+    store.link(HASH, 'jpg', str(second))
+    assert os.path.samefile(first, png_path) and os.path.samefile(second, png_path)
+
+    store.GC_GRACE = 0
+    assert store.gc() == (0, 0)
+    assert second.read_bytes() == DATA
+    assert store.stats()['blobs'] == 1 and store.stats()['refs'] == 2
+    store.close()
+
+
+def test_gc_removes_unreferenced(tmp_path):
+    store = ImageStore(str(tmp_path / 'store'))
+    blob = store.put(HASH, 'png', DATA)
+    dest = tmp_path / 'a' / 'images' / f'{HASH}.png'
+    store.link(HASH, 'png', str(dest))
+
+    # 宽限期内即使没有引用也保留
+    dest.unlink()
+    assert store.gc() == (0, 0)
+
+    store.GC_GRACE = 0
+    assert store.gc() == (1, len(DATA))
+    assert not os.path.exists(blob)
+    assert not store.contains(HASH)
+    store.close()
+
+
+def test_gc_skips_temp_and_recent_files(tmp_path):
+    store = ImageStore(str(tmp_path / 'store'))
+    folder = tmp_path / 'store' / 'cd' / 'cdcd'
+    folder.mkdir(parents=True)
+    temp = folder / f".{'cd' * 32}.png.1.2.tmp"
+    temp.write_bytes(DATA)
+    recent = folder / f"{'cd' * 32}.png"
+    recent.write_bytes(DATA)
+
+    assert store.gc() == (0, 0)
+    assert temp.exists() and recent.exists()
+
+    old = recent.stat().st_mtime - 2 * ImageStore.GC_GRACE
+    os.utime(recent, (old, old))
+    os.utime(temp, (old, old))
+    assert store.gc() == (1, len(DATA))
+    assert temp.exists() and not recent.exists()
+    store.close()
+
+
+def test_imports_legacy_index(tmp_path):
+    root = tmp_path / 'store'
+    root.mkdir()
+    ref = str(tmp_path / 'a' / 'images' / f'{HASH}.png')
+    (root / 'index.json').write_text(json.dumps({HASH: {'ext': 'png', 'size': 3, 'refs': [ref]}}))
+
+    store = ImageStore(str(root))
+    assert store.contains(HASH)
+    assert store.blob_path(HASH, 'jpg').endswith(f'{HASH}.png')
+    assert store.stats()['refs'] == 1
+    assert not (root / 'index.json').exists()
+    store.close()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""core/log.py 日志配置与重复消息限制"""
+
+import logging
+
+from core.log import ROOT_LOGGER, RepeatFilter, TextFormatter
+
+
+def make_record(msg='图片下载失败，URL: %s', args=('http://a',), level=logging.WARNING):
+    return logging.LogRecord('wefetch.test', level, __file__, 1, msg, args, None)
+
+
+def test_repeat_filter_limits_and_keeps_msg():
+    repeat = RepeatFilter(limit=2, window=60)
+    formatter = TextFormatter()
+    records = [make_record() for _ in range(4)]
+    allowed = [repeat.filter(record) for record in records]
+
+    assert allowed == [True, True, True, False]
+    assert all(record.msg == '图片下载失败，URL: %s' for record in records)
+    assert formatter.format(records[2]).endswith('(之后 60 秒内的相同消息不再输出)')
+    assert '之后' not in formatter.format(records[0])
+
+
+def test_repeat_filter_reports_suppressed_count():
+    repeat = RepeatFilter(limit=1, window=60)
+    for _ in range(4):
+        repeat.filter(make_record())
+    # 窗口结束后的下一条注明省略的条数
+    repeat.window = 0
+    record = make_record()
+    assert repeat.filter(record)
+    assert '省略了 2 条相同消息' in TextFormatter().format(record)
+    assert record.msg == '图片下载失败，URL: %s'
+
+
+def test_info_not_limited():
+    repeat = RepeatFilter(limit=1, window=60)
+    assert all(repeat.filter(make_record('已保存: %s', ('a',), logging.INFO)) for _ in range(5))
+
+
+def test_downloader_does_not_configure_logging():
+    from core.wechat_downloader_core import WeChatArticleDownloader
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    before = list(logger.handlers), logger.level
+    WeChatArticleDownloader({'log_level': 'DEBUG', 'log_format': 'json'})
+    assert (list(logger.handlers), logger.level) == before
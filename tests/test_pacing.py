@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""core/pacing.py 节奏策略"""
+
+import asyncio
+
+from core.pacing import PACE_RETRY, FixedPacing, create_pacing
+
+
+def test_pause_async_records_sleep():
+    pacing = FixedPacing(0.01)
+    slept = asyncio.run(pacing.pause_async(PACE_RETRY))
+    assert slept >= 0.01
+    assert pacing.metrics.pauses == 1
+    assert pacing.metrics.sleep_by_kind[PACE_RETRY] == slept
+
+
+def test_unknown_policy_falls_back_to_random():
+    assert create_pacing({'policy': 'nope'}).name == 'random'
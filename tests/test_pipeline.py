@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""core/pipeline.py 流水线停止：停止后不再列出和抓取新文章，已抓取的文章处理完后正常退出"""
+
+import threading
+
+import pytest
+
+from core.pipeline import ExportPipeline
+from core.scheduler import RequestCancelled
+from core.wechat_downloader_core import WeChatArticleDownloader
+
+PAGE = """<html><head><title>t</title></head><body>
+<h1 id="activity-name">文章{n}</h1>
+<div class="rich_media_content" id="js_content"><p>正文{n}</p></div>
+</body></html>"""
+TOTAL = 50
+
+
+def link(n: int) -> str:
+    return f'https://mp.weixin.qq.com/s?__biz=MzA5&mid={n}&idx=1&sn=s{n}'
+
+
+def listing():
+    for n in range(TOTAL):
+        yield {'link': link(n), 'title': f'文章{n}'}
+
+
+@pytest.fixture
+def downloader(monkeypatch):
+    downloader = WeChatArticleDownloader({'pacing': {'policy': 'fixed', 'interval': 0}})
+    downloader.fetched = []
+
+    def get_article_content(url):
+        downloader.fetched.append(url)
+        n = int(url.split('mid=')[1].split('&')[0])
+        return downloader.parse_article_html(PAGE.format(n=n), url)
+
+    monkeypatch.setattr(downloader, 'get_article_content', get_article_content)
+    return downloader
+
+
+def run(pipeline: ExportPipeline, articles) -> dict:
+    """在线程中运行，停止后没有退出（阶段之间死锁）时测试失败而不是挂起"""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(pipeline.run(articles)), daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive(), '流水线停止后没有退出'
+    return result
+
+
+def test_stop_drains_fetched_articles(downloader, tmp_path):
+    stop = threading.Event()
+    results = []
+
+    def on_result(article, filepath, error):
+        results.append((article['link'], filepath, error))
+        if len(results) == 3:
+            stop.set()
+
+    pipeline = ExportPipeline(downloader, str(tmp_path), fetch_workers=2, queue_size=1,
+                              on_result=on_result, should_stop=stop.is_set)
+    stats = run(pipeline, listing())
+
+    assert stats['stopped']
+    assert 3 <= stats['processed'] < TOTAL
+    assert stats['listed'] < TOTAL
+    # 已抓取的文章都写完了，没有被丢弃
+    assert sorted(downloader.fetched) == sorted(link for link, _, _ in results)
+    assert stats['success'] == stats['processed'] == len(results)
+    assert all(error is None and filepath for _, filepath, error in results)
+    assert len(list(tmp_path.glob('*.md'))) == len(results)
+
+
+def test_cancelled_request_stops_without_failure(downloader, monkeypatch, tmp_path):
+    fetch = downloader.get_article_content
+
+    def cancel_after_two(url):
+        if len(downloader.fetched) >= 2:
+            raise RequestCancelled()
+        return fetch(url)
+
+    monkeypatch.setattr(downloader, 'get_article_content', cancel_after_two)
+    stop = threading.Event()
+
+    def on_result(article, filepath, error):
+        if len(downloader.fetched) >= 2:
+            stop.set()
+
+    pipeline = ExportPipeline(downloader, str(tmp_path), queue_size=1,
+                              on_result=on_result, should_stop=stop.is_set)
+    stats = run(pipeline, listing())
+
+    assert stats['stopped']
+    assert stats['failed'] == 0
+    assert stats['success'] == stats['processed'] == 2
+
+
+def test_listing_error_ends_pipeline(downloader, tmp_path):
+    def broken_listing():
+        yield {'link': link(1), 'title': '文章1'}
+        raise RuntimeError('列表接口异常')
+
+    stats = run(ExportPipeline(downloader, str(tmp_path)), broken_listing())
+
+    assert not stats['stopped']
+    assert stats['listed'] == stats['success'] == 1
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""core/scheduler.py 令牌桶与请求调度器"""
+
+from core.metrics import CrawlMetrics
+from core.scheduler import ENDPOINT_LIST, RequestScheduler, TokenBucket
+
+
+def test_bucket_burst_then_waits():
+    """容量内的请求不等待，之后按速率排队（令牌透支，等待时间逐个累加）"""
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == 0 and bucket.reserve() == 0
+    first = bucket.reserve()
+    second = bucket.reserve()
+    assert 0 < first <= 0.1
+    assert 0.1 < second <= 0.2
+
+
+def test_bucket_refills_over_time(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('core.scheduler.time.monotonic', lambda: now[0])
+    bucket = TokenBucket(rate=2, capacity=2)
+    bucket.reserve(2)
+    assert bucket.reserve() == 0.5
+    now[0] += 1.5
+    # 1.5 秒补回 3 个令牌，但不超过容量
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0.5
+
+
+def test_bucket_unlimited_and_configure(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('core.scheduler.time.monotonic', lambda: now[0])
+    bucket = TokenBucket(rate=0, capacity=1)
+    assert all(bucket.reserve() == 0 for _ in range(5))
+
+    bucket = TokenBucket(rate=1, capacity=4)
+    # 缩小容量时已有令牌随之减少
+    bucket.configure(rate=1, capacity=1)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 1.0
+
+
+def test_configure_keeps_wiring():
+    """crawler 就地调整调度器参数，tracer/metrics 仍然有效"""
+    scheduler = RequestScheduler(rate=2, burst=4)
+    metrics = CrawlMetrics()
+    scheduler.metrics = metrics
+    scheduler.configure(rate=0, burst=1, base_backoff=0, max_backoff=0)
+
+    assert scheduler.bucket.rate == 0 and scheduler.bucket.capacity == 1
+    assert scheduler.report_throttle(ENDPOINT_LIST) == 0
+    scheduler.extend_backoff(ENDPOINT_LIST, 30)
+    rendered = metrics.render()
+    assert 'wefetch_throttle_events_total{endpoint="list"} 1' in rendered
+    assert 'wefetch_throttle_backoff_seconds_total{endpoint="list"} 30' in rendered
+
+
+def test_extend_backoff_only_counts_extra_time():
+    scheduler = RequestScheduler(base_backoff=10, max_backoff=10, jitter=0)
+    metrics = CrawlMetrics()
+    scheduler.metrics = metrics
+    scheduler.report_throttle(ENDPOINT_LIST)
+    scheduler.extend_backoff(ENDPOINT_LIST, 5)
+    assert 'wefetch_throttle_backoff_seconds_total{endpoint="list"} 10' in metrics.render()
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""SQLite 存储：下载台账、任务检查点、页面/图片URL缓存、文章元数据库、去重索引"""
+
+from core.article_id import ArticleIndex
+from core.article_store import ArticleMetaStore
+from core.image_cache import ImageUrlCache
+from core.journal import ITEM_DONE, ITEM_FAILED, ITEM_PENDING, ExportJournal
+from core.ledger import STATUS_FAILED, STATUS_PENDING, DownloadLedger
+from core.page_cache import ArticlePageCache
+
+LONG_URL = 'https://mp.weixin.qq.com/s?__biz=MzA5&mid=2650&idx=1&sn=abc'
+# 同一篇文章的 http 链接、参数顺序不同、带片段
+SAME_ARTICLE = 'http://mp.weixin.qq.com/s?idx=1&mid=2650&__biz=MzA5&sn=abc#rd'
+SHORT_URL = 'https://mp.weixin.qq.com/s/AbCdEf'
+# 2024-05-15 12:00 UTC，任何时区都在五月
+MAY = 1715774400
+
+
+def article(n: int, **fields) -> dict:
+    data = {'link': f'https://mp.weixin.qq.com/s?__biz=MzA5&mid={n}&idx=1&sn=s{n}',
+            'title': f'文章{n}', 'aid': f'{n}_1', 'appmsgid': n, 'itemidx': 1, 'create_time': MAY + n}
+    data.update(fields)
+    return data
+
+
+def test_ledger_round_trip(tmp_path):
+    db = str(tmp_path / 'ledger.db')
+    output = tmp_path / '文章1.md'
+    output.write_text('正文', encoding='utf-8')
+    ledger = DownloadLedger(db)
+    ledger.mark(article(1), STATUS_PENDING, 'fake')
+    ledger.mark(article(2), STATUS_PENDING, 'fake')
+    ledger.mark_done(article(1), str(output), 'fake')
+    ledger.mark_failed(article(2), '超时', 'fake')
+    ledger.close()
+
+    ledger = DownloadLedger(db)
+    assert ledger.is_downloaded(article(1))
+    # aid 或 appmsgid+itemidx 匹配即视为已下载
+    assert ledger.is_downloaded({'aid': '1_1'})
+    assert ledger.is_downloaded({'appmsgid': 1, 'itemidx': 1})
+    assert not ledger.is_downloaded(article(2))
+    assert ledger.downloaded_links('fake') == {article(1)['link']}
+    assert ledger.count('fake') == 1 and ledger.count('fake', STATUS_FAILED) == 1
+
+    record = ledger.get(article(1)['link'])
+    assert record['output_path'] == str(output) and len(record['content_hash']) == 64
+    assert ledger.get(article(2)['link'])['error'] == '超时'
+    assert [a['link'] for a in ledger.unfinished_articles('fake')] == [article(2)['link']]
+
+    # 已完成的文章重新列出时不会退回待下载
+    ledger.mark(article(1), STATUS_PENDING, 'fake')
+    assert ledger.is_downloaded(article(1))
+    ledger.close()
+
+
+def test_ledger_sync_state_only_advances(tmp_path):
+    ledger = DownloadLedger(str(tmp_path / 'ledger.db'))
+    assert ledger.get_sync_state('fake') is None
+    ledger.update_sync_state('fake', MAY + 10, 10)
+    ledger.update_sync_state('fake', MAY + 5, 5)
+    state = ledger.get_sync_state('fake')
+    assert (state['last_create_time'], state['last_appmsgid']) == (MAY + 10, 10)
+    assert DownloadLedger.is_at_or_below(article(10), state)
+    assert not DownloadLedger.is_at_or_below(article(11), state)
+    ledger.close()
+
+
+def test_ledger_import_existing(tmp_path):
+    (tmp_path / 'a.md').write_text(f'# a\n\n原文链接: {LONG_URL}\n', encoding='utf-8')
+    (tmp_path / 'b.txt').write_text(f'原文链接: {SHORT_URL}\n', encoding='utf-8')
+    ledger = DownloadLedger(str(tmp_path / 'ledger.db'))
+    assert ledger.import_existing(str(tmp_path), 'fake') == 1
+    assert ledger.downloaded_links('fake') == {LONG_URL}
+    ledger.close()
+
+
+def test_journal_resume(tmp_path):
+    db = str(tmp_path / 'journal.db')
+    journal = ExportJournal(db)
+    job = journal.open_job('fake', '/out', 'markdown')
+    assert not job['resumed']
+    assert journal.add_items(job['id'], [article(1), article(2), article(3)]) == 3
+    assert not journal.add_item(job['id'], article(1))
+    journal.mark_done(job['id'], article(1)['link'], '/out/1.md')
+    journal.mark_failed(job['id'], article(2)['link'], '超时')
+    journal.checkpoint_listing(job['id'], begin=5, page=2, newest=article(3))
+    journal.close()
+
+    # 崩溃后重新打开：接着同一个任务，从上次的列表位置继续
+    journal = ExportJournal(db)
+    resumed = journal.open_job('fake', '/out', 'markdown')
+    assert resumed['resumed'] and resumed['id'] == job['id']
+    assert (resumed['list_begin'], resumed['list_page']) == (5, 2)
+    assert resumed['newest']['link'] == article(3)['link']
+    assert [a['link'] for a in journal.pending_items(job['id'])] == [article(2)['link'], article(3)['link']]
+    assert journal.done_links(job['id']) == {article(1)['link']}
+    assert journal.progress(job['id']) == {ITEM_PENDING: 1, ITEM_DONE: 1, ITEM_FAILED: 1}
+
+    # 格式不同是另一个任务；任务结束后相同任务键开始新任务
+    assert not journal.open_job('fake', '/out', 'html')['resumed']
+    journal.finish_listing(job['id'])
+    journal.finish(job['id'])
+    fresh = journal.open_job('fake', '/out', 'markdown')
+    assert not fresh['resumed'] and fresh['id'] != job['id']
+    journal.close()
+
+
+def test_page_cache_round_trip(tmp_path):
+    db = str(tmp_path / 'page_cache.db')
+    cache = ArticlePageCache(db)
+    assert cache.get(LONG_URL) is None
+    cache.put(SHORT_URL, '<html>正文</html>', biz='MzA5', mid='2650', idx='1')
+    cache.close()
+
+    cache = ArticlePageCache(db)
+    # 短链接按下载时登记的映射命中，长链接按页面中的文章标识命中
+    assert cache.get(SHORT_URL) == '<html>正文</html>'
+    assert cache.get(SAME_ARTICLE) == '<html>正文</html>'
+    stats = cache.stats()
+    assert stats['pages'] == 1 and stats['hits'] == 2 and stats['misses'] == 0
+    assert stats['raw_bytes'] == len('<html>正文</html>'.encode('utf-8'))
+    cache.clear()
+    assert cache.get(SHORT_URL) is None
+    cache.close()
+
+
+def test_page_cache_keys_on_url_ids(tmp_path):
+    """链接带文章标识时以链接为准，页面中的标识与链接不一致时不缓存"""
+    cache = ArticlePageCache(str(tmp_path / 'page_cache.db'))
+    cache.put(article(1)['link'], '<html>1</html>')
+    cache.put(article(2)['link'], '<html>2</html>', biz='MzA5', mid='1', idx='1')
+    assert cache.get(article(1)['link']) == '<html>1</html>'
+    assert cache.get(article(2)['link']) is None
+    assert cache.stats()['pages'] == 1
+    cache.close()
+
+
+def test_page_cache_expiry_and_eviction(tmp_path):
+    cache = ArticlePageCache(str(tmp_path / 'page_cache.db'), ttl_days=0)
+    cache.put(LONG_URL, '<html>旧</html>')
+    assert cache.get(LONG_URL) is None
+    cache.close()
+
+    # 容量上限只够一页时保留最近使用的一页
+    cache = ArticlePageCache(str(tmp_path / 'lru.db'))
+    cache.put(article(1)['link'], '<html>1</html>')
+    cache.max_bytes = cache.stats()['stored_bytes']
+    cache.put(article(2)['link'], '<html>2</html>')
+    assert cache.get(article(1)['link']) is None
+    assert cache.get(article(2)['link']) == '<html>2</html>'
+    cache.close()
+
+
+def test_image_url_cache_round_trip(tmp_path):
+    db = str(tmp_path / 'image_cache.db')
+    cache = ImageUrlCache(db)
+    url = 'https://mmbiz.qpic.cn/mmbiz_png/a/640?wx_fmt=png'
+    assert cache.lookup(url) is None
+    cache.record(url, 'ab' * 32, 'png', etag='"e1"', size=10)
+    cache.record(url, 'cd' * 32, 'png', etag='"e2"', last_modified='Wed, 15 May 2024 12:00:00 GMT', size=20)
+    cache.close()
+
+    cache = ImageUrlCache(db)
+    assert cache.lookup(url) == {'img_hash': 'cd' * 32, 'ext': 'png', 'etag': '"e2"',
+                                 'last_modified': 'Wed, 15 May 2024 12:00:00 GMT', 'size': 20}
+    cache.close()
+
+
+def test_article_store_append_and_scan(tmp_path):
+    db = str(tmp_path / 'wxlist.db')
+    store = ArticleMetaStore(db)
+    store.append([article(2, copyright_type=1, tagid=[1, 2]), article(1, copyright_type=0)], 'fake')
+    # 同一篇文章再次出现时只更新有值的字段
+    store.append([{'link': SAME_ARTICLE.replace('2650', '2'), 'digest': '摘要'}])
+    store.record_result(article(1)['link'], '文章1', 'success', output_path='/out/1.md')
+    store.close()
+
+    store = ArticleMetaStore(db)
+    assert len(store) == 2
+    assert store.contains(article(1)['link']) and not store.contains(LONG_URL)
+    assert [a['title'] for a in store.scan()] == ['文章1', '文章2']
+    assert [a['title'] for a in store.scan(newest_first=True)] == ['文章2', '文章1']
+    original = list(store.scan(copyright_type=1, fakeid='fake'))
+    assert len(original) == 1
+    assert original[0]['tagid'] == [1, 2] and original[0]['digest'] == '摘要'
+    assert original[0]['title'] == '文章2'
+    assert store.months() == {'2024-05': 2}
+    assert store.results()[0]['result'] == 'success'
+    store.close()
+
+
+def test_article_index_aliases(tmp_path):
+    db = str(tmp_path / 'index.db')
+    index = ArticleIndex(db)
+    assert index.add_many([LONG_URL, SAME_ARTICLE, '']) == 1
+    index.add(SHORT_URL)
+    assert SAME_ARTICLE in index and not index.contains(article(1)['link'])
+    # 短链接下载后登记别名，之前的下载记录归并到文章标识下
+    index.alias(SHORT_URL, 'MzA5', 1, 1)
+    index.close()
+
+    index = ArticleIndex(db)
+    assert len(index) == 3
+    assert index.contains(SHORT_URL)
+    assert index.contains(article(1)['link'])
+    index.close()
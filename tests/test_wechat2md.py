@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""core/wechat2md.py 批量转换"""
+
+from core.wechat2md import WeChatArticleDownloader
+
+
+def test_process_url_fetch_failure(tmp_path, monkeypatch):
+    """标题抓取失败（soup 为 None）时返回 False，不中断批量处理"""
+    downloader = WeChatArticleDownloader(str(tmp_path / 'config.json'))
+    monkeypatch.setattr(downloader, 'get_title_with_retry', lambda url: (None, None, None))
+
+    url_data = {'url': 'https://mp.weixin.qq.com/s/missing', 'account': '测试号'}
+    assert downloader.process_url(url_data, str(tmp_path)) is False
+    assert list((tmp_path / '测试号').iterdir()) == []
+
+
+def test_process_url_without_content(tmp_path, monkeypatch):
+    """页面有标题但没有正文时不写文件"""
+    from bs4 import BeautifulSoup
+
+    downloader = WeChatArticleDownloader(str(tmp_path / 'config.json'))
+    soup = BeautifulSoup('<h1 id="activity-name">标题</h1>', 'lxml')
+    monkeypatch.setattr(downloader, 'get_title_with_retry', lambda url: ('标题', soup, {}))
+
+    url_data = {'url': 'https://mp.weixin.qq.com/s/empty', 'account': '测试号'}
+    assert downloader.process_url(url_data, str(tmp_path)) is False
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+转换步骤微基准与标准输出校验
+
+tools/corpus 中保存了几类典型的文章页面（短文、图片很多、表格/代码、视频/音频、长文章），
+页面中的图片已是本地路径，转换时不访问网络。对每篇文章分别计时解析页面、转换Markdown、
+转换HTML、按关键词过滤段落 (filter_paragraphs) 和移除不可见字符 (remove_nonvisible_chars)，
+多轮取最小/中位数/平均耗时；同时把转换结果与语料目录中的标准输出逐字节比较，
+优化转换流程后既能看到速度变化，也能确认输出没有改变。
+
+标准输出文件与页面同名：<名称>.expected.md、<名称>.expected.html、<名称>.filtered.md。
+转换结果有意改变时用 --update 重新生成。发布时间按 Asia/Shanghai 时区格式化，
+不同机器上的结果一致。
+
+用法:
+    python tools/bench_convert.py                       # 校验并计时全部语料
+    python tools/bench_convert.py -n 50 --only long_text
+    python tools/bench_convert.py --update              # 重新生成标准输出
+    python tools/bench_convert.py --save convert.json
+    python tools/bench_convert.py --compare convert.json --max-regression 0.2
+"""
+
+import argparse
+import difflib
+import glob
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.converter import filter_paragraphs, remove_nonvisible_chars
+from core.wechat_downloader_core import WeChatArticleDownloader
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+# 过滤段落时使用的关键词（语料中的短文包含这类推广段落）
+BENCH_KEYWORDS = ['点击关注', '推荐阅读', '广告']
+STEPS = ('parse', 'markdown', 'html', 'filter_paragraphs', 'remove_nonvisible_chars')
+GOLDEN_SUFFIXES = {'markdown': '.expected.md', 'html': '.expected.html', 'filter_paragraphs': '.filtered.md'}
+
+
+def load_corpus(only=None) -> list:
+    """返回 [(名称, 页面HTML)]，按名称排序"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, '*.html'))):
+        name = os.path.basename(path)
+        if name.endswith('.expected.html'):
+            continue
+        name = name[:-len('.html')]
+        if only and name not in only:
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append((name, f.read()))
+    return pages
+
+
+def convert_all(downloader: WeChatArticleDownloader, name: str, html: str, output_dir: str) -> dict:
+    """对一篇文章运行各转换步骤，返回需要与标准输出比较的结果"""
+    url = f'https://mp.weixin.qq.com/s/{name}'
+    markdown, _ = downloader.convert_to_markdown(downloader.parse_article_html(html, url), output_dir)
+    page, _ = downloader.convert_to_html(downloader.parse_article_html(html, url), output_dir)
+    return {
+        'markdown': markdown,
+        'html': page,
+        'filter_paragraphs': filter_paragraphs(markdown, BENCH_KEYWORDS),
+    }
+
+
+def time_step(fn, setup, rounds: int) -> list:
+    """每轮先调用 setup()（不计时）再计时 fn(setup结果)，返回各轮毫秒数"""
+    fn(setup())  # 预热
+    times = []
+    for _ in range(rounds):
+        arg = setup()
+        started = time.perf_counter()
+        fn(arg)
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def bench_article(downloader: WeChatArticleDownloader, name: str, html: str, output_dir: str,
+                  rounds: int) -> dict:
+    """各步骤的 {min_ms, median_ms, mean_ms}"""
+    url = f'https://mp.weixin.qq.com/s/{name}'
+    parse = lambda: downloader.parse_article_html(html, url)
+    record = parse()
+    markdown, _ = downloader.convert_to_markdown(record, output_dir)
+    steps = {
+        'parse': time_step(lambda _: parse(), lambda: None, rounds),
+        'markdown': time_step(lambda r: downloader.convert_to_markdown(r, output_dir), lambda: record, rounds),
+        # convert_to_html 会修改正文解析树，每轮重新解析
+        'html': time_step(lambda r: downloader.convert_to_html(r, output_dir), parse, rounds),
+        'filter_paragraphs': time_step(lambda text: filter_paragraphs(text, BENCH_KEYWORDS),
+                                       lambda: markdown, rounds),
+        'remove_nonvisible_chars': time_step(remove_nonvisible_chars, lambda: markdown, rounds),
+    }
+    return {step: {'min_ms': round(min(times), 3),
+                   'median_ms': round(statistics.median(times), 3),
+                   'mean_ms': round(statistics.mean(times), 3)} for step, times in steps.items()}
+
+
+def check_golden(name: str, outputs: dict, update: bool) -> list:
+    """与标准输出比较（update 时重写），返回不一致的步骤"""
+    mismatched = []
+    for step, suffix in GOLDEN_SUFFIXES.items():
+        path = os.path.join(CORPUS_DIR, name + suffix)
+        if update:
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(outputs[step])
+            continue
+        if not os.path.exists(path):
+            print(f"缺少标准输出 {os.path.basename(path)}，先运行 --update 生成")
+            mismatched.append(step)
+            continue
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            expected = f.read()
+        if outputs[step] != expected:
+            mismatched.append(step)
+            diff = difflib.unified_diff(expected.splitlines(), outputs[step].splitlines(),
+                                        f'{name}{suffix}', '当前输出', lineterm='', n=1)
+            print('\n'.join(list(diff)[:20]))
+    return mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description='转换步骤微基准与标准输出校验')
+    parser.add_argument('-n', '--rounds', type=int, default=20, help='每个步骤的计时轮数 (默认: 20)')
+    parser.add_argument('--only', nargs='+', help='只运行这些语料（名称不含扩展名）')
+    parser.add_argument('--update', action='store_true', help='用当前转换结果重写标准输出')
+    parser.add_argument('--no-timing', action='store_true', help='只校验标准输出，不计时')
+    parser.add_argument('--save', help='把计时结果保存为基线 JSON 文件')
+    parser.add_argument('--compare', help='与基线 JSON 文件比较中位数耗时')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='与基线比较时允许的耗时增加比例 (默认: 0.25)')
+    args = parser.parse_args()
+
+    # 发布时间按本地时区格式化，固定时区使标准输出与机器无关
+    os.environ['TZ'] = 'Asia/Shanghai'
+    if hasattr(time, 'tzset'):
+        time.tzset()
+
+    pages = load_corpus(args.only)
+    if not pages:
+        raise SystemExit(f"{CORPUS_DIR} 中没有语料页面")
+
+    downloader = WeChatArticleDownloader()
+    results = {}
+    failed = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name, html in pages:
+            mismatched = check_golden(name, convert_all(downloader, name, html, output_dir), args.update)
+            if mismatched:
+                failed[name] = mismatched
+            if not args.no_timing:
+                results[name] = {'size_kb': round(len(html.encode('utf-8')) / 1024, 1),
+                                 'steps': bench_article(downloader, name, html, output_dir, args.rounds)}
+
+    if args.update:
+        print(f"已更新 {len(pages)} 篇语料的标准输出")
+    for name, html in pages:
+        status = f"不一致: {', '.join(failed[name])}" if name in failed else '一致'
+        print(f"{name}: 标准输出{status if not args.update else '已更新'}")
+
+    if results:
+        print(f"\n{'语料':14s} {'大小KB':>7s} {'步骤':24s} {'最小ms':>9s} {'中位数ms':>9s} {'平均ms':>9s}")
+        for name, result in results.items():
+            for step in STEPS:
+                stats = result['steps'][step]
+                print(f"{name:14s} {result['size_kb']:7.1f} {step:24s} {stats['min_ms']:9.3f} "
+                      f"{stats['median_ms']:9.3f} {stats['mean_ms']:9.3f}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存到 {args.save}")
+
+    regressed = False
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        for name, result in results.items():
+            for step in STEPS:
+                before = baseline.get(name, {}).get('steps', {}).get(step, {}).get('median_ms')
+                if not before:
+                    continue
+                after = result['steps'][step]['median_ms']
+                change = (after - before) / before
+                regressed |= change > args.max_regression
+                print(f"{name} {step}: 基线 {before:.3f} ms -> {after:.3f} ms ({change:+.0%}) "
+                      f"{'退化' if change > args.max_regression else '正常'}")
+
+    if failed or regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量导出内存基准
+
+用模拟文章页面（不访问网络）通过流式导出流水线导出若干篇文章，报告进程的峰值RSS。
+模拟页面除正文外带有推荐阅读/留言等节点（--chrome 条，默认150条，约3000个节点）。
+legacy 模式模拟改动前的文章结果：正文仍挂在整页解析树上，结果同时持有整页解析树；
+current 模式使用当前只保留正文子树的 ArticleRecord。两种模式各在独立子进程中运行，
+峰值RSS互不影响。另外用 tracemalloc 统计同时持有多篇文章结果时每篇占用的内存
+（异步引擎等待图片下载、流水线下游阻塞时文章结果会这样堆积）。
+
+用法:
+    python tools/bench_memory.py                 # 默认导出500篇
+    python tools/bench_memory.py -n 200 --queue-size 16
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from bench_parse import sample_article
+from core.article_meta import ArticleRecord, scan_article_meta
+from core.pacing import FixedPacing
+from core.pipeline import ExportPipeline
+from core.wechat_downloader_core import WeChatArticleDownloader
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值RSS (MB)"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class FakeResponse:
+    def __init__(self, url: str, text: str):
+        self.url = url
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """按请求现场生成文章页面，页面文本不在内存中累积"""
+
+    def __init__(self, chrome: int):
+        self.chrome = chrome
+
+    def get(self, url, **kwargs):
+        index = int(url.rsplit('=', 1)[1])
+        page = sample_article(chrome=self.chrome).replace('基准测试文章', f'基准测试文章{index}')
+        return FakeResponse(url, page)
+
+
+class LegacyRecord(ArticleRecord):
+    """改动前的结果形态：额外持有整页解析树"""
+
+    __slots__ = ('full_soup',)
+
+
+class LegacyDownloader(WeChatArticleDownloader):
+    def parse_article_html(self, html: str, url: str) -> ArticleRecord:
+        meta = scan_article_meta(html)
+        soup = BeautifulSoup(html, 'lxml')
+        title = soup.find('h1', id="activity-name").text.strip()
+        record = LegacyRecord.from_meta(title, url, soup.find('div', {'class': 'rich_media_content'}), meta)
+        record.full_soup = soup
+        return record
+
+
+def run_export(mode: str, count: int, queue_size: int, chrome: int) -> dict:
+    """在当前进程中导出 count 篇模拟文章，返回统计"""
+    cls = LegacyDownloader if mode == 'legacy' else WeChatArticleDownloader
+    downloader = cls({'request_rate': 1e6, 'request_burst': 1e6})
+    downloader.session = FakeSession(chrome)
+    downloader.pacing = FixedPacing(0)
+    articles = ({'title': f'基准测试文章{i}', 'link': f'https://mp.weixin.qq.com/s?bench={i}'}
+                for i in range(count))
+
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as output_dir:
+        import io
+        import contextlib
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = ExportPipeline(downloader, output_dir, queue_size=queue_size).run(articles)
+    peak = peak_rss_mb()
+    seconds = time.perf_counter() - started
+    return {
+        'mode': mode,
+        'success': stats['success'],
+        'baseline_mb': round(baseline, 1),
+        'peak_mb': round(peak, 1),
+        'seconds': round(seconds, 1),
+        'retained_kb': round(retained_per_record(downloader, chrome), 1),
+    }
+
+
+def retained_per_record(downloader: WeChatArticleDownloader, chrome: int, count: int = 20) -> float:
+    """同时持有 count 篇文章结果时平均每篇占用的内存 (KB)"""
+    pages = [FakeSession(chrome).get(f'https://mp.weixin.qq.com/s?bench={i}').text for i in range(count)]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [downloader.parse_article_html(html, f'bench-{i}') for i, html in enumerate(pages)]
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del records
+    return retained / count / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量导出峰值内存基准')
+    parser.add_argument('-n', '--count', type=int, default=500, help='导出文章数 (默认: 500)')
+    parser.add_argument('--queue-size', type=int, default=8, help='流水线队列长度 (默认: 8)')
+    parser.add_argument('--chrome', type=int, default=150, help='每页正文之外的推荐/留言条目数 (默认: 150)')
+    parser.add_argument('--mode', choices=('legacy', 'current'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if sys.platform == 'win32':
+        print("该基准依赖 resource 模块读取峰值RSS，不支持 Windows")
+        return
+
+    if args.mode:
+        print(json.dumps(run_export(args.mode, args.count, args.queue_size, args.chrome)))
+        return
+
+    page = BeautifulSoup(sample_article(chrome=args.chrome), 'lxml')
+    content = page.find('div', {'class': 'rich_media_content'})
+    print(f"文章数: {args.count}, 队列长度: {args.queue_size}, "
+          f"每页节点: {len(list(page.descendants))} (正文 {len(list(content.descendants))})")
+    for mode in ('legacy', 'current'):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--mode', mode,
+             '-n', str(args.count), '--queue-size', str(args.queue_size), '--chrome', str(args.chrome)],
+            capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:8s} 成功 {result['success']} 篇, 峰值RSS {result['peak_mb']:7.1f} MB "
+              f"(导出前 {result['baseline_mb']:.1f} MB, 增长 {result['peak_mb'] - result['baseline_mb']:.1f} MB), "
+              f"耗时 {result['seconds']} 秒, 每篇结果占用 {result['retained_kb']:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+离线吞吐基准
+
+在独立子进程中启动本地替身服务器模拟公众号平台：searchbiz 搜索、appmsg list_ex 文章列表、
+文章页面和 mmbiz.qpic.cn 图片，可设置每个响应的延迟，并按间隔返回频率限制（列表接口
+ret=200013、文章页面返回验证页）。下载器通过配置项 base_url 指向替身服务器，依次测量
+文章列表翻页、获取文章页面、下载图片、转换Markdown 以及流式导出全流程，报告每个阶段的
+文章/秒、图片/秒、CPU时间和峰值RSS。不需要登录，也不访问网络，结果可以重复对比；
+--save 把结果保存为基线，--compare 与基线比较，吞吐下降超过允许比例时以非零状态退出。
+
+文章页面默认由 bench_parse.sample_article 生成；--pages 指定保存下来的文章页面，页面中的
+图片地址改写到替身服务器，脚本中的 biz/mid/idx/sn/ct/createTime 改写为列表中对应文章的值。
+--caches 像命令行导出一样在输出目录的 .wefetch/ 中启用页面缓存、去重索引和图片URL缓存，
+测量的是实际导出路径。
+
+用法:
+    python tools/bench_offline.py                              # 默认 60 篇文章，无延迟
+    python tools/bench_offline.py -n 200 --latency 50 --image-latency 20
+    python tools/bench_offline.py --throttle-every 25 --fetch-workers 2
+    python tools/bench_offline.py --caches
+    python tools/bench_offline.py --pages saved/*.html --save offline.json
+    python tools/bench_offline.py --compare offline.json --max-regression 0.2
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_parse import sample_article
+
+BENCH_FAKEID = 'MzBenchmark=='
+BENCH_NICKNAME = '基准测试号'
+FIRST_MID = 2247480000
+BASE_CREATE_TIME = 1704074400
+THROTTLE_PAGE = '<html><body><p>环境异常</p><p>完成验证后即可继续访问</p></body></html>'
+
+# 页面脚本中标识文章的变量，改写为列表中对应文章的值
+PAGE_VARS = re.compile(r'(\bvar\s+(biz|mid|idx|sn|ct|createTime)\s*=\s*(["\']))[^"\'\r\n]*(\3)')
+IMG_ATTR = re.compile(r'(<img\b[^>]*?\bdata-src=")[^"]*(")')
+MMBIZ_HOST = re.compile(r'https?://mmbiz\.qpic\.cn/')
+STAGES = ('list', 'content', 'images', 'convert', 'export')
+
+
+class StandInServer(ThreadingHTTPServer):
+    """公众号平台替身服务器"""
+
+    daemon_threads = True
+
+    def __init__(self, port: int, args):
+        super().__init__(('127.0.0.1', port), StandInHandler)
+        self.base_url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.articles = args.count
+        self.latency = args.latency / 1000
+        self.image_latency = args.image_latency / 1000
+        self.throttle_every = args.throttle_every
+        self.image_size = args.image_kb * 1024
+        self.templates = [self.load_page(path) for path in args.pages] or \
+            [sample_article(paragraphs=args.paragraphs, images=args.images)]
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load_page(path: str) -> str:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+
+    def count(self, route: str) -> int:
+        with self._lock:
+            self.counts[route] = self.counts.get(route, 0) + 1
+            return self.counts[route]
+
+    def throttled(self, route: str) -> bool:
+        """每 throttle_every 个请求返回一次频率限制"""
+        number = self.count(route)
+        if self.throttle_every and number % self.throttle_every == 0:
+            self.count(f'{route}_throttled')
+            return True
+        return False
+
+    @staticmethod
+    def article_vars(index: int) -> dict:
+        """第 index 篇文章的标识和发布时间，列表项和文章页面共用"""
+        create_time = BASE_CREATE_TIME - index * 86400
+        return {'biz': BENCH_FAKEID, 'mid': str(FIRST_MID + index), 'idx': '1', 'sn': f'{index:032x}',
+                'ct': str(create_time),
+                'createTime': time.strftime('%Y-%m-%d %H:%M', time.localtime(create_time))}
+
+    def article_entry(self, index: int) -> dict:
+        """文章列表中的一项，字段与 app_msg_list 一致"""
+        mid = FIRST_MID + index
+        create_time = BASE_CREATE_TIME - index * 86400
+        return {
+            'aid': f'{mid}_1', 'album_id': '0', 'appmsg_album_infos': [], 'appmsgid': mid,
+            'checking': 0, 'copyright_type': index % 2, 'cover': f'{self.base_url}/mmbiz_jpg/cover{index}/0',
+            'create_time': create_time, 'digest': f'基准测试文章{index}的摘要', 'has_red_packet_cover': 0,
+            'is_pay_subscribe': 0, 'item_show_type': 0, 'itemidx': 1,
+            'link': f'{self.base_url}/s?__biz={BENCH_FAKEID}&mid={mid}&idx=1&sn={index:032x}#rd',
+            'media_duration': '0:00', 'mediaapi_publish_status': 0, 'pay_album_info': {'appmsg_album_infos': []},
+            'tagid': [], 'title': f'基准测试文章{index}', 'update_time': create_time,
+        }
+
+    def article_page(self, index: int) -> str:
+        """第 index 篇文章的页面：标题编号，文章标识与列表项一致，图片地址指向替身服务器并按文章区分"""
+        page = self.templates[index % len(self.templates)]
+        page = page.replace('基准测试文章', f'基准测试文章{index}')
+        values = self.article_vars(index)
+        page = PAGE_VARS.sub(lambda m: f'{m.group(1)}{values[m.group(2)]}{m.group(4)}', page)
+        page = MMBIZ_HOST.sub(f'{self.base_url}/', page)
+        counter = iter(range(1 << 30))
+        return IMG_ATTR.sub(
+            lambda m: f'{m.group(1)}{self.base_url}/mmbiz_png/a{index}i{next(counter)}/640?wx_fmt=png{m.group(2)}',
+            page)
+
+    def image(self, path: str) -> bytes:
+        """按路径生成固定内容的图片数据，不同图片哈希不同"""
+        seed = hashlib.sha256(path.encode()).digest()
+        return (b'\x89PNG\r\n\x1a\n' + seed * (self.image_size // len(seed) + 1))[:max(self.image_size, 64)]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, body, content_type: str) -> None:
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, data: dict) -> None:
+        self.send(json.dumps(data, ensure_ascii=False), 'application/json; charset=utf-8')
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == '/__stats':
+            with server._lock:
+                return self.send_json(dict(server.counts))
+        if url.path.startswith('/mmbiz'):
+            server.count('image')
+            time.sleep(server.image_latency)
+            return self.send(server.image(url.path), 'image/png')
+
+        time.sleep(server.latency)
+        if url.path == '/cgi-bin/searchbiz':
+            server.count('search')
+            return self.send_json({
+                'base_resp': {'ret': 0, 'err_msg': 'ok'}, 'total': 1,
+                'list': [{'fakeid': BENCH_FAKEID, 'nickname': BENCH_NICKNAME, 'alias': 'bench',
+                          'round_head_img': f'{server.base_url}/mmbiz_png/head/0', 'service_type': 1}]})
+        if url.path == '/cgi-bin/appmsg':
+            if server.throttled('list'):
+                return self.send_json({'base_resp': {'ret': 200013, 'err_msg': 'freq control'}})
+            begin = int(query.get('begin', 0))
+            count = min(int(query.get('count', 5)), 20)
+            entries = [server.article_entry(i) for i in range(begin, min(begin + count, server.articles))]
+            return self.send_json({'base_resp': {'ret': 0, 'err_msg': 'ok'},
+                                   'app_msg_cnt': server.articles, 'app_msg_list': entries})
+        if url.path == '/s':
+            if server.throttled('article'):
+                return self.send(THROTTLE_PAGE, 'text/html; charset=utf-8')
+            index = int(query.get('mid', FIRST_MID)) - FIRST_MID
+            return self.send(server.article_page(index), 'text/html; charset=utf-8')
+        self.send_error(404)
+
+
+def serve(args) -> None:
+    """替身服务器子进程：第一行输出监听地址，直到被终止"""
+    server = StandInServer(args.port, args)
+    print(server.base_url, flush=True)
+    server.serve_forever()
+
+
+@contextlib.contextmanager
+def stand_in_server(args):
+    """启动替身服务器子进程，返回其地址"""
+    command = [sys.executable, os.path.abspath(__file__), '--serve', '-n', str(args.count),
+               '--latency', str(args.latency), '--image-latency', str(args.image_latency),
+               '--throttle-every', str(args.throttle_every), '--image-kb', str(args.image_kb),
+               '--paragraphs', str(args.paragraphs), '--images', str(args.images)]
+    if args.pages:
+        command += ['--pages', *args.pages]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    try:
+        base_url = process.stdout.readline().strip()
+        if not base_url:
+            raise RuntimeError("替身服务器启动失败")
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值RSS (MB)，Windows 上返回0"""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_downloader(base_url: str, args, output_dir: str):
+    from core.wechat_downloader_core import WeChatArticleDownloader
+
+    config = {
+        'base_url': base_url,
+        'cookie': 'bench=1',
+        'request_rate': 1e6,
+        'request_burst': 1e6,
+        'throttle_backoff': 0.05,
+        'throttle_max_backoff': 0.5,
+        'image_workers': args.image_workers,
+        'pacing': {'policy': 'fixed', 'interval': 0},
+    }
+    if args.caches:
+        # 与命令行导出相同，状态文件放在输出目录的 .wefetch/ 中
+        state_dir = os.path.join(output_dir, '.wefetch')
+        os.makedirs(state_dir, exist_ok=True)
+        config.update({'page_cache': os.path.join(state_dir, 'page_cache.db'),
+                       'article_index': os.path.join(state_dir, 'article_index.db'),
+                       'image_cache': os.path.join(state_dir, 'image_cache.db')})
+    return WeChatArticleDownloader(config)
+
+
+class Stage:
+    """测量一个阶段的墙钟时间、CPU时间、等待时间和峰值RSS"""
+
+    def __init__(self, name: str, downloader):
+        self.name = name
+        self.downloader = downloader
+        self.articles = 0
+        self.images = 0
+
+    def __enter__(self):
+        self.downloader.pacing.reset_metrics()
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.wall
+        self.cpu = time.process_time() - self.cpu
+        self.waited = self.downloader.pacing.metrics.sleep_seconds
+        self.rss = peak_rss_mb()
+
+    def result(self) -> dict:
+        return {
+            'articles': self.articles,
+            'images': self.images,
+            'seconds': round(self.wall, 3),
+            'cpu_seconds': round(self.cpu, 3),
+            'wait_seconds': round(self.waited, 3),
+            'articles_per_s': round(self.articles / self.wall, 2) if self.wall else 0.0,
+            'images_per_s': round(self.images / self.wall, 2) if self.wall else 0.0,
+            'cpu_ms_per_article': round(self.cpu * 1000 / self.articles, 2) if self.articles else 0.0,
+            'peak_rss_mb': round(self.rss, 1),
+        }
+
+
+def run_stages(base_url: str, args, work_dir: str) -> dict:
+    """依次运行各阶段，返回 {阶段: 统计}"""
+    from core.pipeline import ExportPipeline
+
+    images_dir = os.path.join(work_dir, 'stages')
+    export_dir = os.path.join(work_dir, 'export')
+    downloader = make_downloader(base_url, args, images_dir)
+    results = {}
+
+    with Stage('list', downloader) as stage:
+        accounts = downloader.search_accounts(BENCH_NICKNAME, 'bench')
+        fakeid = accounts[0]['fakeid']
+        articles = []
+        while True:
+            page = downloader.get_articles_page(fakeid, 'bench', len(articles))
+            articles.extend(page)
+            if not page or len(articles) >= (downloader.last_list_total or 0):
+                break
+        stage.articles = len(articles)
+    results['list'] = stage.result()
+
+    with Stage('content', downloader) as stage:
+        records = [downloader.get_article_content(article['link']) for article in articles]
+        stage.articles = len(records)
+    results['content'] = stage.result()
+
+    with Stage('images', downloader) as stage:
+        for record in records:
+            downloader.download_images(record.content_soup, images_dir)
+            stage.images += downloader.last_image_stats.get('count', 0) - \
+                downloader.last_image_stats.get('failed', 0)
+        stage.articles = len(records)
+    results['images'] = stage.result()
+
+    # 图片已经本地化，这一阶段只有正文转换
+    with Stage('convert', downloader) as stage:
+        for record in records:
+            downloader.convert_to_markdown(record, images_dir)
+        stage.articles = len(records)
+    results['convert'] = stage.result()
+
+    # 导出使用独立的输出目录和状态文件，缓存从空开始
+    exporter = make_downloader(base_url, args, export_dir)
+    with Stage('export', exporter) as stage:
+        pipeline = ExportPipeline(exporter, export_dir,
+                                  fetch_workers=args.fetch_workers, image_workers=args.pipeline_image_workers,
+                                  queue_size=args.queue_size)
+        stats = pipeline.run(iter(articles))
+        stage.articles = stats['success']
+        image_dir = os.path.join(export_dir, 'images')
+        stage.images = len(os.listdir(image_dir)) if os.path.isdir(image_dir) else 0
+    results['export'] = stage.result()
+    if stats['failed']:
+        results['export']['failed'] = stats['failed']
+    return results
+
+
+def print_results(results: dict, server_counts: dict) -> None:
+    print(f"{'阶段':8s} {'文章':>6s} {'图片':>7s} {'耗时s':>8s} {'CPU s':>8s} {'等待s':>7s} "
+          f"{'文章/s':>8s} {'图片/s':>9s} {'CPUms/篇':>9s} {'峰值RSS MB':>11s}")
+    for name in STAGES:
+        r = results[name]
+        print(f"{name:8s} {r['articles']:6d} {r['images']:7d} {r['seconds']:8.2f} {r['cpu_seconds']:8.2f} "
+              f"{r['wait_seconds']:7.2f} {r['articles_per_s']:8.1f} {r['images_per_s']:9.1f} "
+              f"{r['cpu_ms_per_article']:9.1f} {r['peak_rss_mb']:11.1f}")
+    throttled = {key: value for key, value in server_counts.items() if key.endswith('_throttled')}
+    print(f"替身服务器请求: {', '.join(f'{key} {value}' for key, value in sorted(server_counts.items()))}")
+    if throttled:
+        print(f"已模拟频率限制: {sum(throttled.values())} 次")
+
+
+def compare(results: dict, baseline_path: str, max_regression: float) -> bool:
+    """与基线比较文章吞吐，返回是否退化"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['stages']
+    regressed = False
+    for name in STAGES:
+        before = baseline.get(name, {}).get('articles_per_s')
+        if not before:
+            continue
+        after = results[name]['articles_per_s']
+        change = (after - before) / before
+        flag = '退化' if -change > max_regression else '正常'
+        regressed |= -change > max_regression
+        print(f"{name}: 基线 {before:.1f} 篇/秒 -> {after:.1f} 篇/秒 ({change:+.0%}) {flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='离线吞吐基准（本地替身服务器）')
+    parser.add_argument('-n', '--count', type=int, default=60, help='文章数 (默认: 60)')
+    parser.add_argument('--latency', type=float, default=0, help='接口和文章页面的响应延迟，毫秒 (默认: 0)')
+    parser.add_argument('--image-latency', type=float, default=0, help='图片的响应延迟，毫秒 (默认: 0)')
+    parser.add_argument('--throttle-every', type=int, default=0,
+                        help='每N个列表/文章请求返回一次频率限制 (默认: 0 不限制)')
+    parser.add_argument('--pages', nargs='+', default=[], help='保存下来的文章页面HTML，不指定时使用模拟文章')
+    parser.add_argument('--paragraphs', type=int, default=400, help='模拟文章的段落数 (默认: 400)')
+    parser.add_argument('--images', type=int, default=40, help='模拟文章的图片数 (默认: 40)')
+    parser.add_argument('--image-kb', type=int, default=32, help='每张图片大小，KB (默认: 32)')
+    parser.add_argument('--image-workers', type=int, default=8, help='每篇文章的图片并发数 (默认: 8)')
+    parser.add_argument('--fetch-workers', type=int, default=1, help='导出流水线页面抓取线程数 (默认: 1)')
+    parser.add_argument('--pipeline-image-workers', type=int, default=1,
+                        help='导出流水线图片阶段线程数 (默认: 1)')
+    parser.add_argument('--queue-size', type=int, default=4, help='导出流水线队列长度 (默认: 4)')
+    parser.add_argument('--caches', action='store_true',
+                        help='启用页面缓存、去重索引和图片URL缓存（与命令行导出相同）')
+    parser.add_argument('--save', help='把结果保存为基线 JSON 文件')
+    parser.add_argument('--compare', help='与基线 JSON 文件比较')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='与基线比较时允许的吞吐下降比例 (默认: 0.25)')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    print(f"文章数: {args.count}, 延迟: {args.latency:g} ms (图片 {args.image_latency:g} ms), "
+          f"频率限制: {'每' + str(args.throttle_every) + '个请求' if args.throttle_every else '无'}, "
+          f"缓存: {'启用' if args.caches else '关闭'}")
+    with stand_in_server(args) as base_url, tempfile.TemporaryDirectory() as work_dir:
+        # 下载器的逐篇日志不计入输出
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = run_stages(base_url, args, work_dir)
+        import requests
+        server_counts = requests.get(f'{base_url}/__stats', timeout=10).json()
+    print_results(results, server_counts)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'options': {key: value for key, value in vars(args).items()
+                                   if key not in ('save', 'compare', 'serve', 'port')},
+                       'stages': results}, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存到 {args.save}")
+
+    if args.compare and compare(results, args.compare, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文章解析/转换 CPU 耗时基准
+
+对比旧流程（lxml解析 -> str(soup)正则取createTime -> 正文用html.parser重新解析 ->
+markdownify -> 再把Markdown用html.parser解析一遍后丢弃）与当前单次解析流程
+（原文扫描元数据 -> lxml解析一次 -> markdownify）每篇文章的CPU时间。
+
+用法:
+    python tools/bench_parse.py                      # 使用生成的模拟文章
+    python tools/bench_parse.py page1.html page2.html -n 20
+"""
+
+import argparse
+import tempfile
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import markdownify
+from bs4 import BeautifulSoup
+
+from core.wechat_downloader_core import WeChatArticleDownloader
+
+
+def sample_article(paragraphs: int = 400, images: int = 40, chrome: int = 0) -> str:
+    """生成结构与微信文章页面相近的HTML（头部脚本、正文、尾部大段脚本）
+
+    chrome 为正文之外的推荐阅读/留言条目数，用于模拟页面中与正文无关的节点。
+    """
+    extras = ''.join(
+        f'<div class="rec_item"><a href="/s?__biz=MzU1MTk2NDE4Mg==&amp;mid={i}"><span class="rec_title">'
+        f'推荐阅读{i}</span><span class="rec_meta"><em>阅读</em><em>{i}</em></span></a>'
+        f'<div class="comment"><img class="avatar" src="/avatar/{i}.png"><p class="nickname">读者{i}</p>'
+        f'<p class="comment_content">留言内容{i}</p><div class="reply"><span>作者</span><span>回复</span></div>'
+        f'</div></div>' for i in range(chrome))
+    body = []
+    for i in range(paragraphs):
+        text = f'第{i}段 正文内容，用于模拟公众号文章的长段落。' * 3
+        body.append(f'<section style="margin: 8px 0;"><p style="line-height: 1.75em;">'
+                    f'<span style="font-size: 15px;" leaf="">{text}</span></p></section>')
+        if i % (paragraphs // max(1, images)) == 0:
+            body.append(f'<p><img data-src="./images/{i:064x}.png" data-type="png" '
+                        f'data-ratio="0.5" data-w="1080"></p>')
+    script = '\n'.join(f'var cfg_{i} = "{i}";' for i in range(3000))
+    return f"""<!DOCTYPE html><html><head><meta charset="utf-8">
+<script>var biz = "MzU1MTk2NDE4Mg==" || ""; var mid = "2247489209" || ""; var idx = "1" || "";
+var sn = "67694d6afbb51b0b2a4866cd310224f8" || ""; var msg_title = '基准测试文章'.html(false);</script>
+</head><body><div id="page-content"><h1 class="rich_media_title" id="activity-name"> 基准测试文章 </h1>
+<div class="rich_media_content" id="js_content" style="visibility: hidden;">{''.join(body)}</div></div>
+<div id="js_recommend">{extras}</div>
+<script>{script}
+var ct = "1704074400"; var createTime = '2024-01-01 10:00';</script></body></html>"""
+
+
+def legacy_pipeline(html: str) -> str:
+    """旧流程（与改动前 get_article_content + convert_to_markdown 的解析步骤一致）"""
+    soup = BeautifulSoup(html, 'lxml')
+    title = soup.find('h1', id="activity-name").text.strip()
+    match = re.search(r'createTime\s+=\s*\'(.*)\'', str(soup))
+    create_time = match.group(1) if match else ''
+    content_soup = soup.find('div', {'class': 'rich_media_content'})
+    # 旧代码的 content_soup.copy 检查总是失败，正文会被重新解析一次
+    content_soup = BeautifulSoup(str(content_soup), 'html.parser')
+    markdown_content = markdownify.markdownify(str(content_soup))
+    markdown_soup = BeautifulSoup(markdown_content, 'html.parser')
+    for img in markdown_soup.find_all('img'):
+        if img.get('data-src') and not img['data-src'].startswith(('http://', 'https://')):
+            img['src'] = img['data-src']
+    return f"# {title}\n\n{create_time}\n\n{markdown_content}"
+
+
+def current_pipeline(downloader: WeChatArticleDownloader, html: str, output_dir: str) -> str:
+    """当前流程"""
+    article = downloader.parse_article_html(html, 'https://mp.weixin.qq.com/s/bench')
+    markdown, _ = downloader.convert_to_markdown(article, output_dir)
+    return markdown
+
+
+def measure(fn, pages, rounds: int) -> float:
+    """返回每篇文章的平均CPU毫秒数"""
+    fn(pages[0])  # 预热
+    started = time.process_time()
+    for _ in range(rounds):
+        for html in pages:
+            fn(html)
+    return (time.process_time() - started) * 1000 / (rounds * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文章解析CPU耗时基准')
+    parser.add_argument('files', nargs='*', help='保存下来的文章页面HTML，不指定时使用模拟文章')
+    parser.add_argument('-n', '--rounds', type=int, default=10, help='重复轮数 (默认: 10)')
+    args = parser.parse_args()
+
+    if args.files:
+        pages = []
+        for path in args.files:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                pages.append(f.read())
+    else:
+        pages = [sample_article()]
+
+    downloader = WeChatArticleDownloader()
+    with tempfile.TemporaryDirectory() as output_dir:
+        legacy = measure(legacy_pipeline, pages, args.rounds)
+        current = measure(lambda html: current_pipeline(downloader, html, output_dir),
+                          pages, args.rounds)
+
+    size = sum(len(html) for html in pages) / len(pages) / 1024
+    print(f"文章数: {len(pages)}, 平均大小: {size:.0f} KB, 轮数: {args.rounds}")
+    print(f"旧流程:   {legacy:8.1f} ms CPU/篇")
+    print(f"当前流程: {current:8.1f} ms CPU/篇")
+    print(f"节省:     {(1 - current / legacy) * 100:8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
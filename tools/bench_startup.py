@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+启动导入耗时基准
+
+在独立子进程中用 python -X importtime 导入 GUI/命令行入口模块，报告导入总耗时
+（多轮取中位数）、耗时最多的模块，以及是否加载了只在特定功能中才需要的重量级依赖
+（Selenium、Pillow、qrcode、aiohttp 等）。--save 把结果保存为基线，--compare 与基线
+比较，超过允许的退化比例时以非零状态退出，便于在定时任务/CI中跟踪启动开销。
+
+用法:
+    python tools/bench_startup.py                          # 默认测量 gui.wechat_gui 和 core.cli
+    python tools/bench_startup.py core.wechat_downloader_core -n 10 --top 15
+    python tools/bench_startup.py --save startup.json
+    python tools/bench_startup.py --compare startup.json --max-regression 0.2
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TARGETS = ['gui.wechat_gui', 'core.cli']
+# 启动时不应加载的依赖：只在选择对应登录方式、显示二维码或使用异步引擎时才需要
+LAZY_MODULES = ['selenium', 'webdriver_manager', 'PIL', 'qrcode', 'aiohttp', 'login']
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$')
+
+
+def measure_once(module: str) -> dict:
+    """在新的解释器中导入模块一次，返回 {total_ms, modules: [(名称, 累计ms, 层级)]}
+
+    只统计由该模块引起的导入，解释器启动时 site 导入的模块不计在内。
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr[-2000:]}")
+    # -X importtime 按导入完成的顺序输出，子模块在父模块之前；
+    # 入口模块之前、上一个顶层模块之后的各行就是它引起的导入
+    segment = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative_us, indent, name = match.groups()
+        level = len(indent) // 2
+        if level == 0 and name != module:
+            segment = []
+            continue
+        segment.append((name, int(cumulative_us) / 1000, level))
+        if level == 0:
+            return {'total_ms': segment[-1][1], 'modules': segment}
+    raise RuntimeError(f"没有找到 {module} 的导入耗时")
+
+
+def measure(module: str, rounds: int, top: int) -> dict:
+    """多轮测量取中位数，返回可保存为基线的统计结果"""
+    runs = [measure_once(module) for _ in range(rounds)]
+    modules = runs[-1]['modules']
+    # 入口模块直接导入的依赖按累计耗时排序，最能说明启动开销来自哪里
+    direct = sorted(((name, ms) for name, ms, level in modules if level == 1),
+                    key=lambda item: item[1], reverse=True)
+    loaded = sorted({name.split('.')[0] for name, _, _ in modules} & set(LAZY_MODULES))
+    return {
+        'module': module,
+        'median_ms': round(statistics.median(run['total_ms'] for run in runs), 1),
+        'min_ms': round(min(run['total_ms'] for run in runs), 1),
+        'modules': len(modules),
+        'heaviest': [[name, round(ms, 1)] for name, ms in direct[:top]],
+        'lazy_loaded': loaded,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='启动导入耗时基准 (-X importtime)')
+    parser.add_argument('targets', nargs='*', default=DEFAULT_TARGETS,
+                        help=f"要测量的模块 (默认: {' '.join(DEFAULT_TARGETS)})")
+    parser.add_argument('-n', '--rounds', type=int, default=5, help='重复轮数 (默认: 5)')
+    parser.add_argument('--top', type=int, default=10, help='列出耗时最多的顶层依赖数 (默认: 10)')
+    parser.add_argument('--save', help='把结果保存为基线 JSON 文件')
+    parser.add_argument('--compare', help='与基线 JSON 文件比较')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='与基线比较时允许的耗时增加比例 (默认: 0.25)')
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.targets:
+        stats = measure(module, args.rounds, args.top)
+        results[module] = stats
+        print(f"{module}: 中位数 {stats['median_ms']:.1f} ms (最快 {stats['min_ms']:.1f} ms), "
+              f"共导入 {stats['modules']} 个模块")
+        for name, ms in stats['heaviest']:
+            print(f"    {ms:8.1f} ms  {name}")
+        if stats['lazy_loaded']:
+            print(f"    ⚠️ 启动时加载了应按需导入的依赖: {', '.join(stats['lazy_loaded'])}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存到 {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressed = False
+        for module, stats in results.items():
+            if module not in baseline:
+                continue
+            before = baseline[module]['median_ms']
+            change = (stats['median_ms'] - before) / before if before else 0
+            flag = '退化' if change > args.max_regression else '正常'
+            regressed |= change > args.max_regression
+            print(f"{module}: 基线 {before:.1f} ms -> {stats['median_ms']:.1f} ms ({change:+.0%}) {flag}")
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()